@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Compare speed and results of the image palette reduction engines
+of the import_pil plugin.
+
+Usage: ./maintenance_scripts/benchmark_ima.py [ENGINE,ENGINE...] [IMAGE_PATH...]
+(screenshots are used if no images are given)
+"""
+import os
+import sys
+from glob import glob
+from time import time
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '../plugins/import_pil'))
+
+# pylint: disable=wrong-import-position,import-error
+from ima import IMA_ENGINE_PYTHON, IMA_ENGINE_NUMPY, get_hex_palette  # noqa
+
+
+QUALITIES = (100, 200, 400)
+ACCURACIES = (16, 48)
+
+
+def main():
+    engines = sys.argv[1].split(',') if len(sys.argv) > 1 else [
+        IMA_ENGINE_NUMPY, IMA_ENGINE_PYTHON,
+    ]
+    image_paths = sys.argv[2:] or sorted(glob(os.path.join(SCRIPT_DIR, '../screenshots/*.png')))
+    total_times = {engine: 0 for engine in engines}
+    mismatches = 0
+    for image_path in image_paths:
+        for quality in QUALITIES:
+            for accuracy in ACCURACIES:
+                palettes = []
+                line = []
+                for engine in engines:
+                    before = time()
+                    palettes.append(get_hex_palette(
+                        image_path, accuracy=accuracy, quality=quality, engine=engine
+                    ))
+                    took = time() - before
+                    total_times[engine] += took
+                    line.append('{}: {:.3f}s'.format(engine, took))
+                if any(palette != palettes[0] for palette in palettes):
+                    mismatches += 1
+                    line.append('MISMATCH')
+                print('{} quality={} accuracy={}: {}'.format(
+                    os.path.basename(image_path), quality, accuracy, ', '.join(line)
+                ))
+    print()
+    for engine, total_time in total_times.items():
+        print('{}: {:.3f}s total'.format(engine, total_time))
+    if mismatches:
+        print('{} mismatches found'.format(mismatches))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
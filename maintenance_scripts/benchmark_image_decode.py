@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare time and peak memory usage of reading the image colors
+by the import_pil plugin with and without the reduced-resolution decode.
+
+Each measurement runs in a separate process, so peak RSS of one doesn't
+affect the others.
+
+Usage: ./maintenance_scripts/benchmark_image_decode.py [IMAGE_PATH...]
+(large JPEG and PNG images are generated if no images are given)
+"""
+import os
+import sys
+import resource
+import tempfile
+from multiprocessing import Pool
+from time import time
+
+from PIL import Image
+
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '../plugins/import_pil'))
+
+# pylint: disable=wrong-import-position,import-error
+from ima import jolteon  # noqa
+
+
+QUALITY = 400
+GENERATED_IMAGE_SIZE = (7680, 4320)
+
+
+def generate_images(target_dir):
+    image = Image.merge('RGB', [
+        Image.linear_gradient('L').resize(GENERATED_IMAGE_SIZE),
+        Image.radial_gradient('L').resize(GENERATED_IMAGE_SIZE),
+        Image.effect_noise(GENERATED_IMAGE_SIZE, 64),
+    ])
+    image_paths = []
+    for extension in ('jpg', 'png'):
+        image_path = os.path.join(target_dir, 'generated_8k.{}'.format(extension))
+        image.save(image_path)
+        image_paths.append(image_path)
+    return image_paths
+
+
+def measure(image_path, reduced_decode):
+    before = time()
+    colors = jolteon(Image.open(image_path), QUALITY, reduced_decode=reduced_decode)
+    took = time() - before
+    # kilobytes on linux:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return took, peak_rss, len(colors)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_paths = sys.argv[1:] or generate_images(temp_dir)
+        for image_path in image_paths:
+            line = []
+            for reduced_decode in (False, True):
+                with Pool(1, maxtasksperchild=1) as pool:
+                    took, peak_rss, num_colors = pool.apply(
+                        measure, (image_path, reduced_decode)
+                    )
+                line.append('{}: {:.3f}s, {:.0f}MiB peak RSS, {} colors'.format(
+                    'reduced' if reduced_decode else 'full', took, peak_rss, num_colors
+                ))
+            print('{} {}x{}: {}'.format(
+                os.path.basename(image_path), *Image.open(image_path).size, '; '.join(line)
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compare speed and results of the smarty terminal palette search engines
+for all the terminal templates.
+
+Usage: ./maintenance_scripts/benchmark_terminal_smarty.py [ACCURACY] [ENGINE,ENGINE...]
+"""
+import os
+import re
+import sys
+from time import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from oomox_gui.config import COLORS_DIR, TERMINAL_TEMPLATE_DIR  # noqa
+from oomox_gui.terminal import import_xcolors  # noqa
+from oomox_gui.terminal_smarty import (  # noqa
+    SMARTY_ENGINE_REFERENCE, SMARTY_ENGINE_PYTHON, SMARTY_ENGINE_NUMPY, SMARTY_ENGINE_BOUNDED,
+    prepare_smarty_search, smarty_search,
+)
+
+
+SAMPLE_PRESETS = (
+    'Monovedek/monovedek',
+    'Retro/c64',
+    'Featured/autumn',
+    'Featured/Gigavolt',
+)
+HEX_COLOR_REGEX = re.compile('^[0-9a-fA-F]{6}$')
+
+
+def read_preset_colors(preset_path):
+    colors = {}
+    with open(preset_path) as file_object:
+        for line in file_object.readlines():
+            key, _sep, value = line.strip().partition('=')
+            if key.startswith('TERMINAL_') or not HEX_COLOR_REGEX.match(value):
+                continue
+            colors[key] = value.lower()
+    return colors
+
+
+def main():  # pylint: disable=too-many-locals
+    accuracy = int(sys.argv[1]) if len(sys.argv) > 1 else 0x20
+    engines = sys.argv[2].split(',') if len(sys.argv) > 2 else [
+        SMARTY_ENGINE_NUMPY, SMARTY_ENGINE_BOUNDED, SMARTY_ENGINE_PYTHON,
+    ]
+    if SMARTY_ENGINE_REFERENCE in engines:
+        print("Warning: reference engine is very slow")
+    presets = [
+        os.path.join(COLORS_DIR, preset_name) for preset_name in SAMPLE_PRESETS
+        if os.path.exists(os.path.join(COLORS_DIR, preset_name))
+    ]
+    total_times = {engine: 0 for engine in engines}
+    mismatches = 0
+    for template_name in sorted(os.listdir(TERMINAL_TEMPLATE_DIR)):
+        reference_colors = import_xcolors(os.path.join(TERMINAL_TEMPLATE_DIR, template_name))
+        for preset_path in presets:
+            preset_colors = read_preset_colors(preset_path)
+            all_colors = sorted(set(preset_colors.values()))
+            theme_bg = preset_colors.get('TXT_BG', preset_colors.get('BG', all_colors[0]))
+            for extend_palette in (False, True):
+                search = prepare_smarty_search(
+                    reference_colors, all_colors, theme_bg,
+                    accuracy=accuracy, extend_palette=extend_palette,
+                )
+                offsets = []
+                line = []
+                for engine in engines:
+                    before = time()
+                    best_offset, _best_score = smarty_search(search, engine=engine)
+                    took = time() - before
+                    total_times[engine] += took
+                    offsets.append(best_offset)
+                    line.append('{}: {:.3f}s'.format(engine, took))
+                if any(offset != offsets[0] for offset in offsets):
+                    mismatches += 1
+                    line.append('MISMATCH {}'.format(offsets))
+                print('{} {} extend={}: {}'.format(
+                    template_name, os.path.basename(preset_path), extend_palette,
+                    ', '.join(line)
+                ))
+    print()
+    for engine, total_time in total_times.items():
+        print('{}: {:.3f}s total'.format(engine, total_time))
+    if mismatches:
+        print('{} mismatches found'.format(mismatches))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
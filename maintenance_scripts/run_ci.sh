@@ -28,16 +28,25 @@ python3 -O -m compileall ./oomox_gui/ ./plugins/*/oomox_plugin.py | (grep -v -e
 echo ':: python compile passed ::'
 
 echo -e "\n== Running flake8:"
-flake8 oomox_gui/ ./plugins/*/oomox_plugin.py
+flake8 oomox_gui/ ./plugins/*/oomox_plugin.py ./plugins/*/export_dialog.py
 echo ':: flake8 passed ::'
 
 echo -e "\n== Running pylint:"
-#pylint --jobs="$(nproc)" oomox_gui ./plugins/*/oomox_plugin.py --score no
+#pylint --jobs="$(nproc)" oomox_gui ./plugins/*/oomox_plugin.py ./plugins/*/export_dialog.py --score no
 # @TODO: --jobs is broken at the moment: https://github.com/PyCQA/pylint/issues/374
-pylint oomox_gui ./plugins/*/oomox_plugin.py --score no
+pylint oomox_gui ./plugins/*/oomox_plugin.py ./plugins/*/export_dialog.py --score no
 echo ':: pylint passed ::'
 
 
+if [[ "${SKIP_PYTEST:-}" = "1" ]] ; then
+	echo -e "\n!! WARNING !! skipping pytest"
+else
+	echo -e "\n== Running pytest:"
+	python3 -m pytest -q tests/
+	echo ':: pytest passed ::'
+fi
+
+
 if [[ "${SKIP_MYPY:-}" = "1" ]] ; then
 	echo -e "\n!! WARNING !! skipping mypy"
 else
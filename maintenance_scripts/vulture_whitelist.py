@@ -34,13 +34,18 @@ whitelist.OomoxPlugin.theme_model_options
 whitelist.OomoxPlugin.theme_model_icons
 whitelist.OomoxPlugin.theme_model_extra
 whitelist.ExportDialog.show_text
+whitelist.OomoxImportPlugin.is_task_cancelled
+whitelist.export_common.CommonGtkThemeExportDialog
+
+# terminal api
+whitelist.terminal.import_xcolors
 
 
 # to fix ?
 whitelist.preview_icons.IconsNames.HOME
 whitelist.preview_icons.IconsNames.DESKTOP
 whitelist.preview_icons.IconsNames.FILE_MANAGER
-whitelist.terminal.ProgressBar.message
+whitelist.terminal_smarty.ProgressBar.message
 whitelist.OomoxPlugin.haishoku
 whitelist.OomoxPlugin.colorthief
 
@@ -1,4 +1,5 @@
-import gi
+from time import time
 
 
-gi.require_version('Gtk', '3.0')
+# the startup times of the app are measured from here:
+STARTUP_TIME = time()
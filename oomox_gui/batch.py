@@ -0,0 +1,213 @@
+"""
+Resolve presets without GUI: read them with all the fallback values applied
+and terminal colors generated, and print them to stdout as JSON lines:
+
+    {"path": "/path/to/preset", "colorscheme": {...}, "time": 0.123}
+
+or, if a preset can't be resolved:
+
+    {"path": "/path/to/preset", "error": "..."}
+
+With `--rank-terminal-templates` each result also gets the terminal
+templates ranked by how well they fit the preset colors (see
+`terminal.rank_terminal_templates`), from the best one:
+
+    {..., "terminal_templates": [["waltz", 8.86], ["jwr-dark", 7.97], ...]}
+
+Presets are resolved in parallel processes (or, with `-j 1`, one by one
+with the terminal palette search of each split between
+`--smarty-processes`), progress and timings are printed to stderr.
+
+Usage: python3 -m oomox_gui.batch [-j JOBS] [--smarty-processes N]
+                                  [--rank-terminal-templates] [PRESET_PATH...]
+(if no paths are given they are read from stdin, one per line)
+"""
+import os
+import sys
+import json
+import argparse
+import traceback
+from functools import partial
+from itertools import count
+from multiprocessing.pool import Pool
+from time import time
+
+from .theme_file_parser import read_colorscheme_from_path
+from .terminal import generate_terminal_colors_for_oomox, rank_terminal_templates
+from .plugin_api import OomoxImportPlugin
+
+
+class BatchApp():
+    """
+    Runs the tasks scheduled by the import plugins and the terminal palette
+    generator right away, in place of the GUI app.
+    """
+
+    _task_ids = None
+
+    def __init__(self):
+        self._task_ids = count(1)
+
+    def schedule_task(
+            self, task, *args,
+            callback=None, error_callback=None, **_kwargs
+    ):
+        task_id = next(self._task_ids)
+        try:
+            result = task(*args)
+        except Exception as exc:  # pylint: disable=broad-except
+            if not error_callback:
+                raise
+            error_callback(exc)
+        else:
+            if callback:
+                callback(result)
+        return task_id
+
+    @staticmethod
+    def cancel_task(_task_id):
+        return False
+
+    @staticmethod
+    def is_task_cancelled(_task_id):
+        return False
+
+    @staticmethod
+    def disable(_message=''):
+        pass
+
+    @staticmethod
+    def enable():
+        pass
+
+
+_BATCH_APP = BatchApp()
+
+
+def _init_worker():
+    # the resolvers could print warnings, keep stdout only for the results:
+    sys.stdout = sys.stderr
+    OomoxImportPlugin.set_app(_BATCH_APP)
+
+
+def resolve_preset(preset_path, smarty_processes=None, rank_templates=False):
+    """
+    Returns a dict which could be printed as a JSON line.
+    """
+    started_at = time()
+    try:
+        colorschemes = []
+        read_colorscheme_from_path(preset_path, callback=colorschemes.append)
+        if not colorschemes:
+            raise RuntimeError("Colorscheme wasn't read")
+        resolved_colorschemes = []
+        generate_terminal_colors_for_oomox(
+            colorschemes[0], app=_BATCH_APP, result_callback=resolved_colorschemes.append,
+            processes=smarty_processes,
+        )
+        if not resolved_colorschemes:
+            raise RuntimeError("Terminal colors weren't generated")
+        result = {
+            'path': preset_path,
+            'colorscheme': resolved_colorschemes[-1],
+        }
+        if rank_templates:
+            result['terminal_templates'] = rank_terminal_templates(
+                colorschemes[0],
+                colorschemes[0]['TERMINAL_BACKGROUND'],
+                colorschemes[0]['TERMINAL_FOREGROUND'],
+                auto_swap_colors=colorschemes[0]['TERMINAL_THEME_AUTO_BGFG'],
+                extend_palette=colorschemes[0]['TERMINAL_THEME_EXTEND_PALETTE'],
+            )
+    except Exception as exc:  # pylint: disable=broad-except
+        return {
+            'path': preset_path,
+            'error': '{}: {}'.format(exc.__class__.__name__, exc),
+            'traceback': traceback.format_exc(),
+            'time': time() - started_at,
+        }
+    result['time'] = time() - started_at
+    return result
+
+
+def _read_preset_paths(file_object):
+    for line in file_object:
+        preset_path = line.strip()
+        if preset_path:
+            yield preset_path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python3 -m oomox_gui.batch',
+        description=(
+            'Resolve preset colorschemes (with fallback values and terminal colors) '
+            'and print them to stdout as JSON lines.'
+        ),
+    )
+    parser.add_argument(
+        'preset_paths', metavar='PRESET_PATH', nargs='*',
+        help='preset files (read from stdin, one per line, if not given)',
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+        help='number of worker processes (default: number of CPUs)',
+    )
+    parser.add_argument(
+        '--smarty-processes', type=int, default=None, metavar='N',
+        help=(
+            'split the terminal palette search of each preset between N processes '
+            '(only with -j 1, as the worker processes can\'t start their own ones)'
+        ),
+    )
+    parser.add_argument(
+        '--rank-terminal-templates', action='store_true',
+        help='also rank the terminal templates by how well they fit each preset',
+    )
+    args = parser.parse_args()
+    if args.smarty_processes and args.smarty_processes > 1 and args.jobs > 1:
+        parser.error('--smarty-processes could be used only with -j 1')
+
+    if args.preset_paths:
+        preset_paths = (os.path.abspath(path) for path in args.preset_paths)
+        total = str(len(args.preset_paths))
+    else:
+        preset_paths = (os.path.abspath(path) for path in _read_preset_paths(sys.stdin))
+        total = '?'
+
+    output = sys.stdout
+    _init_worker()
+    started_at = time()
+    num_errors = 0
+    pool = None
+    if args.jobs > 1:
+        pool = Pool(args.jobs, initializer=_init_worker)
+        results = pool.imap(partial(
+            resolve_preset, rank_templates=args.rank_terminal_templates,
+        ), preset_paths)
+    else:
+        results = map(partial(
+            resolve_preset, smarty_processes=args.smarty_processes,
+            rank_templates=args.rank_terminal_templates,
+        ), preset_paths)
+    try:
+        for index, result in enumerate(results, 1):
+            if 'error' in result:
+                num_errors += 1
+                sys.stderr.write(result.pop('traceback'))
+            output.write(json.dumps(result, sort_keys=True) + '\n')
+            output.flush()
+            sys.stderr.write('[{}/{}] {}: {} ({:.3f}s)\n'.format(
+                index, total, result['path'],
+                'ERROR' if 'error' in result else 'ok',
+                result['time'],
+            ))
+    finally:
+        if pool:
+            pool.terminate()
+    sys.stderr.write('Done in {:.3f}s, {} errors\n'.format(time() - started_at, num_errors))
+    sys.exit(1 if num_errors else 0)
+
+
+if __name__ == '__main__':
+    main()
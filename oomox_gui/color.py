@@ -1,6 +1,3 @@
-from gi.repository import Gdk
-
-
 def hex_to_int(text):
     return int("0x{}".format(text), 0)
 
@@ -113,6 +110,7 @@ def find_closest_color(color_hex, colors_hex, min_lightness=0, max_lightness=255
 
 
 def convert_theme_color_to_gdk(theme_color):
+    from gi.repository import Gdk  # pylint: disable=bad-option-value,import-outside-toplevel
     gdk_color = Gdk.RGBA()
     gdk_color.parse("#" + theme_color)
     return gdk_color
@@ -126,6 +124,7 @@ def convert_gdk_to_theme_color(gdk_color):
 
 
 def mix_gdk_colors(gdk_color_1, gdk_color_2, ratio):
+    from gi.repository import Gdk  # pylint: disable=bad-option-value,import-outside-toplevel
     result_gdk_color = Gdk.RGBA()
     for attr in ('red', 'green', 'blue', 'alpha'):
         setattr(
@@ -138,10 +137,11 @@ def mix_gdk_colors(gdk_color_1, gdk_color_2, ratio):
 
 
 def mix_theme_colors(theme_color_1, theme_color_2, ratio):
-    return convert_gdk_to_theme_color(
-        mix_gdk_colors(
-            convert_theme_color_to_gdk(theme_color_1),
-            convert_theme_color_to_gdk(theme_color_2),
-            ratio=ratio
+    # same as mixing them as Gdk.RGBA, which keeps channels as floats from 0 to 1:
+    return color_hex_from_list([
+        (channel_1 / 255 * ratio + channel_2 / 255 * (1 - ratio)) * 255
+        for channel_1, channel_2 in zip(
+            int_list_from_hex(theme_color_1),
+            int_list_from_hex(theme_color_2),
         )
-    )
+    ])
@@ -2,6 +2,7 @@
 from gi.repository import Gtk, GLib
 
 from .theme_model import THEME_MODEL, get_theme_options_by_key
+from .theme_file_parser import FALLBACK_RESOLVER
 from .palette_cache import PaletteCache
 from .color import (
     convert_theme_color_to_gdk, convert_gdk_to_theme_color,
@@ -14,6 +15,9 @@ from .i18n import _
 SECTION_MARGIN = 20
 LIST_ITEM_MARGIN = 10
 
+# edits made within that time (in ms) from each other are applied at once:
+COLOR_EDIT_COALESCE_DELAY = 120
+
 
 def check_value_filter(value_filter_data, colorscheme):
     filter_results = []
@@ -517,6 +521,7 @@ class SectionListBox(Gtk.Box):
 class ThemeColorsList(Gtk.ScrolledWindow):
 
     color_edited_callback = None
+    color_edit_started_callback = None
     theme_reload_callback = None
     transient_for = None
     theme = None
@@ -524,10 +529,34 @@ class ThemeColorsList(Gtk.ScrolledWindow):
     listbox = None
     _all_rows = None
     _error_messages_row = None
+    _color_edited_timeout_id = None
 
     def color_edited(self, key, value):
+        old_value = self.theme.get(key)
         self.theme[key] = value
+        updated_keys = FALLBACK_RESOLVER.resolve_changed(self.theme, {key: old_value})
+        if updated_keys:
+            for section_rows in self._all_rows.values():
+                for row in section_rows.values():
+                    if isinstance(row, OomoxListBoxRow) and row.key in updated_keys:
+                        row.set_value(self.theme[row.key])
+        # the theme is already changed, even if the edit is not applied yet:
+        self.color_edit_started_callback()
+        if self._color_edited_timeout_id:
+            GLib.source_remove(self._color_edited_timeout_id)
+        self._color_edited_timeout_id = GLib.timeout_add(
+            COLOR_EDIT_COALESCE_DELAY, self._on_color_edited_timeout
+        )
+
+    def _on_color_edited_timeout(self):
+        self._color_edited_timeout_id = None
         self.color_edited_callback(self.theme)
+        return False
+
+    def flush_color_edits(self):
+        if self._color_edited_timeout_id:
+            GLib.source_remove(self._color_edited_timeout_id)
+            self._on_color_edited_timeout()
 
     def build_theme_model_rows(self):  # pylint: disable=too-many-branches
         self._error_messages_row = SectionHeader()
@@ -617,6 +646,9 @@ class ThemeColorsList(Gtk.ScrolledWindow):
             self.mainbox.add(section_box)
 
     def open_theme(self, theme):  # pylint: disable=too-many-branches
+        if self._color_edited_timeout_id:
+            GLib.source_remove(self._color_edited_timeout_id)
+            self._color_edited_timeout_id = None
         self.theme = theme
         error_messages = []
         if "NOGUI" in theme:
@@ -677,11 +709,15 @@ class ThemeColorsList(Gtk.ScrolledWindow):
                     row.set_value(new_value)
                     row.callback(row.key, row.value)
 
-    def __init__(self, color_edited_callback, theme_reload_callback, transient_for):
+    def __init__(
+            self, color_edited_callback, color_edit_started_callback,
+            theme_reload_callback, transient_for
+    ):
         self.transient_for = transient_for
         super().__init__()
         self.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
         self.color_edited_callback = color_edited_callback
+        self.color_edit_started_callback = color_edit_started_callback
         self.theme_reload_callback = theme_reload_callback
 
         self.mainbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
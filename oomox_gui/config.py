@@ -38,6 +38,9 @@ USER_PALETTE_PATH = os.path.join(
 USER_EXPORT_CONFIG_DIR = os.path.join(
     USER_CONFIG_DIR, "export_config/"
 )
+USER_CACHE_DIR = os.path.join(
+    USER_CONFIG_DIR, "cache/"
+)
 
 
 FALLBACK_COLOR = "F33333"
@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+import tempfile
+
+from .config import USER_CACHE_DIR
+from .helpers import mkdir_p
+
+
+class DiskCache():
+    """
+    Persistent cache of JSON-serializable values, one file per entry.
+
+    Entries are written atomically (temporary file + rename), so concurrent
+    processes never see partial results. When the number of entries exceeds
+    `max_entries` the least recently used ones (by file mtime, which is
+    refreshed on each hit) are removed, leaving `EVICT_TO_RATIO` of
+    `max_entries`. The number of entries is tracked in memory, so the cache
+    directory is listed only when they're evicted. Changing `version`
+    invalidates all the entries stored by the previous versions.
+    """
+
+    name = None
+    version = None
+    max_entries = None
+    cache_dir = None
+    _num_entries = None
+
+    ENTRY_EXTENSION = '.json'
+    EVICT_TO_RATIO = 0.9
+
+    def __init__(self, name, version, max_entries=1000):
+        self.name = name
+        self.version = version
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(USER_CACHE_DIR, name)
+
+    def get_key(self, *key_parts):
+        return hashlib.sha256(
+            json.dumps([self.version, key_parts], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+
+    def _get_entry_path(self, key):
+        return os.path.join(self.cache_dir, key + self.ENTRY_EXTENSION)
+
+    def get(self, key):
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as file_object:
+                entry = json.load(file_object)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('version') != self.version:
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry.get('value')
+
+    def set(self, key, value):
+        try:
+            mkdir_p(self.cache_dir)
+            if self._num_entries is None:
+                self._num_entries = len(self._list_entries())
+            entry_path = self._get_entry_path(key)
+            is_new_entry = not os.path.exists(entry_path)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self.cache_dir, prefix='.', suffix='.tmp'
+            )
+            try:
+                with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file_object:
+                    json.dump({'version': self.version, 'value': value}, file_object)
+                os.replace(temp_path, entry_path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+            if is_new_entry:
+                self._num_entries += 1
+            if self._num_entries > self.max_entries:
+                self._evict()
+        except OSError as exc:
+            print("Can't write cache entry to {}:".format(self.cache_dir))
+            print(exc)
+
+    def _list_entries(self):
+        with os.scandir(self.cache_dir) as dir_entries:
+            return [
+                dir_entry for dir_entry in dir_entries
+                if dir_entry.name.endswith(self.ENTRY_EXTENSION)
+            ]
+
+    def _evict(self):
+        entries = []
+        for dir_entry in self._list_entries():
+            try:
+                entries.append((dir_entry.stat().st_mtime, dir_entry.path))
+            except FileNotFoundError:
+                pass
+        entries.sort()
+        num_to_keep = max(int(self.max_entries * self.EVICT_TO_RATIO), 1)
+        for _mtime, entry_path in entries[:max(len(entries) - num_to_keep, 0)]:
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+        self._num_entries = min(len(entries), num_to_keep)
@@ -0,0 +1,11 @@
+"""
+Should be imported before the first import from `gi.repository`.
+
+It's not done on the `oomox_gui` package import, so the modules which don't
+need GTK (color math, theme model, theme file parser, terminal colors and
+import plugins) could be used without gi installed or without a display.
+"""
+import gi
+
+
+gi.require_version('Gtk', '3.0')
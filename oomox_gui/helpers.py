@@ -1,6 +1,7 @@
 import os
 import sys
-import importlib
+import importlib.util
+import importlib.machinery
 
 
 def mkdir_p(path):
@@ -9,13 +10,6 @@ def mkdir_p(path):
     os.makedirs(path)
 
 
-def ls_r(path):
-    return [
-        os.path.join(files[0], file)
-        for files in os.walk(path, followlinks=True) for file in files[2]
-    ]
-
-
 def get_plugin_module(name, path, submodule=None):
     if sys.version_info.minor >= 5:
         spec = importlib.util.spec_from_file_location(name, path)  # pylint: disable=no-member
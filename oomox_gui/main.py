@@ -5,9 +5,13 @@ import sys
 import signal
 import shutil
 import traceback
+from collections import OrderedDict
+from time import time
 
-from gi.repository import Gtk, Gio, GLib, Gdk
+from . import gi_versions  # noqa  pylint: disable=unused-import
+from gi.repository import Gtk, Gio, GLib  # pylint: disable=wrong-import-order
 
+from . import STARTUP_TIME
 from .i18n import _
 from .config import USER_COLORS_DIR, SCRIPT_DIR
 from .helpers import mkdir_p
@@ -25,12 +29,16 @@ from .preset_list import ThemePresetList
 from .colors_list import ThemeColorsList
 from .preview import ThemePreview
 from .export_common import export_terminal_theme
-from .terminal import generate_terminal_colors_for_oomox
+from .terminal import (
+    generate_terminal_colors_for_oomox, SMARTY_PREVIEW_TIME_BUDGET,
+)
 from .plugin_loader import (
     THEME_PLUGINS, ICONS_PLUGINS, IMPORT_PLUGINS, EXPORT_PLUGINS,
+    add_plugin_error_callback,
 )
-from .plugin_api import PLUGIN_PATH_PREFIX
+from .plugin_api import PLUGIN_PATH_PREFIX, OomoxImportPlugin
 from .settings import UI_SETTINGS
+from .task_executor import TaskExecutor, TASK_BACKEND_THREAD
 
 
 class NewDialog(EntryDialog):
@@ -84,6 +92,13 @@ def dialog_is_yes(dialog):
     return dialog.run() in (Gtk.ResponseType.YES, Gtk.ResponseType.OK)
 
 
+class StartupStages:
+    WINDOW = 'window'
+    FIRST_PAINT = 'first_paint'
+    EDITOR = 'editor'
+    READY = 'ready'
+
+
 class AppActions(ActionsEnum):
     _target = "app"
     quit = "quit"
@@ -155,8 +170,16 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
     spinner_message = None
     spinner_revealer = None
 
+    task_executor = None
+    # seconds since the import of oomox_gui when each of StartupStages was reached:
+    startup_times = None
+
+    _actions_disabled_on_startup = None
+    _first_draw_signal = None
+
     _currently_focused_widget = None
     _inhibit_id = None
+    _colorscheme_generation = 0
 
     def _unset_save_needed(self):
         self.headerbar.props.title = self.colorscheme_name
@@ -177,6 +200,7 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
         self.theme_edited = True
 
     def save_theme(self, name=None):
+        self.theme_edit.flush_color_edits()
         if not name:
             name = self.colorscheme_name
         if not self.preset_list.preset_is_saveable():
@@ -301,6 +325,10 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
             self.rename_theme(entry_text=new_theme_name)
 
     def ask_unsaved_changes(self):
+        if not self.theme_edit:
+            # still starting up
+            return
+        self.theme_edit.flush_color_edits()
         if self.theme_edited:
             if dialog_is_yes(UnsavedDialog(transient_for=self)):
                 self.save_theme()
@@ -335,11 +363,15 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
             if icons_plugin.name == icons_plugin_name:
                 self.plugin_icons = icons_plugin
 
-    def load_colorscheme(self, colorscheme):
+    def load_colorscheme(self, colorscheme, time_budget=None, incremental=False):
         self.colorscheme = colorscheme
+        self._colorscheme_generation += 1
         self._select_theme_plugin()
         self._select_icons_plugin()
-        self.generate_terminal_colors(callback=self._load_colorscheme_callback)
+        self.generate_terminal_colors(
+            callback=self._load_colorscheme_callback,
+            time_budget=time_budget, incremental=incremental,
+        )
 
     def _load_colorscheme_callback(self):
         try:
@@ -367,9 +399,20 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
             error_dialog.run()
             error_dialog.destroy()
 
-    @staticmethod
-    def schedule_task(task, *args):
-        Gdk.threads_add_idle(GLib.PRIORITY_LOW, task, *args)
+    def schedule_task(
+            self, task, *args,
+            callback=None, error_callback=None, backend=TASK_BACKEND_THREAD, group=None
+    ):  # pylint: disable=too-many-arguments
+        return self.task_executor.submit(
+            task, *args,
+            callback=callback, error_callback=error_callback, backend=backend, group=group,
+        )
+
+    def cancel_task(self, task_id):
+        return self.task_executor.cancel(task_id)
+
+    def is_task_cancelled(self, task_id):
+        return self.task_executor.is_cancelled(task_id)
 
     def on_preset_selected(self, selected_preset, selected_preset_path):
         self.ask_unsaved_changes()
@@ -391,18 +434,33 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
         )
         return self.colorscheme
 
-    def generate_terminal_colors(self, callback):
+    def generate_terminal_colors(self, callback, time_budget=None, incremental=False):
+        generation = self._colorscheme_generation
+
         def _generate_terminal_colors(colors):
+            # colorscheme was loaded again or edited since then:
+            if generation != self._colorscheme_generation:
+                return
             self.colorscheme.update(colors)
             callback()
 
         generate_terminal_colors_for_oomox(
             self.colorscheme,
             app=self, result_callback=_generate_terminal_colors,
+            time_budget=time_budget, incremental=incremental,
         )
 
+    def on_color_edit_started(self):
+        # terminal colors being generated for the colorscheme before the
+        # edit shouldn't be applied to it while the edit is not flushed yet:
+        self._colorscheme_generation += 1
+
     def on_color_edited(self, colorscheme):
-        self.load_colorscheme(colorscheme)
+        # show quick coarse terminal palette while editing,
+        # more accurate one will replace it when ready:
+        self.load_colorscheme(
+            colorscheme, time_budget=SMARTY_PREVIEW_TIME_BUDGET, incremental=True,
+        )
         self._set_save_needed()
 
     def reload_presets(self):
@@ -502,6 +560,7 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
 
     def _before_quit(self):
         self.ask_unsaved_changes()
+        self.task_executor.shutdown()
         UI_SETTINGS.window_width, UI_SETTINGS.window_height = self.get_size()
         UI_SETTINGS.save()
 
@@ -726,8 +785,63 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
             )
 
     def _init_plugins(self):
-        for plugin in IMPORT_PLUGINS.values():
-            plugin.set_app(self)
+        # set for the base class, so plugins don't need to be loaded for that:
+        OomoxImportPlugin.set_app(self)
+
+    def _init_theme_edit(self):
+        self.theme_edit = ThemeColorsList(
+            color_edited_callback=self.on_color_edited,
+            color_edit_started_callback=self.on_color_edit_started,
+            theme_reload_callback=self.theme_reload,
+            transient_for=self
+        )
+        self.paned_box.pack2(self.theme_edit, resize=True, shrink=False)
+        self.theme_edit.show_all()
+        self.theme_edit.hide_all_rows()
+
+        self.box.pack_start(Gtk.Separator(), expand=False, fill=False, padding=0)
+        self.preview = ThemePreview()
+        self.box.pack_start(self.preview, expand=False, fill=False, padding=0)
+        self.box.show_all()
+        self.preview.hide()
+
+    def _init_preset_list(self):
+        # selects the first preset when ready, so should go after the editor:
+        self.preset_list = ThemePresetList(
+            preset_select_callback=self.on_preset_selected
+        )
+        self.paned_box.pack1(self.preset_list, resize=False, shrink=False)
+        self.preset_list.show_all()
+
+    def _record_startup_time(self, stage):
+        self.startup_times[stage] = time() - STARTUP_TIME
+
+    def _on_first_draw(self, _widget, _cairo_context):
+        self.disconnect(self._first_draw_signal)
+        self._record_startup_time(StartupStages.FIRST_PAINT)
+        self._schedule_startup_stages([
+            (StartupStages.EDITOR, self._init_theme_edit),
+            (StartupStages.READY, self._init_preset_list),
+        ])
+        return False
+
+    def _schedule_startup_stages(self, stages):
+        # each stage is run by its own idle callback, so the main loop
+        # handles the pending redraws and input events between them:
+        GLib.idle_add(self._run_startup_stage, stages)
+
+    def _run_startup_stage(self, stages):
+        stage, init_stage = stages[0]
+        init_stage()
+        self._record_startup_time(stage)
+        if stages[1:]:
+            self._schedule_startup_stages(stages[1:])
+            return False
+        for action in self._actions_disabled_on_startup:
+            action.set_enabled(True)
+        self.spinner_revealer.set_reveal_child(False)
+        self.spinner.stop()
+        return False
 
     def __init__(self, application):
         super().__init__(
@@ -737,31 +851,28 @@ class OomoxApplicationWindow(WindowWithActions):  # pylint: disable=too-many-ins
         )
         self.application = application
         self.colorscheme = {}
+        self.startup_times = OrderedDict()
+        self.task_executor = TaskExecutor()
         mkdir_p(USER_COLORS_DIR)
 
         self._init_actions()
         self._init_window()
         self._init_plugins()
 
-        self.preset_list = ThemePresetList(
-            preset_select_callback=self.on_preset_selected
-        )
-        self.paned_box.pack1(self.preset_list, resize=False, shrink=False)
-
-        self.theme_edit = ThemeColorsList(
-            color_edited_callback=self.on_color_edited,
-            theme_reload_callback=self.theme_reload,
-            transient_for=self
-        )
-        self.paned_box.pack2(self.theme_edit, resize=True, shrink=False)
-
-        self.box.pack_start(Gtk.Separator(), expand=False, fill=False, padding=0)
-        self.preview = ThemePreview()
-        self.box.pack_start(self.preview, expand=False, fill=False, padding=0)
-
+        # show the window first and build the editor and the preset list
+        # in the next main loop iterations after it's painted:
+        self._actions_disabled_on_startup = []
+        for action_name in self.list_actions():
+            action = self.lookup_action(action_name)
+            if action.get_enabled():
+                action.set_enabled(False)
+                self._actions_disabled_on_startup.append(action)
+        self.spinner_message.set_text(_("Loading…"))
+        self.spinner_revealer.set_reveal_child(True)
+        self.spinner.start()
+        self._first_draw_signal = self.connect("draw", self._on_first_draw)
         self.show_all()
-        self.theme_edit.hide_all_rows()
-        self.preview.hide()
+        self._record_startup_time(StartupStages.WINDOW)
 
         self.paned_box.set_position(UI_SETTINGS.preset_list_width)
         self.paned_box.connect("notify::position", self._on_pane_resize)
@@ -834,8 +945,21 @@ class OomoxGtkApplication(Gtk.Application):
         self.quit()
 
 
+def show_plugin_error(plugin_name, error_text):
+    error_dialog = Gtk.MessageDialog(
+        text=_('Error loading plugin "{plugin_name}"').format(
+            plugin_name=plugin_name
+        ),
+        secondary_text=error_text,
+        buttons=Gtk.ButtonsType.CLOSE
+    )
+    error_dialog.run()
+    error_dialog.destroy()
+
+
 def main():
 
+    add_plugin_error_callback(show_plugin_error)
     app = OomoxGtkApplication()
 
     def handle_sig_int(*_whatever):  # pragma: no cover
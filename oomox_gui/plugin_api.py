@@ -4,6 +4,8 @@ from abc import ABCMeta, abstractproperty, abstractmethod
 from enum import Enum
 
 from .config import FALLBACK_COLOR, USER_COLORS_DIR
+from .helpers import get_plugin_module
+from .task_executor import TASK_BACKEND_THREAD, TASK_BACKEND_PROCESS  # noqa  pylint: disable=unused-import
 
 
 if sys.version_info.minor >= 5:
@@ -23,6 +25,35 @@ if sys.version_info.minor >= 5:
 PLUGIN_PATH_PREFIX = "__plugin__"
 
 
+class LazyExportDialog():
+    """
+    Export dialogs need GTK, so keeping them in a separate module of the
+    plugin allows to use the rest of it (like the theme model) without GUI.
+    The module is imported on the first export:
+
+        export_dialog = LazyExportDialog(
+            os.path.join(PLUGIN_DIR, 'export_dialog.py'), 'MyThemeExportDialog'
+        )
+    """
+
+    module_path = None
+    class_name = None
+    _dialog_class = None
+
+    def __init__(self, module_path: str, class_name: str) -> None:
+        self.module_path = module_path
+        self.class_name = class_name
+
+    def __call__(self, *args: 'Any', **kwargs: 'Any') -> 'ExportDialog':
+        if not self._dialog_class:
+            self._dialog_class = get_plugin_module(
+                os.path.basename(os.path.dirname(self.module_path)) + '_export_dialog',
+                self.module_path,
+                self.class_name,
+            )
+        return self._dialog_class(*args, **kwargs)  # pylint: disable=not-callable
+
+
 class OomoxPlugin(metaclass=ABCMeta):
 
     @abstractproperty
@@ -153,6 +184,32 @@ class OomoxImportPlugin(OomoxPlugin):
     def get_app(cls):
         return cls._app
 
+    @classmethod
+    def schedule_task(
+            cls, task: 'Callable[..., Any]', *args: 'Any',
+            callback: 'Optional[Callable[[Any], None]]' = None,
+            error_callback: 'Optional[Callable[[Exception], None]]' = None,
+            backend: str = TASK_BACKEND_THREAD,
+            group: 'Optional[str]' = None
+    ) -> int:
+        """
+        Run the task in the background, `callback` (or `error_callback`)
+        is called in the main thread when it's done. Returns the task ID.
+        The previous unfinished task of the same `group` gets cancelled.
+        """
+        return cls.get_app().schedule_task(
+            task, *args,
+            callback=callback, error_callback=error_callback, backend=backend, group=group,
+        )
+
+    @classmethod
+    def cancel_task(cls, task_id: int) -> bool:
+        return cls.get_app().cancel_task(task_id)
+
+    @classmethod
+    def is_task_cancelled(cls, task_id: int) -> bool:
+        return cls.get_app().is_task_cancelled(task_id)
+
 
 class OomoxImportPluginAsync(OomoxImportPlugin):
 
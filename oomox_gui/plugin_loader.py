@@ -1,15 +1,16 @@
 import os
+import sys
 import traceback
+import importlib.util
+from collections.abc import Sequence
 
-from gi.repository import Gtk
-
-from .i18n import _
-from .config import PLUGINS_DIR, USER_PLUGINS_DIR
+from .config import PLUGINS_DIR, USER_PLUGINS_DIR, SCRIPT_DIR, TERMINAL_TEMPLATE_DIR
 from .plugin_api import (
     OomoxPlugin,
     OomoxImportPlugin, OomoxThemePlugin, OomoxIconsPlugin, OomoxExportPlugin,
 )
 from .helpers import get_plugin_module
+from .disk_cache import DiskCache
 
 
 ALL_PLUGINS = {}
@@ -18,28 +19,271 @@ ICONS_PLUGINS = {}
 EXPORT_PLUGINS = {}
 IMPORT_PLUGINS = {}
 
+# (plugin_name, error_text) of the plugins which failed to load:
+PLUGIN_ERRORS = []
+_PLUGIN_ERROR_CALLBACKS = []
+
+PLUGIN_TYPES = (
+    ('import', OomoxImportPlugin, IMPORT_PLUGINS),
+    ('theme', OomoxThemePlugin, THEME_PLUGINS),
+    ('icons', OomoxIconsPlugin, ICONS_PLUGINS),
+    ('export', OomoxExportPlugin, EXPORT_PLUGINS),
+)
+
+# bump it each time when the format of the manifest changes:
+PLUGIN_MANIFEST_VERSION = 1
+_PLUGIN_MANIFEST_CACHE = DiskCache(
+    name='plugin_manifests', version=PLUGIN_MANIFEST_VERSION, max_entries=200,
+)
+# plugins build some of their options from the contents of these directories
+# and from the availability of these optional modules, so the manifests
+# depend on them as well:
+_MANIFEST_DEPENDENCY_DIRS = (TERMINAL_TEMPLATE_DIR, )
+_MANIFEST_OPTIONAL_MODULES = ('numpy', 'colorz', 'colorthief', 'haishoku', )
+# marks the functions in the plugin attributes (like `fallback_function` in theme models):
+_MANIFEST_FUNCTION_MARKER = '__plugin_function__'
+
+
+class _NotSerializable(Exception):
+    pass
+
+
+def _to_manifest_value(value, path):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return [
+            _to_manifest_value(item, path + [index])
+            for index, item in enumerate(value)
+        ]
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {
+            key: _to_manifest_value(item, path + [key])
+            for key, item in value.items()
+        }
+    if callable(value) and path:
+        return {_MANIFEST_FUNCTION_MARKER: path}
+    raise _NotSerializable(value)
+
+
+def _from_manifest_value(value, plugin, attr_name):
+    if isinstance(value, list):
+        return [_from_manifest_value(item, plugin, attr_name) for item in value]
+    if isinstance(value, dict):
+        if _MANIFEST_FUNCTION_MARKER in value:
+            return LazyPluginFunction(plugin, attr_name, value[_MANIFEST_FUNCTION_MARKER])
+        return {
+            key: _from_manifest_value(item, plugin, attr_name)
+            for key, item in value.items()
+        }
+    return value
+
+
+def get_plugin_manifest(plugin):
+    """
+    Plugin types, names of all the plugin attributes and the values of the
+    public ones (except methods) which could be stored as JSON. Functions
+    inside of the attribute values are stored as references to be resolved
+    when called.
+    """
+    attributes = {}
+    for attr_name in dir(plugin):
+        if attr_name.startswith('_'):
+            continue
+        try:
+            value = getattr(plugin, attr_name)
+        except Exception:  # pylint: disable=broad-except
+            continue
+        if callable(value):
+            continue
+        try:
+            attributes[attr_name] = _to_manifest_value(value, [])
+        except _NotSerializable:
+            continue
+    return {
+        'types': [
+            plugin_type for plugin_type, plugin_class, _plugins in PLUGIN_TYPES
+            if isinstance(plugin, plugin_class)
+        ],
+        'attributes': attributes,
+        'attribute_names': dir(plugin),
+    }
+
+
+def _get_dir_mtimes(dir_path):
+    return sorted(
+        (dir_entry.name, dir_entry.stat().st_mtime_ns)
+        for dir_entry in os.scandir(dir_path)
+        if dir_entry.name.endswith('.py')
+    )
+
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _is_module_available(module_name):
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+_MANIFEST_ENVIRONMENT = []
+
+
+def _get_manifest_environment():
+    # plugins use oomox_gui modules and translations at import time as well:
+    if not _MANIFEST_ENVIRONMENT:
+        _MANIFEST_ENVIRONMENT.extend([
+            _get_dir_mtimes(SCRIPT_DIR),
+            [os.environ.get(env) for env in ('LANGUAGE', 'LC_ALL', 'LC_MESSAGES', 'LANG')],
+            [_get_mtime(dir_path) for dir_path in _MANIFEST_DEPENDENCY_DIRS],
+            [_is_module_available(module_name) for module_name in _MANIFEST_OPTIONAL_MODULES],
+        ])
+    return _MANIFEST_ENVIRONMENT
+
+
+def _get_manifest_key(plugin_name, plugin_path):
+    return _PLUGIN_MANIFEST_CACHE.get_key(
+        plugin_name, plugin_path,
+        _get_dir_mtimes(plugin_path),
+        _get_manifest_environment(),
+    )
+
+
+class LazyPlugin():
+    """
+    Stands in for a plugin without importing it, answering from the plugin
+    manifest. When anything else is needed (like export dialog, preview
+    functions or reading presets) the plugin module gets imported and
+    everything is passed to the plugin itself.
+
+    As the manifest is cached by the mtimes of the plugin and oomox files
+    (and of the directories and optional modules which plugin options are
+    built from), remove the cache to see the changes which can't be tracked
+    that way.
+    """
+
+    _plugin_name = None
+    _plugin_path = None
+    _attributes = None
+    _attribute_names = None
+    _plugin = None
+
+    def __init__(self, plugin_name, plugin_path, manifest):
+        self._plugin_name = plugin_name
+        self._plugin_path = plugin_path
+        self._attributes = {
+            attr_name: _from_manifest_value(value, self, attr_name)
+            for attr_name, value in manifest['attributes'].items()
+        }
+        self._attribute_names = frozenset(manifest['attribute_names'])
+
+    def get_plugin(self):
+        if self._plugin is None:
+            try:
+                plugin = load_plugin(self._plugin_name, self._plugin_path)
+                if not plugin:
+                    raise TypeError(self._plugin_name)
+            except Exception as exc:
+                report_plugin_error(self._plugin_name, self._plugin_path, exc)
+                raise
+            self._plugin = plugin
+        return self._plugin
+
+    def __getattr__(self, attr_name):
+        if attr_name.startswith('__'):
+            raise AttributeError(attr_name)
+        if self._plugin is None:
+            if attr_name in self._attributes:
+                return self._attributes[attr_name]
+            if attr_name not in self._attribute_names:
+                raise AttributeError(attr_name)
+        return getattr(self.get_plugin(), attr_name)
+
+    def __repr__(self):
+        return '<{} {}{}>'.format(
+            self.__class__.__name__, self._plugin_name,
+            ' (loaded)' if self._plugin else ''
+        )
+
+
+class LazyPluginFunction():
+
+    plugin = None
+    attr_name = None
+    path = None
+
+    def __init__(self, plugin, attr_name, path):
+        self.plugin = plugin
+        self.attr_name = attr_name
+        self.path = path
+
+    def __call__(self, *args, **kwargs):
+        function = getattr(self.plugin.get_plugin(), self.attr_name)
+        for key in self.path:
+            function = function[key]
+        return function(*args, **kwargs)
+
 
 def load_plugin(plugin_name, plugin_path):
+    try:
+        # GUI plugins import GTK, but the import ones could work without gi:
+        # pylint: disable=bad-option-value,import-outside-toplevel,unused-import
+        from . import gi_versions  # noqa
+    except ImportError:
+        pass
     plugin_module = get_plugin_module(
         plugin_name,
         os.path.join(plugin_path, "oomox_plugin.py")
     )
     plugin_class = plugin_module.Plugin
-    plugin = plugin_class()
     if not issubclass(plugin_class, OomoxPlugin):
-        return
+        return None
+    return plugin_class()
+
+
+def register_plugin(plugin_name, plugin, plugin_types):
     ALL_PLUGINS[plugin_name] = plugin
-    if issubclass(plugin_class, OomoxImportPlugin):
-        IMPORT_PLUGINS[plugin_name] = plugin
-    if issubclass(plugin_class, OomoxThemePlugin):
-        THEME_PLUGINS[plugin_name] = plugin
-    if issubclass(plugin_class, OomoxIconsPlugin):
-        ICONS_PLUGINS[plugin_name] = plugin
-    if issubclass(plugin_class, OomoxExportPlugin):
-        EXPORT_PLUGINS[plugin_name] = plugin
+    for plugin_type, _plugin_class, plugins in PLUGIN_TYPES:
+        if plugin_type in plugin_types:
+            plugins[plugin_name] = plugin
+
+
+def add_plugin_error_callback(callback):
+    """
+    `callback(plugin_name, error_text)` is called for each plugin loading
+    error, including the ones which happened before the callback was added.
+    Without callbacks the errors are printed to stderr.
+    """
+    for plugin_name, error_text in PLUGIN_ERRORS:
+        callback(plugin_name, error_text)
+    _PLUGIN_ERROR_CALLBACKS.append(callback)
+
+
+def report_plugin_error(plugin_name, plugin_path, exc):
+    error_text = (
+        plugin_path +
+        ":\n" + '\n'.join([str(arg) for arg in exc.args]) +
+        '\n' * 2 +
+        traceback.format_exc()
+    )
+    PLUGIN_ERRORS.append((plugin_name, error_text))
+    if not _PLUGIN_ERROR_CALLBACKS:
+        sys.stderr.write('Error loading plugin "{}": {}\n'.format(plugin_name, error_text))
+    for callback in _PLUGIN_ERROR_CALLBACKS:
+        callback(plugin_name, error_text)
 
 
 def init_plugins():
+    """
+    Plugins are imported only when their manifest is not cached yet,
+    otherwise they are represented by `LazyPlugin`s until used.
+    """
     all_plugin_paths = {}
     for _plugins_dir in (PLUGINS_DIR, USER_PLUGINS_DIR):
         if not os.path.exists(_plugins_dir):
@@ -48,22 +292,19 @@ def init_plugins():
             all_plugin_paths[plugin_name] = os.path.join(_plugins_dir, plugin_name)
     for plugin_name, plugin_path in all_plugin_paths.items():
         try:
-            load_plugin(plugin_name, plugin_path)
+            manifest_key = _get_manifest_key(plugin_name, plugin_path)
+            manifest = _PLUGIN_MANIFEST_CACHE.get(manifest_key)
+            if manifest:
+                plugin = LazyPlugin(plugin_name, plugin_path, manifest)
+            else:
+                plugin = load_plugin(plugin_name, plugin_path)
+                if not plugin:
+                    continue
+                manifest = get_plugin_manifest(plugin)
+                _PLUGIN_MANIFEST_CACHE.set(manifest_key, manifest)
+            register_plugin(plugin_name, plugin, manifest['types'])
         except Exception as exc:
-            error_dialog = Gtk.MessageDialog(
-                text=_('Error loading plugin "{plugin_name}"').format(
-                    plugin_name=plugin_name
-                ),
-                secondary_text=(
-                    plugin_path +
-                    ":\n" + '\n'.join([str(arg) for arg in exc.args]) +
-                    '\n' * 2 +
-                    traceback.format_exc()
-                ),
-                buttons=Gtk.ButtonsType.CLOSE
-            )
-            error_dialog.run()
-            error_dialog.destroy()
+            report_plugin_error(plugin_name, plugin_path, exc)
 
 
 init_plugins()
@@ -0,0 +1,98 @@
+import os
+
+from .disk_cache import DiskCache
+
+
+def list_dir(dir_path):
+    """
+    Returns sorted names of the files and of the subdirectories
+    (following symlinks) of `dir_path`.
+    """
+    file_names = []
+    dir_names = []
+    with os.scandir(dir_path) as dir_entries:
+        for dir_entry in dir_entries:
+            try:
+                if dir_entry.is_dir():
+                    dir_names.append(dir_entry.name)
+                else:
+                    file_names.append(dir_entry.name)
+            except OSError:
+                continue
+    return sorted(file_names), sorted(dir_names)
+
+
+class PresetIndex():
+    """
+    Lists files in the preset directories (recursively, following symlinks)
+    without walking through the whole trees each time.
+
+    For each directory its mtime and the names of its files and
+    subdirectories are remembered (in memory and on disk, so it survives
+    restarts). Only directories whose mtime changed are listed again, the
+    rest of the scan is a single stat() per directory.
+    """
+
+    _disk_cache = None
+    _trees = None
+
+    def __init__(self, disk_cache):
+        self._disk_cache = disk_cache
+        self._trees = {}
+
+    def _get_tree(self, colors_dir):
+        tree = self._trees.get(colors_dir)
+        if tree is None:
+            tree = self._disk_cache.get(self._disk_cache.get_key(colors_dir)) or {}
+        return tree
+
+    @staticmethod
+    def _list_dir(dir_path, mtime):
+        file_names, dir_names = list_dir(dir_path)
+        return {
+            'mtime': mtime,
+            'files': file_names,
+            'dirs': dir_names,
+        }
+
+    def scan(self, colors_dir):
+        """
+        Returns the list of file paths in `colors_dir` (files of each
+        directory go before its subdirectories) and a flag telling if
+        anything changed since the previous scan.
+        """
+        old_tree = self._get_tree(colors_dir)
+        new_tree = {}
+        file_paths = []
+        dirs_to_scan = [colors_dir]
+        while dirs_to_scan:
+            dir_path = dirs_to_scan.pop()
+            try:
+                mtime = os.stat(dir_path).st_mtime_ns
+                dir_index = old_tree.get(dir_path)
+                if not dir_index or dir_index['mtime'] != mtime:
+                    dir_index = self._list_dir(dir_path, mtime)
+            except OSError:
+                continue
+            new_tree[dir_path] = dir_index
+            file_paths += [
+                os.path.join(dir_path, file_name) for file_name in dir_index['files']
+            ]
+            dirs_to_scan += [
+                os.path.join(dir_path, dir_name) for dir_name in reversed(dir_index['dirs'])
+            ]
+        changed = new_tree != old_tree
+        if changed:
+            self._disk_cache.set(self._disk_cache.get_key(colors_dir), new_tree)
+        self._trees[colors_dir] = new_tree
+        return file_paths, changed
+
+    def get_dir_paths(self, colors_dir):
+        """
+        Returns the paths of all the directories found by the last scan of
+        `colors_dir` (including itself).
+        """
+        return list(self._trees.get(colors_dir, {}))
+
+
+PRESET_INDEX = PresetIndex(DiskCache(name='preset_index', version=1, max_entries=1000))
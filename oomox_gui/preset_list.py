@@ -1,14 +1,17 @@
 import os
 from collections import namedtuple
+from functools import partial
+from itertools import count
 
-from gi.repository import Gtk, Gdk, GLib
+from gi.repository import Gtk, Gdk, GLib, Gio
 
 from .i18n import _
 from .config import USER_COLORS_DIR, COLORS_DIR
 from .settings import UI_SETTINGS
 from .plugin_api import PLUGIN_PATH_PREFIX
 from .plugin_loader import IMPORT_PLUGINS
-from .theme_file import get_presets, group_presets_by_dir
+from .theme_file import get_preset_groups, get_group_first_presets, get_group_presets
+from .preset_index import PRESET_INDEX
 
 
 Section = namedtuple('Section', ['id', 'display_name'])
@@ -21,6 +24,24 @@ class Sections:
 
 
 _SECTION_RESERVED_NAME = '<section>'
+# child rows of a not yet expanded row:
+_PLACEHOLDER_RESERVED_NAME = '<placeholder>'
+
+LazyChildren = namedtuple('LazyChildren', ['add_children', 'dir_paths'])
+# group which presets were added to the row:
+PopulatedGroup = namedtuple('PopulatedGroup', ['group', 'row_reference'])
+
+
+# wait for the burst of file changes (like a sync or an unpacked archive) to end:
+PRESETS_CHANGED_DELAY = 300  # ms
+
+_PRESETS_CHANGED_EVENTS = (
+    Gio.FileMonitorEvent.CREATED,
+    Gio.FileMonitorEvent.DELETED,
+    Gio.FileMonitorEvent.MOVED_IN,
+    Gio.FileMonitorEvent.MOVED_OUT,
+    Gio.FileMonitorEvent.RENAMED,
+)
 
 
 class Keys:
@@ -35,17 +56,29 @@ class ThemePresetList(Gtk.ScrolledWindow):
     treestore = None
     treeview = None
     preset_select_callback = None
+    _file_monitors = None
+    _presets_changed_timeout_id = None
+    _changed_nodes = None
+    _lazy_children = None
+    _lazy_ids = None
+    _populated_groups = None
 
     DISPLAY_NAME = 0
     THEME_NAME = 1
     THEME_PATH = 2
     IS_SAVEABLE = 3
+    COLUMNS = (DISPLAY_NAME, THEME_NAME, THEME_PATH, IS_SAVEABLE)
 
     def __init__(self, preset_select_callback):
         super().__init__()
         self.set_size_request(width=UI_SETTINGS.preset_list_minimal_width, height=-1)
 
         self.preset_select_callback = preset_select_callback
+        self._file_monitors = {}
+        self._changed_nodes = set()
+        self._lazy_children = {}
+        self._lazy_ids = count()
+        self._populated_groups = {}
 
         self.treestore = Gtk.TreeStore(str, str, str, bool)
         self.treeview = Gtk.TreeView(
@@ -103,11 +136,16 @@ class ThemePresetList(Gtk.ScrolledWindow):
         if self._update_signal:
             self.treeview.disconnect(self._update_signal)
 
-        self.treestore.clear()
-        all_presets = get_presets()
-        self._load_system_presets(all_presets)
-        self._load_plugin_presets(all_presets)
-        self._load_user_presets(all_presets)
+        new_treestore = self._build_treestore()
+        if self.treestore.get_iter_first():
+            # update the rows in place to keep the expanded rows and the cursor:
+            self._sync_rows(new_treestore)
+        else:
+            self.treestore = new_treestore
+            self.treeview.set_model(self.treestore)
+            self._expand_sections()
+        self._forget_removed_groups()
+        self._watch_sections()
 
         self._update_signal = self.treeview.connect(
             "cursor_changed", self._on_preset_select
@@ -151,6 +189,16 @@ class ThemePresetList(Gtk.ScrolledWindow):
         if not treeiter:
             treeiter = self.treestore.get_iter_first()
         while treeiter:
+            if store[treeiter][self.THEME_NAME] == _PLACEHOLDER_RESERVED_NAME:
+                lazy_children = self._lazy_children.get(store[treeiter][self.THEME_PATH])
+                if lazy_children and any(
+                        target_filepath.startswith(os.path.join(dir_path, ''))
+                        for dir_path in lazy_children.dir_paths
+                ):
+                    parent = store.iter_parent(treeiter)
+                    self._populate_lazy_children(store, parent)
+                    treeiter = store.iter_children(parent)
+                    continue
             current_filepath = store[treeiter][self.THEME_PATH]
             if current_filepath == target_filepath:
                 return store[treeiter].path
@@ -164,19 +212,26 @@ class ThemePresetList(Gtk.ScrolledWindow):
             treeiter = store.iter_next(treeiter)
         return None
 
-    def _add_preset(self, display_name, name, path, saveable, parent=None):  # pylint: disable=too-many-arguments
-        return self.treestore.append(
+    @staticmethod
+    def _add_preset(  # pylint: disable=too-many-arguments
+            treestore, display_name, name, path, saveable, parent=None
+    ):
+        return treestore.append(
             parent, (display_name, name, path, saveable)
         )
 
-    def _add_directory(self, name, tree_id=None, parent=None, template='{}'):
+    @staticmethod
+    def _add_directory(  # pylint: disable=too-many-arguments
+            treestore, name, tree_id=None, parent=None, template='{}'
+    ):
         tree_id = tree_id or name
-        return self.treestore.append(parent, (
+        return treestore.append(parent, (
             template.format(name), _SECTION_RESERVED_NAME, tree_id, False
         ))
 
-    def _add_section(self, section, parent=None):
+    def _add_section(self, treestore, section, parent=None):
         return self._add_directory(
+            treestore,
             template='<b>{}</b>', name=section.display_name,
             parent=parent, tree_id=section.id,
         )
@@ -210,136 +265,393 @@ class ThemePresetList(Gtk.ScrolledWindow):
             )
         return dir_display_name
 
-    def _add_presets(  # pylint: disable=too-many-arguments
-            self, dirname, preset_list,
-            plugin_name=None, parent=None, subdir_path=None
-    ):
-        sorted_preset_list = sorted(preset_list, key=lambda x: x.name.lower())
+    def _add_lazy_children(self, treestore, parent, add_children, dir_paths):
+        """
+        Add a placeholder child to `parent` row, to be replaced by the rows
+        added by `add_children(treestore, parent)` when `parent` is expanded.
+        `dir_paths` are the directories in which the presets to be added are.
+        """
+        lazy_id = str(next(self._lazy_ids))
+        self._lazy_children[lazy_id] = LazyChildren(add_children, dir_paths)
+        treestore.append(parent, ('', _PLACEHOLDER_RESERVED_NAME, lazy_id, False))
+
+    def _get_lazy_id(self, treestore, parent):
+        treeiter = treestore.iter_children(parent)
+        if treeiter and (
+                treestore.get_value(treeiter, self.THEME_NAME) == _PLACEHOLDER_RESERVED_NAME
+        ):
+            return treestore.get_value(treeiter, self.THEME_PATH)
+        return None
 
-        first_preset = sorted_preset_list[0]
+    def _populate_lazy_children(self, treestore, parent):
+        lazy_id = self._get_lazy_id(treestore, parent)
+        if lazy_id is None:
+            return
+        placeholder_iter = treestore.iter_children(parent)
+        lazy_children = self._lazy_children.pop(lazy_id, None)
+        if lazy_children:
+            lazy_children.add_children(treestore, parent)
+        # remove it only after adding the children, otherwise the row gets collapsed:
+        treestore.remove(placeholder_iter)
+
+    def _forget_lazy_children(self, treestore, treeiter):
+        if treestore.get_value(treeiter, self.THEME_NAME) == _PLACEHOLDER_RESERVED_NAME:
+            self._lazy_children.pop(treestore.get_value(treeiter, self.THEME_PATH), None)
+        childiter = treestore.iter_children(treeiter)
+        while childiter:
+            self._forget_lazy_children(treestore, childiter)
+            childiter = treestore.iter_next(childiter)
+
+    def _add_group(self, treestore, parent, group):
+        first_presets = get_group_first_presets(group, 2)
+        if not first_presets:
+            return
+        first_preset = first_presets[0]
+        dirname = first_preset.name.split('/')[0]
         piter = self._add_preset(
-            display_name=self._format_dirname(
-                first_preset, dirname,
-                plugin_name=plugin_name,
-                parent_dir=subdir_path,
-            ),
+            treestore,
+            display_name=self._format_dirname(first_preset, dirname),
             name=first_preset.name,
             path=first_preset.path,
             saveable=first_preset.is_saveable,
             parent=parent
         )
+        if len(first_presets) > 1:
+            self._add_lazy_children(
+                treestore, piter,
+                add_children=partial(self._add_group_children, group=group, dirname=dirname),
+                dir_paths=[group.path],
+            )
+
+    def _add_group_children(self, treestore, parent, group, dirname):
+        self._add_preset_children(
+            treestore, parent, dirname=dirname, preset_list=get_group_presets(group)[1:]
+        )
+        if treestore is self.treestore:
+            self._populated_groups[group.path] = PopulatedGroup(
+                group, Gtk.TreeRowReference.new(treestore, treestore.get_path(parent))
+            )
+            self._watch_group(group)
 
+    def _add_preset_children(self, treestore, parent, dirname, preset_list):
         last_subdir = None
         last_subdir_iter = None
-        for preset in sorted_preset_list[1:]:
+        for preset in preset_list:
             if len(preset.name.split('/')) > 2:
                 preset_subdir = os.path.dirname(preset.path)
-                if preset_subdir != last_subdir:
-                    last_subdir = preset_subdir
-                    last_subdir_iter = self._add_preset(
-                        display_name=self._format_dirname(
-                            preset, dirname,
-                            plugin_name=plugin_name,
-                            parent_dir=last_subdir,
-                        ),
-                        name=preset.name,
-                        path=preset.path,
-                        saveable=preset.is_saveable,
-                        parent=piter
-                    )
-                else:
-                    self._add_presets(
-                        dirname=dirname, preset_list=[preset],
-                        parent=last_subdir_iter,
-                        subdir_path=last_subdir
-                    )
+                is_new_subdir = preset_subdir != last_subdir
+                last_subdir = preset_subdir
+                preset_iter = self._add_preset(
+                    treestore,
+                    display_name=self._format_dirname(
+                        preset, dirname,
+                        parent_dir=last_subdir,
+                    ),
+                    name=preset.name,
+                    path=preset.path,
+                    saveable=preset.is_saveable,
+                    parent=parent if is_new_subdir else last_subdir_iter
+                )
+                if is_new_subdir:
+                    last_subdir_iter = preset_iter
             else:
                 display_name = self._format_childname((
                     preset.name[len(dirname):]
                     if dirname else preset.name
                 ))
                 self._add_preset(
+                    treestore,
                     display_name=display_name,
                     name=preset.name,
                     path=preset.path,
                     saveable=preset.is_saveable,
-                    parent=piter
+                    parent=parent
                 )
 
-    def _load_system_presets(self, all_presets):
+    def _add_groups(self, treestore, parent, groups):
+        for group in groups:
+            self._add_group(treestore, parent, group)
+
+    def _load_system_presets(self, treestore):
         featured_dirs = ('Featured', )
-        presets_iter = self._add_section(Sections.PRESETS)
-        sorted_system_presets = sorted(
-            all_presets.get(COLORS_DIR, {}).items(),
-            key=lambda x: (x[0] not in featured_dirs, x[0].lower())
+        presets_iter = self._add_section(treestore, Sections.PRESETS)
+        system_groups = sorted(
+            [
+                group for group in get_preset_groups(COLORS_DIR, is_default=True)
+                if not group.name.startswith(PLUGIN_PATH_PREFIX)
+            ],
+            key=lambda x: (x.name not in featured_dirs, x.name.lower())
         )
-        for preset_dir, preset_list in sorted_system_presets:
-            if preset_dir.startswith(PLUGIN_PATH_PREFIX):
+        if system_groups:
+            self._add_lazy_children(
+                treestore, presets_iter,
+                add_children=partial(self._add_groups, groups=system_groups),
+                dir_paths=[COLORS_DIR],
+            )
+
+    @staticmethod
+    def _get_plugin_preset_dirs():
+        plugin_preset_dirs = []
+        for plugin in sorted(IMPORT_PLUGINS.values(), key=lambda x: x.user_theme_dir):
+            groups = get_preset_groups(
+                USER_COLORS_DIR, is_default=False,
+                subdir=os.path.relpath(plugin.user_theme_dir, USER_COLORS_DIR)
+            )
+            if groups:
+                plugin_preset_dirs.append((
+                    plugin.user_presets_display_name or plugin.display_name or plugin.name,
+                    plugin.user_theme_dir, groups
+                ))
+        for plugin in IMPORT_PLUGINS.values():
+            if not plugin.plugin_theme_dir:
                 continue
-            self._add_presets(
-                dirname=preset_dir, preset_list=preset_list,
-                parent=presets_iter
+            groups = get_preset_groups(plugin.plugin_theme_dir, is_default=True, plugin=plugin)
+            if groups:
+                plugin_preset_dirs.append((
+                    plugin.display_name or plugin.name, plugin.plugin_theme_dir, groups
+                ))
+        return plugin_preset_dirs
+
+    def _load_plugin_presets(self, treestore):
+        plugins_iter = self._add_section(treestore, Sections.PLUGINS)
+        plugin_preset_dirs = self._get_plugin_preset_dirs()
+        if plugin_preset_dirs:
+            self._add_lazy_children(
+                treestore, plugins_iter,
+                add_children=partial(
+                    self._add_plugin_preset_dirs, plugin_preset_dirs=plugin_preset_dirs
+                ),
+                dir_paths=[dir_path for _name, dir_path, _groups in plugin_preset_dirs],
             )
-        if UI_SETTINGS.preset_list_sections_expanded.get(Sections.PRESETS.id, True):
-            self.treeview.expand_row(self.treestore.get_path(presets_iter), False)
-
-    def _load_plugin_presets(self, all_presets):  # pylint: disable=too-many-locals
-        plugins_iter = self._add_section(Sections.PLUGINS)
-        for colors_dir, presets in all_presets.items():
-            for preset_dir, preset_list in sorted(presets.items()):
-
-                preset_plugin = None
-                plugin_theme_dir = None
-                for plugin in IMPORT_PLUGINS.values():
-                    if plugin.plugin_theme_dir == colors_dir:
-                        plugin_theme_dir = plugin.plugin_theme_dir
-                    elif plugin.user_theme_dir and (
-                            os.path.join(colors_dir, preset_dir).startswith(plugin.user_theme_dir)
-                    ):
-                        plugin_theme_dir = plugin.user_theme_dir
-                    else:
-                        continue
-                    preset_plugin = plugin
-                if not plugin_theme_dir:
-                    continue
-                plugin_name = preset_plugin.display_name or preset_plugin.name
-                if plugin_theme_dir == preset_plugin.user_theme_dir:
-                    plugin_name = preset_plugin.user_presets_display_name or plugin_name
 
-                grouped_presets = group_presets_by_dir(
-                    preset_list, os.path.join(colors_dir, preset_dir)
-                )
-                if len(grouped_presets) == 1 and grouped_presets[0][0] == '':
-                    grouped_presets = [
-                        (preset.name, [preset, ])
-                        for preset in grouped_presets[0][1]
-                    ]
-
-                plugin_presets_iter = self._add_directory(
-                    name=plugin_name,
-                    parent=plugins_iter
+    def _add_plugin_preset_dirs(self, treestore, parent, plugin_preset_dirs):
+        for plugin_name, _dir_path, groups in plugin_preset_dirs:
+            plugin_presets_iter = self._add_directory(
+                treestore,
+                name=plugin_name,
+                parent=parent
+            )
+            self._add_groups(treestore, plugin_presets_iter, groups)
+            if not treestore.iter_has_child(plugin_presets_iter):
+                treestore.remove(plugin_presets_iter)
+
+    def _load_user_presets(self, treestore):
+        user_presets_iter = self._add_section(treestore, Sections.USER)
+        user_groups = [
+            group for group in get_preset_groups(USER_COLORS_DIR, is_default=False)
+            if not group.name.startswith(PLUGIN_PATH_PREFIX)
+        ]
+        if user_groups:
+            self._add_lazy_children(
+                treestore, user_presets_iter,
+                add_children=partial(self._add_groups, groups=user_groups),
+                dir_paths=[USER_COLORS_DIR],
+            )
+
+    def _build_treestore(self):
+        treestore = Gtk.TreeStore(str, str, str, bool)
+        self._load_system_presets(treestore)
+        self._load_plugin_presets(treestore)
+        self._load_user_presets(treestore)
+        return treestore
+
+    def _expand_sections(self):
+        treeiter = self.treestore.get_iter_first()
+        while treeiter:
+            section_id = self.treestore.get_value(treeiter, self.THEME_PATH)
+            if UI_SETTINGS.preset_list_sections_expanded.get(section_id, True):
+                self.treeview.expand_row(self.treestore.get_path(treeiter), False)
+            treeiter = self.treestore.iter_next(treeiter)
+
+    def _get_children_ids(self, treestore, parent):
+        # presets are identified by their paths and directories - by their tree IDs
+        # (which could repeat, so the number of the same ID before is added):
+        children_ids = []
+        id_counts = {}
+        treeiter = treestore.iter_children(parent)
+        while treeiter:
+            theme_name = treestore.get_value(treeiter, self.THEME_NAME)
+            if theme_name == _PLACEHOLDER_RESERVED_NAME:
+                row_id = (False, theme_name)
+            else:
+                row_id = (
+                    theme_name == _SECTION_RESERVED_NAME,
+                    treestore.get_value(treeiter, self.THEME_PATH),
                 )
-                for dir_name, group in grouped_presets:
-                    self._add_presets(
-                        dirname=dir_name,
-                        preset_list=group,
-                        parent=plugin_presets_iter
+            id_counts[row_id] = id_counts.get(row_id, -1) + 1
+            children_ids.append((row_id + (id_counts[row_id], ), treeiter))
+            treeiter = treestore.iter_next(treeiter)
+        return children_ids
+
+    def _sync_rows(  # pylint: disable=too-many-locals
+            self, new_treestore, parent=None, new_parent=None
+    ):
+        """
+        Make children of `parent` row the same as in `new_treestore`,
+        inserting, removing, moving and updating only the rows which differ.
+        """
+        treestore = self.treestore
+        columns = self.COLUMNS
+
+        if (
+                self._get_lazy_id(new_treestore, new_parent) is not None
+        ) and (
+            treestore.iter_n_children(parent) and self._get_lazy_id(treestore, parent) is None
+        ):
+            # the row was already expanded, so its new children are needed to compare:
+            self._populate_lazy_children(new_treestore, new_parent)
+
+        old_iters = dict(self._get_children_ids(treestore, parent))
+        new_rows = self._get_children_ids(new_treestore, new_parent)
+        new_row_ids = set(row_id for row_id, _new_iter in new_rows)
+
+        for row_id, treeiter in old_iters.items():
+            if row_id not in new_row_ids:
+                self._forget_lazy_children(treestore, treeiter)
+                treestore.remove(treeiter)
+
+        previous_iter = None
+        for row_id, new_iter in new_rows:
+            values = new_treestore.get(new_iter, *columns)
+            treeiter = old_iters.get(row_id)
+            if not treeiter:
+                treeiter = treestore.insert_after(parent, previous_iter, values)
+            else:
+                old_values = treestore.get(treeiter, *columns)
+                if old_values[self.THEME_NAME] == _PLACEHOLDER_RESERVED_NAME:
+                    # the new placeholder replaces the old one, keeping its ID:
+                    self._lazy_children[old_values[self.THEME_PATH]] = self._lazy_children.pop(
+                        values[self.THEME_PATH]
                     )
+                elif old_values != values:
+                    treestore.set(treeiter, columns, values)
+                expected_iter = (
+                    treestore.iter_next(previous_iter) if previous_iter
+                    else treestore.iter_children(parent)
+                )
+                if treestore.get_path(expected_iter) != treestore.get_path(treeiter):
+                    treestore.move_after(treeiter, previous_iter)
+            self._sync_rows(new_treestore, treeiter, new_iter)
+            previous_iter = treeiter
+
+    def _get_section_loaders(self):
+        return {
+            Sections.PRESETS.id: self._load_system_presets,
+            Sections.PLUGINS.id: self._load_plugin_presets,
+            Sections.USER.id: self._load_user_presets,
+        }
+
+    @staticmethod
+    def _get_section_dirs():
+        plugin_dirs = []
+        for plugin in IMPORT_PLUGINS.values():
+            plugin_dirs.append(plugin.user_theme_dir)
+            if plugin.plugin_theme_dir:
+                plugin_dirs.append(plugin.plugin_theme_dir)
+        return {
+            Sections.PRESETS.id: [COLORS_DIR],
+            Sections.PLUGINS.id: plugin_dirs,
+            Sections.USER.id: [USER_COLORS_DIR],
+        }
+
+    def _refresh_row(self, treeiter, add_row):
+        """
+        Make the row and its children the same as the one added by
+        `add_row(treestore)` to the new treestore.
+        """
+        new_treestore = Gtk.TreeStore(str, str, str, bool)
+        add_row(new_treestore)
+        new_iter = new_treestore.get_iter_first()
+        if not new_iter:
+            self._forget_lazy_children(self.treestore, treeiter)
+            self.treestore.remove(treeiter)
+            return
+        values = new_treestore.get(new_iter, *self.COLUMNS)
+        if self.treestore.get(treeiter, *self.COLUMNS) != values:
+            self.treestore.set(treeiter, self.COLUMNS, values)
+        self._sync_rows(new_treestore, treeiter, new_iter)
+
+    def _refresh_node(self, node_id):
+        """
+        Update only the rows of the section or of the populated group
+        (identified by its path) to which the changed directory belongs.
+        """
+        populated_group = self._populated_groups.get(node_id)
+        if populated_group:
+            if not populated_group.row_reference.valid():
+                return
+            self._refresh_row(
+                self.treestore.get_iter(populated_group.row_reference.get_path()),
+                partial(self._add_group, parent=None, group=populated_group.group)
+            )
+            if populated_group.row_reference.valid():
+                self._watch_group(populated_group.group)
+            return
+        treeiter = self.treestore.get_iter_first()
+        while treeiter and self.treestore.get_value(treeiter, self.THEME_PATH) != node_id:
+            treeiter = self.treestore.iter_next(treeiter)
+        if treeiter:
+            self._refresh_row(treeiter, self._get_section_loaders()[node_id])
+
+    def _refresh_nodes(self, node_ids):
+        if not node_ids:
+            return
+        self.treeview.disconnect(self._update_signal)
+        # sections first, their refresh could remove the rows of the groups:
+        for node_id in sorted(node_ids, key=lambda x: x in self._populated_groups):
+            self._refresh_node(node_id)
+        self._forget_removed_groups()
+        self._watch_sections()
+        self._update_signal = self.treeview.connect(
+            "cursor_changed", self._on_preset_select
+        )
 
-        if UI_SETTINGS.preset_list_sections_expanded.get(Sections.PLUGINS.id, True):
-            self.treeview.expand_row(self.treestore.get_path(plugins_iter), False)
+    def _forget_removed_groups(self):
+        for group_path, populated_group in list(self._populated_groups.items()):
+            if not populated_group.row_reference.valid():
+                self._populated_groups.pop(group_path)
+                self._update_file_monitors(group_path, [])
 
-    def _load_user_presets(self, all_presets):
-        user_presets_iter = self._add_section(Sections.USER)
-        for preset_dir, preset_list in sorted(all_presets.get(USER_COLORS_DIR, {}).items()):
-            if preset_dir.startswith(PLUGIN_PATH_PREFIX):
+    def _find_populated_groups(self, treepath, with_descendants=False):
+        group_paths = []
+        for group_path, populated_group in self._populated_groups.items():
+            if not populated_group.row_reference.valid():
                 continue
-            self._add_presets(
-                dirname=preset_dir, preset_list=preset_list,
-                parent=user_presets_iter
+            row_treepath = populated_group.row_reference.get_path()
+            if row_treepath == treepath or (
+                    with_descendants and treepath.is_ancestor(row_treepath)
+            ):
+                group_paths.append(group_path)
+        return group_paths
+
+    def _watch_sections(self):
+        # only the top levels of the preset directories are watched:
+        for section_id, dir_paths in self._get_section_dirs().items():
+            self._update_file_monitors(
+                section_id, [dir_path for dir_path in dir_paths if os.path.isdir(dir_path)]
             )
-        if UI_SETTINGS.preset_list_sections_expanded.get(Sections.USER.id, True):
-            self.treeview.expand_row(self.treestore.get_path(user_presets_iter), False)
+
+    def _watch_group(self, group):
+        # directories of the group are watched only while its row is expanded:
+        self._update_file_monitors(group.path, PRESET_INDEX.get_dir_paths(group.path))
+
+    def _update_file_monitors(self, node_id, dir_paths):
+        for monitor_key in list(self._file_monitors):
+            if monitor_key[0] == node_id and monitor_key[1] not in dir_paths:
+                self._file_monitors.pop(monitor_key).cancel()
+        for dir_path in dir_paths:
+            if (node_id, dir_path) in self._file_monitors:
+                continue
+            try:
+                file_monitor = Gio.File.new_for_path(dir_path).monitor_directory(
+                    Gio.FileMonitorFlags.WATCH_MOVES, None
+                )
+            except GLib.Error as exc:
+                print("Can't watch presets directory {}:".format(dir_path))
+                print(exc)
+                continue
+            file_monitor.connect("changed", self._on_presets_dir_changed, node_id)
+            self._file_monitors[(node_id, dir_path)] = file_monitor
 
     ###########################################################################
     # Signal handlers:
@@ -351,7 +663,7 @@ class ThemePresetList(Gtk.ScrolledWindow):
             return
         treeiter = self.treestore.get_iter(treepath)
         current_theme = self.treestore.get_value(treeiter, self.THEME_NAME)
-        if current_theme == _SECTION_RESERVED_NAME:
+        if current_theme in (_SECTION_RESERVED_NAME, _PLACEHOLDER_RESERVED_NAME):
             return
         current_preset_path = self.treestore.get_value(treeiter, self.THEME_PATH)
         self.preset_select_callback(
@@ -373,12 +685,42 @@ class ThemePresetList(Gtk.ScrolledWindow):
             elif key == Keys.LEFT_ARROW:
                 self.treeview.collapse_row(treepath)
 
-    def _on_row_expanded(self, _treeview, treeiter, _treepath):
+    def _on_row_expanded(self, _treeview, treeiter, treepath):
+        if self._get_lazy_id(self.treestore, treeiter) is not None:
+            self._populate_lazy_children(self.treestore, treeiter)
+        else:
+            # the group wasn't watched while collapsed:
+            self._refresh_nodes(self._find_populated_groups(treepath))
         if self.treestore.get_value(treeiter, self.THEME_NAME) == _SECTION_RESERVED_NAME:
             section_id = self.treestore.get_value(treeiter, self.THEME_PATH)
             UI_SETTINGS.preset_list_sections_expanded[section_id] = True
 
-    def _on_row_collapsed(self, _treeview, treeiter, _treepath):
+    def _on_presets_dir_changed(  # pylint: disable=too-many-arguments
+            self, _monitor, changed_file, _other_file, event_type, node_id
+    ):
+        if event_type not in _PRESETS_CHANGED_EVENTS:
+            return
+        if node_id == Sections.USER.id and (
+                changed_file.get_basename().startswith(PLUGIN_PATH_PREFIX)
+        ):
+            node_id = Sections.PLUGINS.id
+        self._changed_nodes.add(node_id)
+        if self._presets_changed_timeout_id:
+            GLib.source_remove(self._presets_changed_timeout_id)
+        self._presets_changed_timeout_id = GLib.timeout_add(
+            PRESETS_CHANGED_DELAY, self._on_presets_changed_timeout
+        )
+
+    def _on_presets_changed_timeout(self):
+        self._presets_changed_timeout_id = None
+        changed_nodes = self._changed_nodes
+        self._changed_nodes = set()
+        self._refresh_nodes(changed_nodes)
+        return False
+
+    def _on_row_collapsed(self, _treeview, treeiter, treepath):
+        for group_path in self._find_populated_groups(treepath, with_descendants=True):
+            self._update_file_monitors(group_path, [])
         if self.treestore.get_value(treeiter, self.THEME_NAME) == _SECTION_RESERVED_NAME:
             section_id = self.treestore.get_value(treeiter, self.THEME_PATH)
             UI_SETTINGS.preset_list_sections_expanded[section_id] = False
@@ -2,7 +2,7 @@ import os
 
 from gi.repository import Gtk, GLib
 
-from .theme_model import THEME_MODEL
+from .theme_model import THEME_MODEL, THEME_MODEL_INDEX
 from .color import (
     convert_theme_color_to_gdk, mix_theme_colors, mix_gdk_colors, hex_lightness,
 )
@@ -379,14 +379,9 @@ class ThemePreview(Gtk.Grid):
     def update_preview_colors(self, colorscheme):
 
         converted = {
-            theme_value['key']: convert_theme_color_to_gdk(
-                colorscheme[theme_value['key']]
-            )
-            for section in THEME_MODEL.values()
-            for theme_value in section if (
-                theme_value['type'] == 'color' and
-                not theme_value['key'].startswith('TERMINAL_')
-            )
+            key: convert_theme_color_to_gdk(colorscheme[key])
+            for key in THEME_MODEL_INDEX.color_keys
+            if not key.startswith('TERMINAL_')
         }
 
         def mix(color1, color2, amount):
@@ -0,0 +1,129 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from itertools import count
+from threading import Lock
+
+
+TASK_BACKEND_THREAD = 'thread'
+TASK_BACKEND_PROCESS = 'process'
+
+
+class TaskExecutor():
+    """
+    Runs tasks in the background worker threads or processes and passes
+    their results to the callbacks in the main thread. Exceptions raised by
+    the tasks are printed and passed to the error callbacks.
+
+    Tasks with the process backend (and their arguments and results) should
+    be picklable. Each task gets an integer ID which could be used to cancel
+    it: not yet started tasks won't be started at all, and results of the
+    already running ones are discarded. Long running thread tasks could also
+    poll `is_cancelled()` to stop earlier.
+
+    Submitting a task with a `group` cancels the previous task of the same
+    group, if it's not done yet, so only the latest result gets delivered.
+    """
+
+    max_workers = None
+    _idle_add = None
+    _executors = None
+    _tasks = None
+    _cancelled = None
+    _groups = None
+    _lock = None
+    _task_ids = None
+
+    def __init__(self, max_workers=None, idle_add=None):
+        """
+        `idle_add(function, *args)` is used to run the callbacks
+        in the main thread, `GLib.idle_add` by default.
+        """
+        if not idle_add:
+            # pylint:disable=bad-option-value,import-outside-toplevel
+            from gi.repository import GLib
+            idle_add = GLib.idle_add
+        self.max_workers = max_workers
+        self._idle_add = idle_add
+        self._executors = {}
+        self._tasks = {}
+        self._cancelled = set()
+        self._groups = {}
+        self._lock = Lock()
+        self._task_ids = count(1)
+
+    def _get_executor(self, backend):
+        executor = self._executors.get(backend)
+        if not executor:
+            if backend == TASK_BACKEND_THREAD:
+                executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            elif backend == TASK_BACKEND_PROCESS:
+                executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                raise ValueError("Unknown task backend: {}".format(backend))
+            self._executors[backend] = executor
+        return executor
+
+    def submit(
+            self, task, *args,
+            callback=None, error_callback=None, backend=TASK_BACKEND_THREAD, group=None
+    ):  # pylint: disable=too-many-arguments
+        with self._lock:
+            if group is not None and group in self._groups:
+                self._cancel(self._groups[group])
+            task_id = next(self._task_ids)
+            future = self._get_executor(backend).submit(task, *args)
+            self._tasks[task_id] = future
+            if group is not None:
+                self._groups[group] = task_id
+        future.add_done_callback(
+            partial(self._on_task_done, task_id, callback, error_callback)
+        )
+        return task_id
+
+    def _cancel(self, task_id):
+        future = self._tasks.get(task_id)
+        if not future:
+            return False
+        self._cancelled.add(task_id)
+        future.cancel()
+        return True
+
+    def cancel(self, task_id):
+        with self._lock:
+            return self._cancel(task_id)
+
+    def is_cancelled(self, task_id):
+        return task_id in self._cancelled
+
+    def shutdown(self):
+        with self._lock:
+            for task_id in list(self._tasks):
+                self._cancel(task_id)
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+        self._executors = {}
+
+    def _on_task_done(self, task_id, callback, error_callback, future):
+        # called in the worker thread (or right away if the task is already done)
+        self._idle_add(self._deliver_result, task_id, callback, error_callback, future)
+
+    def _deliver_result(self, task_id, callback, error_callback, future):
+        with self._lock:
+            self._tasks.pop(task_id, None)
+            for group, group_task_id in list(self._groups.items()):
+                if group_task_id == task_id:
+                    del self._groups[group]
+            if task_id in self._cancelled:
+                self._cancelled.discard(task_id)
+                return False
+        if future.cancelled():
+            return False
+        exception = future.exception()
+        if exception:
+            traceback.print_exception(type(exception), exception, exception.__traceback__)
+            if error_callback:
+                error_callback(exception)
+        elif callback:
+            callback(future.result())
+        return False
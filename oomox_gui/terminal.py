@@ -2,14 +2,16 @@
 import os
 import sys
 import re
-import shutil
+from time import time
 
 from .i18n import _
 from .config import TERMINAL_TEMPLATE_DIR
-from .color import (
-    SMALLEST_DIFF, ColorDiff, is_dark,
-    hex_to_int, color_list_from_hex, color_hex_from_list, hex_darker,
-    int_list_from_hex,
+from .disk_cache import DiskCache
+from .terminal_templates import TERMINAL_TEMPLATES
+from .color import SMALLEST_DIFF, ColorDiff, is_dark
+from .terminal_smarty import (
+    get_lightness, prepare_smarty_search, apply_smarty_offset, smarty_search,
+    smarty_scan_templates,
 )
 
 
@@ -17,12 +19,7 @@ if sys.version_info.minor >= 5:
     from typing import TYPE_CHECKING  # pylint: disable=wrong-import-order
     if TYPE_CHECKING:
         # pylint: disable=ungrouped-imports
-        from typing import Dict  # noqa
-
-
-RED = 0
-GREEN = 1
-BLUE = 2
+        from typing import Dict, List, Tuple, Optional  # noqa
 
 
 def find_closest_color_key(color_hex, colors_hex, highlight=True):
@@ -46,38 +43,15 @@ def find_closest_color_key(color_hex, colors_hex, highlight=True):
     return smallest_key, smallest_diff
 
 
-VALID_COLOR_CHARS = [
-    chr(i) for i in range(ord('a'), ord('f') + 1)
-] + [
-    str(i) for i in range(10)
-]
-
-
 def import_xcolors(path):
-    hex_colors = {}
-    with open(os.path.expanduser(path)) as file_object:
-        for line in file_object.read().split('\n'):
-            if line.strip().startswith('!'):
-                continue
-            pair = list(s.strip() for s in line.split(':'))
-            if len(pair) < 2:
-                continue
-            key, value = pair
-            key = key.replace('*', '')
-            value = value.replace('#', '').lower()
-            for char in value:
-                if char not in VALID_COLOR_CHARS:
-                    break
-            else:
-                hex_colors[key] = value
-    return hex_colors
+    return dict(TERMINAL_TEMPLATES.get_by_path(path).colors)
 
 
 def generate_theme_from_hint(  # pylint: disable=too-many-arguments
         template_path, theme_color, theme_bg, theme_fg,
         theme_hint=None, auto_swap_colors=True
 ):
-    hex_colors = import_xcolors(template_path)
+    hex_colors = TERMINAL_TEMPLATES.get_by_path(template_path).colors
     if auto_swap_colors and (
             is_dark(theme_bg) != is_dark(hex_colors['background'])
     ):
@@ -111,276 +85,108 @@ def generate_theme_from_hint(  # pylint: disable=too-many-arguments
 
 def get_all_colors_from_oomox_colorscheme(palette):
     # pylint:disable=bad-option-value,import-outside-toplevel
-    from .theme_model import THEME_MODEL
+    from .theme_model import THEME_MODEL_INDEX
 
     all_colors = []
-    for section_name, section in THEME_MODEL.items():
+    for section_name, color_keys in THEME_MODEL_INDEX.color_keys_by_section.items():
         if section_name == 'terminal':
             continue
-        for theme_model_item in section:
-            if theme_model_item.get('type') != 'color':
-                continue
-            color_name = theme_model_item.get('key')
-            if not color_name:
-                continue
-            color_value = palette.get(theme_model_item['key'])
+        for color_name in color_keys:
+            color_value = palette.get(color_name)
             if not color_value or color_value in all_colors:
                 continue
             all_colors.append(color_value)
     return all_colors
 
 
-class ContinueNext(Exception):
-    pass
-
-
-# @TODO:
-# These two functions are temporary until progressbar API won't be implemented in UI
-def get_term_width():
-    return shutil.get_terminal_size((80, 80)).columns
-
-
-class ProgressBar():
-
-    message = None
-    print_ratio = None
-    index = 0
-    progress = 0
-
-    LEFT_DECORATION = '['
-    RIGHT_DECORATION = ']'
-    # EMPTY = '-'
-    # FULL = '#'
-
-    def __init__(self, length, message=None):
-        message = message or str(length)
-        self.message = message
-        width = (
-            get_term_width() - len(message) -
-            len(self.LEFT_DECORATION) - len(self.RIGHT_DECORATION)
-        )
-        self.print_ratio = length / width
-        # sys.stderr.write(message)
-        # sys.stderr.write(self.LEFT_DECORATION + self.EMPTY * width + self.RIGHT_DECORATION)
-        # sys.stderr.write('{}[\bb'.format(chr(27)) * (width + len(self.RIGHT_DECORATION)))
-        # sys.stderr.flush()
-
-    def update(self):
-        self.index += 1
-        if self.index / self.print_ratio > self.progress:
-            self.progress += 1
-            # sys.stderr.write(self.FULL)
-            # sys.stderr.flush()
-
-    def __enter__(self):
-        return self.update
-
-    # def __exit__(self, *exc_details):
-        # sys.stderr.write('\n')
-# ######## END
-
-
-def sort_by_saturation(c):
-    # pylint: disable=invalid-name
-    return abs(c[0]-c[1])+abs(c[0]-c[2]) + \
-        abs(c[1]-c[0])+abs(c[1]-c[2]) + \
-        abs(c[2]-c[1])+abs(c[2]-c[0])
-
-
-def get_grayest_colors(palette):
-    list_of_colors = [[hex_to_int(s) for s in color_list_from_hex(c)] for c in palette]
-    saturation_list = sorted(
-        list_of_colors,
-        key=sort_by_saturation
-    )
-    gray_colors = saturation_list[:(len(saturation_list)//3)]
-    gray_colors.sort(key=sum)
-    gray_colors = [color_hex_from_list(c) for c in gray_colors]
-    return gray_colors
-
-
-def get_lightness(theme_color):
-    return sum(int_list_from_hex(theme_color))
-
-
 def _generate_theme_from_full_palette(
-        result_callback,
         reference_colors, all_colors, theme_bg,
-        accuracy=None, extend_palette=False,
-):  # noqa  pylint: disable=invalid-name,too-many-nested-blocks,too-many-locals,too-many-statements,too-many-branches,too-many-arguments
-    hex_colors = reference_colors
-    # @TODO: refactor it some day :3
-
-    # how far should be the colors to be counted as similar (0 .. 255*3)
-    # DIFF_MARGIN = 30
-    DIFF_MARGIN = 60
-
-    # criterias to recognize bright colors (0 .. 255*3)
-    is_dark_bg = is_dark(theme_bg)
-
-    max_possible_lightness = 255 * 3
-    # @TODO: use real lightness from HSV or Lab color model
-    lightness_delta = sum(int_list_from_hex(theme_bg)) * (1 if is_dark_bg else -1) + \
-        max_possible_lightness // 6
-    min_lightness = max_possible_lightness // 38
-    max_lightness = max_possible_lightness - min_lightness
-    if is_dark_bg:
-        min_lightness = lightness_delta
-    else:
-        max_lightness = max_possible_lightness - lightness_delta
-    # BRIGHTNESS_MARGIN = 20
-
-    # 1 means similarity to template the same important as mathing color palette
-    # SIMILARITY_IMPORTANCE = 2
-    SIMILARITY_IMPORTANCE = 2.5
-
-    accuracy = accuracy or 0x20
-    hex_colors_as_color_lists = {
-        key: [
-            hex_to_int(s) for s in color_list_from_hex(value)
-        ] for key, value in hex_colors.items()
-    }
-    if extend_palette:
-        for color in all_colors[:]:
-            for i in (20, 40, 60):
-                all_colors.append(hex_darker(color, i))
-                all_colors.append(hex_darker(color, -i))
-
-    grayest_colors = get_grayest_colors(all_colors)
-    bright_colors = set(all_colors)
-    bright_colors.difference_update(grayest_colors)
-    bright_colors = list(bright_colors)
-
-    bright_colors_as_color_lists = [
-        [
-            hex_to_int(s) for s in color_list_from_hex(value)
-        ] for value in bright_colors
-    ]
-
-    START = [-0xff, -0xff, -0xff]
-    END = [0xff, 0xff, 0xff]
-    best_diff_color_values = [0, 0, 0]
-    biggest_number_of_similar = None
-    prev_biggest_number_of_similar = 'not_found'
-    best_result = None
-
-    _debug_iteration_counter = 0
-
-    while accuracy > 0:
-        _debug_iteration_counter += 1
-        # print()
-        # print(('ITERATION', _debug_iteration_counter))
-        progress = ProgressBar(
-            length=((int(abs(START[0] - END[0])/accuracy) + 2) ** 3)
-        )
-        red = START[RED]
-        while red < END[RED] + accuracy:
-            green = START[GREEN]
-            while green < END[GREEN] + accuracy:
-                blue = START[BLUE]
-                while blue < END[BLUE] + accuracy:
-                    try:
-
-                        color_list = [red, green, blue]
-                        modified_colors = {}
-                        for key, value in hex_colors_as_color_lists.items():
-                            if not key.startswith('color'):
-                                continue
-                            new_value = value[:]
-                            for i in range(3):
-                                new_value[i] = min(
-                                    255,
-                                    max(
-                                        0,
-                                        new_value[i] + (red, green, blue)[i]
-                                    )
-                                )
-                            if key not in ['color0', 'color7', 'color8', 'color15']:
-                                if not min_lightness <= sum(new_value) <= max_lightness:
-                                    raise ContinueNext()
-                            modified_colors[key] = new_value
-
-                        num_of_similar = 0
-                        for modified_color in modified_colors.values():
-                            for bright_color in bright_colors_as_color_lists:
-                                abs_diff = 0
-                                for i in range(3):
-                                    abs_diff += abs(modified_color[i] - bright_color[i])
-                                if abs_diff < DIFF_MARGIN:
-                                    num_of_similar += 1
-
-                        similarity_to_reference = (
-                            255*3 - sum([abs(c) for c in color_list]) * SIMILARITY_IMPORTANCE
-                        ) / (255*3)
-                        num_of_similar *= similarity_to_reference
-
-                        if (
-                                biggest_number_of_similar is None
-                        ) or (
-                            num_of_similar > biggest_number_of_similar
-                        ):
-                            biggest_number_of_similar = num_of_similar
-                            best_result = modified_colors
-                            best_diff_color_values[RED] = red
-                            best_diff_color_values[GREEN] = green
-                            best_diff_color_values[BLUE] = blue
-
-                    except ContinueNext:
-                        pass
-                    progress.update()
-                    blue += accuracy
-                green += accuracy
-            red += accuracy
-
-        if biggest_number_of_similar == prev_biggest_number_of_similar:
-            # print('good enough')
-            break
-        prev_biggest_number_of_similar = biggest_number_of_similar
-        for i in range(3):
-            START[i] = max(best_diff_color_values[i] - accuracy, -255)
-            END[i] = min(best_diff_color_values[i] + accuracy, 255)
-        accuracy = round(accuracy / 2)
-        # print(('DEEPER!', accuracy))
+        accuracy=None, extend_palette=False, engine=None, processes=None,
+        time_budget=None, warm_start=None,
+):  # pylint: disable=invalid-name,too-many-arguments
+    deadline = (time() + time_budget) if time_budget else None
+    search = prepare_smarty_search(
+        reference_colors, all_colors, theme_bg,
+        accuracy=accuracy, extend_palette=extend_palette,
+    )
+    best_offset, best_score = smarty_search(
+        search, engine=engine, processes=processes,
+        deadline=deadline, warm_start=warm_start,
+    )
 
     # from fabulous.color import bg256
     # for bright_color in bright_colors:
     #     print(bg256(bright_color, bright_color))
 
-    modified_colors = {
-        key: color_hex_from_list(c)
-        for key, c in best_result.items()
-    }
-    # return modified_colors
-    result_callback(modified_colors)
+    modified_colors = apply_smarty_offset(search, best_offset)
+    return modified_colors, (best_offset, best_score)
+
+
+def _swap_bg_fg_for_template(reference_colors, theme_bg, theme_fg):
+    need_light_bg = (
+        get_lightness(reference_colors['background']) >
+        get_lightness(reference_colors['foreground'])
+    )
+    have_light_bg = (
+        get_lightness(theme_bg) >
+        get_lightness(theme_fg)
+    )
+    if (
+            have_light_bg and not need_light_bg
+    ) or (
+        not have_light_bg and need_light_bg
+    ):
+        return theme_fg, theme_bg
+    return theme_bg, theme_fg
 
 
 _FULL_PALETTE_CACHE = {}  # type: Dict[str, Dict[str, str]]
 
+# last full-accuracy best offset and score for (template, background) pairs:
+_SMARTY_WARM_START = {}  # type: Dict[Tuple[str, str], Tuple[List[int], Optional[float]]]
+
+# starting grid step and time limit (in seconds) for the quick preview result
+# of the time-budgeted smarty generation:
+SMARTY_PREVIEW_ACCURACY = 0x40
+SMARTY_PREVIEW_TIME_BUDGET = 0.1
+# preview and refinement tasks started by the newer edit supersede the older ones:
+SMARTY_TASK_GROUP = 'terminal_smarty'
+
+# bump it each time when the smarty search starts producing different results:
+SMARTY_ALGORITHM_VERSION = 1
+_FULL_PALETTE_DISK_CACHE = DiskCache(
+    name='terminal_smarty', version=SMARTY_ALGORITHM_VERSION, max_entries=2000,
+)
+
 
 def generate_theme_from_full_palette(
         palette, theme_bg, theme_fg, template_path,
         app, result_callback,
         auto_swap_colors=True, accuracy=None, extend_palette=None,
+        engine=None, processes=None,
+        time_budget=None, refine_in_background=True, incremental=False,
         **kwargs
-):  # pylint: disable=invalid-name,too-many-arguments,too-many-locals
+):  # pylint: disable=invalid-name,too-many-arguments,too-many-locals,too-many-statements
+    """
+    With `time_budget` (in seconds) a coarse palette is searched in a task
+    and passed to the `result_callback` first, and then (if
+    `refine_in_background`) the full-accuracy one is searched in the next
+    task and passed to it once again. Both tasks are in the same group, so
+    a newer call cancels the ones which are not done yet.
+
+    In `incremental` mode the search of the coarse palette starts around the
+    previous full-accuracy result for the same template and background. The
+    full-accuracy palette is always searched from scratch, so it doesn't
+    depend on the previous searches and is cached as usual.
 
-    reference_colors = import_xcolors(template_path)
+    Without `app` (when used without GUI) the full-accuracy palette is
+    generated right away in the current thread.
+    """
+
+    reference_colors = TERMINAL_TEMPLATES.get_by_path(template_path).colors
 
     if auto_swap_colors:
-        need_light_bg = (
-            get_lightness(reference_colors['background']) >
-            get_lightness(reference_colors['foreground'])
-        )
-        have_light_bg = (
-            get_lightness(theme_bg) >
-            get_lightness(theme_fg)
-        )
-        if (
-                have_light_bg and not need_light_bg
-        ) or (
-            not have_light_bg and need_light_bg
-        ):
-            theme_bg, theme_fg = theme_fg, theme_bg
+        theme_bg, theme_fg = _swap_bg_fg_for_template(reference_colors, theme_bg, theme_fg)
 
     all_colors = sorted(get_all_colors_from_oomox_colorscheme(palette))
     cache_id = str(
@@ -388,31 +194,108 @@ def generate_theme_from_full_palette(
             kwargs[name] for name in sorted(kwargs, key=lambda x: x[0])
         ] + all_colors
     ) + template_path + theme_bg + str(accuracy) + str(extend_palette)
+    disk_cache_key = _FULL_PALETTE_DISK_CACHE.get_key(
+        sorted(reference_colors.items()),
+        all_colors,
+        theme_bg,
+        accuracy,
+        bool(extend_palette),
+        sorted(kwargs.items()),
+    )
+
+    warm_start_id = (template_path, theme_bg)
+    warm_start = _SMARTY_WARM_START.get(warm_start_id) if incremental else None
+
+    if cache_id not in _FULL_PALETTE_CACHE:
+        cached_colors = _FULL_PALETTE_DISK_CACHE.get(disk_cache_key)
+        if cached_colors:
+            _FULL_PALETTE_CACHE[cache_id] = cached_colors
+
+    def _preview_callback(generated_colors):
+        modified_colors = {}
+        modified_colors.update(generated_colors)
+        modified_colors["background"] = theme_bg
+        modified_colors["foreground"] = theme_fg
+        result_callback(modified_colors)
 
     if cache_id in _FULL_PALETTE_CACHE:
         _generate_theme_from_full_palette_callback(
             cache_id, theme_bg, theme_fg, result_callback
         )
     else:
-        def _callback(generated_colors):
+        def _callback(result):
+            generated_colors, search_result = result
+            _SMARTY_WARM_START[warm_start_id] = search_result
             _FULL_PALETTE_CACHE[cache_id] = generated_colors
+            _FULL_PALETTE_DISK_CACHE.set(disk_cache_key, generated_colors)
             _generate_theme_from_full_palette_callback(
                 cache_id, theme_bg, theme_fg, result_callback
             )
-        # from time import time
-        # before = time()
+
+        if not app:
+            _callback(_generate_theme_from_full_palette(
+                reference_colors,
+                all_colors,
+                theme_bg,
+                accuracy,
+                extend_palette,
+                engine,
+                processes,
+            ))
+            return
+
+        if time_budget:
+
+            def _preview_task_callback(result):
+                preview_colors, _search_result = result
+                _preview_callback(preview_colors)
+                if refine_in_background:
+                    app.schedule_task(
+                        _generate_theme_from_full_palette,
+                        reference_colors,
+                        all_colors,
+                        theme_bg,
+                        accuracy,
+                        extend_palette,
+                        engine,
+                        processes,
+                        callback=_callback,
+                        group=SMARTY_TASK_GROUP,
+                    )
+
+            app.schedule_task(
+                _generate_theme_from_full_palette,
+                reference_colors,
+                all_colors,
+                theme_bg,
+                max(accuracy or 0, SMARTY_PREVIEW_ACCURACY),
+                extend_palette,
+                engine,
+                None,
+                time_budget,
+                warm_start,
+                callback=_preview_task_callback,
+                group=SMARTY_TASK_GROUP,
+            )
+            return
+
+        def _enable_callback(result):
+            app.enable()
+            _callback(result)
+
         app.disable(_("Generating terminal palette…"))
         app.schedule_task(
             _generate_theme_from_full_palette,
-            _callback,
             reference_colors,
             all_colors,
             theme_bg,
             accuracy,
             extend_palette,
+            engine,
+            processes,
+            callback=_enable_callback,
+            error_callback=lambda _exception: app.enable(),
         )
-        app.enable()
-        # print(time() - before)
 
 
 def _generate_theme_from_full_palette_callback(cache_id, theme_bg, theme_fg, result_callback):
@@ -423,9 +306,53 @@ def _generate_theme_from_full_palette_callback(cache_id, theme_bg, theme_fg, res
     result_callback(modified_colors)
 
 
+# grid step of the template ranking, the same as the default smarty accuracy:
+SMARTY_RANKING_ACCURACY = 0x20
+
+
+def rank_terminal_templates(  # pylint: disable=too-many-arguments,too-many-locals
+        palette, theme_bg, theme_fg,
+        template_names=None, auto_swap_colors=True, extend_palette=False,
+        accuracy=SMARTY_RANKING_ACCURACY,
+):
+    """
+    Score terminal templates (all of them by default) against the colorscheme
+    palette in a single batched pass over the first level of the smarty grid,
+    instead of running the full smarty search for each of them.
+
+    Returns the list of `(template_name, score)` sorted from the best fitting
+    template, templates with no acceptable offset have `None` score and go last.
+    """
+    templates = TERMINAL_TEMPLATES.get_all(template_names)
+    if not templates:
+        return []
+    all_colors = sorted(get_all_colors_from_oomox_colorscheme(palette))
+    searches = []
+    for template in templates:
+        template_bg = theme_bg
+        if auto_swap_colors:
+            template_bg, _template_fg = _swap_bg_fg_for_template(
+                template.colors, theme_bg, theme_fg
+            )
+        searches.append(prepare_smarty_search(
+            template.colors, all_colors, template_bg,
+            accuracy=accuracy, extend_palette=extend_palette,
+            reference_rgb=template.rgb,
+        ))
+    axis = range(-0xff, 0xff + accuracy, accuracy)
+    results = smarty_scan_templates(searches, (axis, axis, axis))
+    ranking = [
+        (template.name, result[0] if result else None)
+        for template, result in zip(templates, results)
+    ]
+    ranking.sort(key=lambda item: (item[1] is None, -(item[1] or 0)))
+    return ranking
+
+
 def _generate_themes_from_oomox(
         original_colorscheme,
         app, result_callback,
+        time_budget=None, incremental=False, processes=None,
 ):
     colorscheme = {}
     colorscheme.update(original_colorscheme)
@@ -452,6 +379,9 @@ def _generate_themes_from_oomox(
             extend_palette=colorscheme["TERMINAL_THEME_EXTEND_PALETTE"],
             accuracy=255+8-colorscheme.get("TERMINAL_THEME_ACCURACY"),
             app=app, result_callback=_callback,
+            time_budget=time_budget,
+            incremental=incremental,
+            processes=processes,
         )
         return
     if colorscheme['TERMINAL_THEME_MODE'] in ('basic', 'auto'):
@@ -503,10 +433,16 @@ def generate_xrdb_theme_from_oomox(colorscheme):
 def generate_terminal_colors_for_oomox(
         colorscheme,
         app, result_callback,
+        time_budget=None, incremental=False, processes=None,
 ):
+    """
+    With `processes` the smarty search of the terminal palette is split
+    between that many worker processes.
+    """
     _generate_themes_from_oomox(
         colorscheme,
         app=app, result_callback=result_callback,
+        time_budget=time_budget, incremental=incremental, processes=processes,
     )
 
 
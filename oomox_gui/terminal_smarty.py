@@ -0,0 +1,806 @@
+# -*- coding: utf-8 -*-
+"""
+Smarty terminal palette search: finds the offset of the terminal template
+colors which makes them the most similar to the colors of the theme palette.
+"""
+import shutil
+from collections import namedtuple, defaultdict
+from functools import partial
+from multiprocessing.pool import Pool
+from time import time
+
+from .color import (
+    is_dark,
+    hex_to_int, color_list_from_hex, color_hex_from_list, hex_darker,
+    int_list_from_hex,
+)
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+RED = 0
+GREEN = 1
+BLUE = 2
+
+
+class ContinueNext(Exception):
+    pass
+
+
+# @TODO:
+# These two functions are temporary until progressbar API won't be implemented in UI
+def get_term_width():
+    return shutil.get_terminal_size((80, 80)).columns
+
+
+class ProgressBar():
+
+    message = None
+    print_ratio = None
+    index = 0
+    progress = 0
+
+    LEFT_DECORATION = '['
+    RIGHT_DECORATION = ']'
+    # EMPTY = '-'
+    # FULL = '#'
+
+    def __init__(self, length, message=None):
+        message = message or str(length)
+        self.message = message
+        width = (
+            get_term_width() - len(message) -
+            len(self.LEFT_DECORATION) - len(self.RIGHT_DECORATION)
+        )
+        self.print_ratio = length / width
+        # sys.stderr.write(message)
+        # sys.stderr.write(self.LEFT_DECORATION + self.EMPTY * width + self.RIGHT_DECORATION)
+        # sys.stderr.write('{}[\bb'.format(chr(27)) * (width + len(self.RIGHT_DECORATION)))
+        # sys.stderr.flush()
+
+    def update(self):
+        self.index += 1
+        if self.index / self.print_ratio > self.progress:
+            self.progress += 1
+            # sys.stderr.write(self.FULL)
+            # sys.stderr.flush()
+
+    def __enter__(self):
+        return self.update
+
+    # def __exit__(self, *exc_details):
+        # sys.stderr.write('\n')
+# ######## END
+
+
+def sort_by_saturation(c):
+    # pylint: disable=invalid-name
+    return abs(c[0]-c[1])+abs(c[0]-c[2]) + \
+        abs(c[1]-c[0])+abs(c[1]-c[2]) + \
+        abs(c[2]-c[1])+abs(c[2]-c[0])
+
+
+def get_grayest_colors(palette):
+    list_of_colors = [[hex_to_int(s) for s in color_list_from_hex(c)] for c in palette]
+    saturation_list = sorted(
+        list_of_colors,
+        key=sort_by_saturation
+    )
+    gray_colors = saturation_list[:(len(saturation_list)//3)]
+    gray_colors.sort(key=sum)
+    gray_colors = [color_hex_from_list(c) for c in gray_colors]
+    return gray_colors
+
+
+def get_lightness(theme_color):
+    return sum(int_list_from_hex(theme_color))
+
+
+# how far should be the colors to be counted as similar (0 .. 255*3)
+# SMARTY_DIFF_MARGIN = 30
+SMARTY_DIFF_MARGIN = 60
+
+# 1 means similarity to template the same important as mathing color palette
+# SMARTY_SIMILARITY_IMPORTANCE = 2
+SMARTY_SIMILARITY_IMPORTANCE = 2.5
+
+# colors which are allowed to violate the lightness criterias
+SMARTY_LIGHTNESS_EXCEPTIONS = ('color0', 'color7', 'color8', 'color15', )
+
+SMARTY_ENGINE_REFERENCE = 'reference'
+SMARTY_ENGINE_PYTHON = 'python'
+SMARTY_ENGINE_NUMPY = 'numpy'
+SMARTY_ENGINE_BOUNDED = 'bounded'
+
+# upper limit for the number of elements in temporary arrays of numpy engine
+NUMPY_CHUNK_SIZE = 2 ** 22
+
+
+class L1RangeIndex():
+    """
+    Bucketed grid over RGB points for counting the points which are closer
+    than `margin` (L1 distance) to the given one.
+
+    Bucket side is equal to `margin` so only the neighbour buckets have to
+    be checked. Results are memoized as the same clamped colors get queried
+    over and over again by the consequent search iterations.
+    """
+
+    margin = None
+    _buckets = None
+    _counts_cache = None
+
+    def __init__(self, points, margin):
+        self.margin = margin
+        self._buckets = defaultdict(list)
+        for point in points:
+            self._buckets[self._get_bucket_id(point)].append(tuple(point))
+        self._counts_cache = {}
+
+    def _get_bucket_id(self, point):
+        return tuple(channel // self.margin for channel in point)
+
+    def count_within(self, point):  # pylint: disable=too-many-locals
+        point = tuple(point)
+        count = self._counts_cache.get(point)
+        if count is not None:
+            return count
+        count = 0
+        red, green, blue = point
+        bucket_r, bucket_g, bucket_b = self._get_bucket_id(point)
+        for neighbour_r in range(bucket_r - 1, bucket_r + 2):
+            for neighbour_g in range(bucket_g - 1, bucket_g + 2):
+                for neighbour_b in range(bucket_b - 1, bucket_b + 2):
+                    bucket = self._buckets.get((neighbour_r, neighbour_g, neighbour_b))
+                    if not bucket:
+                        continue
+                    for other_r, other_g, other_b in bucket:
+                        if (
+                                abs(red - other_r) + abs(green - other_g) + abs(blue - other_b)
+                        ) < self.margin:
+                            count += 1
+        self._counts_cache[point] = count
+        return count
+
+
+SmartySearch = namedtuple('SmartySearch', [
+    'template_keys',
+    'template_colors',
+    'lightness_checked',
+    'bright_colors',
+    'bright_index',
+    'min_lightness',
+    'max_lightness',
+    'accuracy',
+])
+
+
+def _get_lightness_bounds(theme_bg):
+    # criterias to recognize bright colors (0 .. 255*3)
+    is_dark_bg = is_dark(theme_bg)
+
+    max_possible_lightness = 255 * 3
+    # @TODO: use real lightness from HSV or Lab color model
+    lightness_delta = sum(int_list_from_hex(theme_bg)) * (1 if is_dark_bg else -1) + \
+        max_possible_lightness // 6
+    min_lightness = max_possible_lightness // 38
+    max_lightness = max_possible_lightness - min_lightness
+    if is_dark_bg:
+        min_lightness = lightness_delta
+    else:
+        max_lightness = max_possible_lightness - lightness_delta
+    return min_lightness, max_lightness
+
+
+def prepare_smarty_search(
+        reference_colors, all_colors, theme_bg,
+        accuracy=None, extend_palette=False, reference_rgb=None,
+):  # pylint: disable=too-many-arguments
+    """
+    `reference_rgb` are the template colors already parsed to ints
+    (see `TerminalTemplate.rgb`), if available.
+    """
+    min_lightness, max_lightness = _get_lightness_bounds(theme_bg)
+    # BRIGHTNESS_MARGIN = 20
+
+    all_colors = all_colors[:]
+    if extend_palette:
+        for color in all_colors[:]:
+            for i in (20, 40, 60):
+                all_colors.append(hex_darker(color, i))
+                all_colors.append(hex_darker(color, -i))
+
+    grayest_colors = get_grayest_colors(all_colors)
+    bright_colors = set(all_colors)
+    bright_colors.difference_update(grayest_colors)
+
+    template_keys = [
+        key for key in reference_colors
+        if key.startswith('color')
+    ]
+    bright_colors = [
+        int_list_from_hex(value) for value in sorted(bright_colors)
+    ]
+    return SmartySearch(
+        template_keys=template_keys,
+        template_colors=[
+            list(reference_rgb[key]) if reference_rgb else int_list_from_hex(reference_colors[key])
+            for key in template_keys
+        ],
+        lightness_checked=[
+            key not in SMARTY_LIGHTNESS_EXCEPTIONS for key in template_keys
+        ],
+        bright_colors=bright_colors,
+        bright_index=L1RangeIndex(bright_colors, SMARTY_DIFF_MARGIN),
+        min_lightness=min_lightness,
+        max_lightness=max_lightness,
+        accuracy=accuracy or 0x20,
+    )
+
+
+def apply_smarty_offset(search, offset):
+    return {
+        key: color_hex_from_list([
+            min(255, max(0, value[i] + offset[i]))
+            for i in range(3)
+        ])
+        for key, value in zip(search.template_keys, search.template_colors)
+    }
+
+
+def _smarty_search_reference(search):
+    # noqa  pylint: disable=invalid-name,too-many-nested-blocks,too-many-locals,too-many-statements,too-many-branches
+    # @TODO: refactor it some day :3
+    # Kept as a reference implementation to compare the faster engines against.
+    DIFF_MARGIN = SMARTY_DIFF_MARGIN
+    SIMILARITY_IMPORTANCE = SMARTY_SIMILARITY_IMPORTANCE
+    min_lightness = search.min_lightness
+    max_lightness = search.max_lightness
+    accuracy = search.accuracy
+    hex_colors_as_color_lists = dict(zip(search.template_keys, search.template_colors))
+    bright_colors_as_color_lists = search.bright_colors
+
+    START = [-0xff, -0xff, -0xff]
+    END = [0xff, 0xff, 0xff]
+    best_diff_color_values = [0, 0, 0]
+    biggest_number_of_similar = None
+    prev_biggest_number_of_similar = 'not_found'
+
+    _debug_iteration_counter = 0
+
+    while accuracy > 0:
+        _debug_iteration_counter += 1
+        # print()
+        # print(('ITERATION', _debug_iteration_counter))
+        progress = ProgressBar(
+            length=((int(abs(START[0] - END[0])/accuracy) + 2) ** 3)
+        )
+        red = START[RED]
+        while red < END[RED] + accuracy:
+            green = START[GREEN]
+            while green < END[GREEN] + accuracy:
+                blue = START[BLUE]
+                while blue < END[BLUE] + accuracy:
+                    try:
+
+                        color_list = [red, green, blue]
+                        modified_colors = {}
+                        for key, value in hex_colors_as_color_lists.items():
+                            new_value = value[:]
+                            for i in range(3):
+                                new_value[i] = min(
+                                    255,
+                                    max(
+                                        0,
+                                        new_value[i] + (red, green, blue)[i]
+                                    )
+                                )
+                            if key not in SMARTY_LIGHTNESS_EXCEPTIONS:
+                                if not min_lightness <= sum(new_value) <= max_lightness:
+                                    raise ContinueNext()
+                            modified_colors[key] = new_value
+
+                        num_of_similar = 0
+                        for modified_color in modified_colors.values():
+                            for bright_color in bright_colors_as_color_lists:
+                                abs_diff = 0
+                                for i in range(3):
+                                    abs_diff += abs(modified_color[i] - bright_color[i])
+                                if abs_diff < DIFF_MARGIN:
+                                    num_of_similar += 1
+
+                        similarity_to_reference = (
+                            255*3 - sum([abs(c) for c in color_list]) * SIMILARITY_IMPORTANCE
+                        ) / (255*3)
+                        num_of_similar *= similarity_to_reference
+
+                        if (
+                                biggest_number_of_similar is None
+                        ) or (
+                            num_of_similar > biggest_number_of_similar
+                        ):
+                            biggest_number_of_similar = num_of_similar
+                            best_diff_color_values[RED] = red
+                            best_diff_color_values[GREEN] = green
+                            best_diff_color_values[BLUE] = blue
+
+                    except ContinueNext:
+                        pass
+                    progress.update()
+                    blue += accuracy
+                green += accuracy
+            red += accuracy
+
+        if biggest_number_of_similar == prev_biggest_number_of_similar:
+            # print('good enough')
+            break
+        prev_biggest_number_of_similar = biggest_number_of_similar
+        for i in range(3):
+            START[i] = max(best_diff_color_values[i] - accuracy, -255)
+            END[i] = min(best_diff_color_values[i] + accuracy, 255)
+        accuracy = round(accuracy / 2)
+        # print(('DEEPER!', accuracy))
+
+    return best_diff_color_values
+
+
+def _smarty_refine(  # pylint: disable=too-many-arguments
+        search, scan_level, deadline=None,
+        start=None, end=None, accuracy=None,
+):
+    """
+    Coarse-to-fine loop shared by the vectorized engines,
+    returns the best offset and its score.
+
+    `scan_level(search, axes, min_score)` should return `(score, offset)` of
+    the first best-scored cell of the given (red, green, blue) grid axes or
+    None. Cells not scored higher than `min_score` (best score of the previous
+    levels) wouldn't be used anyway, so scanners are allowed to skip them.
+    It's the same as in the reference loop: each next level is searched
+    around the best result with twice smaller step.
+
+    If `deadline` (as of `time.time()`) is passed, the refinement stops after
+    the first level which finished later than that and the best offset found
+    so far is returned.
+    """
+    accuracy = accuracy or search.accuracy
+    start = list(start or [-0xff, -0xff, -0xff])
+    end = list(end or [0xff, 0xff, 0xff])
+    best_offset = [0, 0, 0]
+    best_score = None
+    prev_best_score = 'not_found'
+
+    while accuracy > 0:
+        axes = [
+            range(start[i], end[i] + accuracy, accuracy)
+            for i in range(3)
+        ]
+        level_result = scan_level(search, axes, best_score)
+        if level_result:
+            level_score, level_offset = level_result
+            if (best_score is None) or (level_score > best_score):
+                best_score = level_score
+                best_offset = list(level_offset)
+
+        if best_score == prev_best_score:
+            break
+        if deadline and time() > deadline:
+            break
+        prev_best_score = best_score
+        for i in range(3):
+            start[i] = max(best_offset[i] - accuracy, -255)
+            end[i] = min(best_offset[i] + accuracy, 255)
+        accuracy = round(accuracy / 2)
+
+    return best_offset, best_score
+
+
+def _get_similarity_to_reference(offset):
+    return (
+        255*3 - sum([abs(c) for c in offset]) * SMARTY_SIMILARITY_IMPORTANCE
+    ) / (255*3)
+
+
+def _smarty_scan_level_python(search, axes, _min_score=None):
+    # pylint: disable=too-many-locals,unsubscriptable-object
+    bright_index = search.bright_index
+    template = list(zip(search.template_colors, search.lightness_checked))
+    min_lightness = search.min_lightness
+    max_lightness = search.max_lightness
+    best_result = None
+    for red in axes[RED]:
+        for green in axes[GREEN]:
+            for blue in axes[BLUE]:
+                offset = (red, green, blue)
+                num_of_similar = 0
+                for color, lightness_checked in template:
+                    new_value = (
+                        min(255, max(0, color[RED] + red)),
+                        min(255, max(0, color[GREEN] + green)),
+                        min(255, max(0, color[BLUE] + blue)),
+                    )
+                    if lightness_checked and not (
+                            min_lightness <= sum(new_value) <= max_lightness
+                    ):
+                        break
+                    num_of_similar += bright_index.count_within(new_value)
+                else:
+                    score = num_of_similar * _get_similarity_to_reference(offset)
+                    if (best_result is None) or (score > best_result[0]):
+                        best_result = (score, offset)
+    return best_result
+
+
+def _smarty_scan_level_numpy(search, axes, _min_score=None):  # pylint: disable=too-many-locals
+    template = numpy.array(search.template_colors, dtype=numpy.int32)
+    bright = numpy.array(search.bright_colors, dtype=numpy.int32).reshape(-1, 3)
+    lightness_checked = numpy.array(search.lightness_checked, dtype=bool)
+    reds, greens, blues = [numpy.array(axis, dtype=numpy.int32) for axis in axes]
+
+    # shifted template colors for each grid value, per channel: (axis, template)
+    shifted_r, shifted_g, shifted_b = [
+        numpy.clip(template[:, channel][None, :] + axis[:, None], 0, 255)
+        for channel, axis in enumerate((reds, greens, blues))
+    ]
+    # distances to bright colors, per channel: (axis, template, bright)
+    dist_r, dist_g, dist_b = [
+        numpy.abs(shifted[:, :, None] - bright[:, channel][None, None, :])
+        for channel, shifted in enumerate((shifted_r, shifted_g, shifted_b))
+    ]
+
+    num_of_similar = numpy.zeros((len(reds), len(greens), len(blues)), dtype=numpy.int64)
+    valid = numpy.zeros(num_of_similar.shape, dtype=bool)
+    green_chunk = max(1, NUMPY_CHUNK_SIZE // max(1, len(blues) * len(template) * len(bright)))
+    for red_index in range(len(reds)):
+        # whole (green, blue) slab for the given red offset at once:
+        lightness = (
+            shifted_r[red_index][None, None, :] +
+            shifted_g[:, None, :] +
+            shifted_b[None, :, :]
+        )
+        valid[red_index] = numpy.all(
+            (
+                (lightness >= search.min_lightness) &
+                (lightness <= search.max_lightness)
+            ) | ~lightness_checked,
+            axis=2
+        )
+        for green_start in range(0, len(greens), green_chunk):
+            green_end = green_start + green_chunk
+            abs_diff = (
+                dist_r[red_index][None, None, :, :] +
+                dist_g[green_start:green_end][:, None, :, :] +
+                dist_b[None, :, :, :]
+            )
+            num_of_similar[red_index, green_start:green_end] = numpy.count_nonzero(
+                abs_diff < SMARTY_DIFF_MARGIN, axis=(2, 3)
+            )
+
+    if not valid.any():
+        return None
+    offset_abs_sum = (
+        numpy.abs(reds)[:, None, None] +
+        numpy.abs(greens)[None, :, None] +
+        numpy.abs(blues)[None, None, :]
+    )
+    similarity_to_reference = (
+        255*3 - offset_abs_sum * SMARTY_SIMILARITY_IMPORTANCE
+    ) / (255*3)
+    scores = num_of_similar * similarity_to_reference
+    scores[~valid] = -numpy.inf
+    best_index = numpy.unravel_index(numpy.argmax(scores), scores.shape)
+    return (
+        float(scores[best_index]),
+        [int(axis[index]) for axis, index in zip((reds, greens, blues), best_index)],
+    )
+
+
+def _get_smarty_upper_bound(search, axes):  # pylint: disable=too-many-locals
+    """
+    Cheap upper bound of the score over the whole (red, green, blue) sub-cube
+    of the offsets, or None if none of its cells passes lightness criterias.
+
+    Both clamped colors and their lightness are monotonic to the offset, so
+    the shifted template colors of the sub-cube lie in the boxes between the
+    colors shifted by its lowest and highest corners.
+    """
+    lowest = [axis[0] for axis in axes]
+    highest = [axis[-1] for axis in axes]
+    boxes = []
+    for color, lightness_checked in zip(search.template_colors, search.lightness_checked):
+        box_low = [min(255, max(0, color[i] + lowest[i])) for i in range(3)]
+        box_high = [min(255, max(0, color[i] + highest[i])) for i in range(3)]
+        if lightness_checked and (
+                (sum(box_high) < search.min_lightness) or (sum(box_low) > search.max_lightness)
+        ):
+            return None
+        boxes.append((box_low, box_high))
+
+    if numpy:
+        box_low, box_high = [
+            numpy.array(corners, dtype=numpy.int32)[:, None, :]
+            for corners in zip(*boxes)
+        ]
+        bright = numpy.array(search.bright_colors, dtype=numpy.int32).reshape(1, -1, 3)
+        distances = numpy.maximum(
+            box_low - bright, bright - box_high
+        ).clip(min=0).sum(axis=2)
+        max_num_of_similar = int(numpy.count_nonzero(distances < SMARTY_DIFF_MARGIN))
+    else:
+        max_num_of_similar = 0
+        for box_low, box_high in boxes:
+            for bright_color in search.bright_colors:
+                distance = 0
+                for i in range(3):
+                    distance += max(0, box_low[i] - bright_color[i], bright_color[i] - box_high[i])
+                if distance < SMARTY_DIFF_MARGIN:
+                    max_num_of_similar += 1
+
+    max_similarity_to_reference = _get_similarity_to_reference([
+        0 if axis_low <= 0 <= axis_high else min(abs(axis_low), abs(axis_high))
+        for axis_low, axis_high in zip(lowest, highest)
+    ])
+    if max_similarity_to_reference <= 0:
+        return 0
+    return max_num_of_similar * max_similarity_to_reference
+
+
+# sub-cubes not bigger than that are scored cell by cell:
+SMARTY_BOUNDED_LEAF_SIZES = {
+    SMARTY_ENGINE_PYTHON: 64,
+    SMARTY_ENGINE_NUMPY: 2048,
+}
+
+
+def _smarty_scan_level_bounded(search, axes, min_score=None):
+    # pylint: disable=too-many-locals,unsubscriptable-object
+    """
+    Branch-and-bound scan: sub-cubes which can't contain a cell scored higher
+    than the best one found so far (or than `min_score`) are skipped as whole.
+
+    Sub-cubes are split along red, then green, then blue axis and visited
+    depth-first lower half first, so cells are compared in the same order as
+    by the exhaustive scan and ties are resolved the same way.
+    """
+    leaf_engine = SMARTY_ENGINE_NUMPY if numpy else SMARTY_ENGINE_PYTHON
+    scan_leaf = SMARTY_LEVEL_SCANNERS[leaf_engine]
+    leaf_size = SMARTY_BOUNDED_LEAF_SIZES[leaf_engine]
+    best_result = None
+    pending = [tuple(axes)]
+    while pending:
+        sub_axes = pending.pop()
+        if not all(sub_axes):
+            continue
+        upper_bound = _get_smarty_upper_bound(search, sub_axes)
+        if upper_bound is None:
+            continue
+        scores_to_beat = [
+            score for score in (min_score, best_result and best_result[0])
+            if score is not None
+        ]
+        if scores_to_beat and upper_bound <= max(scores_to_beat):
+            continue
+        if len(sub_axes[RED]) * len(sub_axes[GREEN]) * len(sub_axes[BLUE]) <= leaf_size:
+            leaf_result = scan_leaf(search, sub_axes)
+            if leaf_result and (
+                    (best_result is None) or (leaf_result[0] > best_result[0])
+            ):
+                best_result = leaf_result
+            continue
+        split_axis = RED if len(sub_axes[RED]) > 1 else (
+            GREEN if len(sub_axes[GREEN]) > 1 else BLUE
+        )
+        half = len(sub_axes[split_axis]) // 2
+        lower_half = list(sub_axes)
+        lower_half[split_axis] = sub_axes[split_axis][:half]
+        upper_half = list(sub_axes)
+        upper_half[split_axis] = sub_axes[split_axis][half:]
+        pending.append(tuple(upper_half))
+        pending.append(tuple(lower_half))
+    return best_result
+
+
+SMARTY_LEVEL_SCANNERS = {
+    SMARTY_ENGINE_PYTHON: _smarty_scan_level_python,
+    SMARTY_ENGINE_NUMPY: _smarty_scan_level_numpy,
+    SMARTY_ENGINE_BOUNDED: _smarty_scan_level_bounded,
+}
+
+
+def get_default_smarty_engine():
+    if numpy:
+        return SMARTY_ENGINE_NUMPY
+    return SMARTY_ENGINE_PYTHON
+
+
+# how many shards per worker process, to even out the load between them:
+SHARDS_PER_PROCESS = 4
+
+_WORKER_SMARTY_SEARCH = None
+
+
+def _init_smarty_worker(search):
+    global _WORKER_SMARTY_SEARCH  # pylint: disable=global-statement
+    _WORKER_SMARTY_SEARCH = search
+
+
+def _smarty_scan_shard(engine, axes, min_score):
+    return SMARTY_LEVEL_SCANNERS[engine](_WORKER_SMARTY_SEARCH, axes, min_score)
+
+
+def _smarty_scan_level_sharded(  # pylint: disable=too-many-arguments,unsubscriptable-object
+        pool, engine, processes, _search, axes, min_score=None,
+):
+    """
+    Split the grid of the level along the red axis between the pool workers.
+    Shards are contiguous and reduced in the same order as the serial scan,
+    so on equal scores the result is the same as of the serial scan.
+    """
+    reds, greens, blues = axes
+    num_shards = min(len(reds), processes * SHARDS_PER_PROCESS)
+    shard_size = -(-len(reds) // num_shards)
+    shard_results = pool.starmap(_smarty_scan_shard, [
+        (engine, (reds[shard_start:shard_start + shard_size], greens, blues), min_score)
+        for shard_start in range(0, len(reds), shard_size)
+    ])
+    best_result = None
+    for shard_result in shard_results:
+        if shard_result and (
+                (best_result is None) or (shard_result[0] > best_result[0])
+        ):
+            best_result = shard_result
+    return best_result
+
+
+# initial half-size of the cube searched around the previous result:
+SMARTY_WARM_START_RADIUS = 0x10
+# how much worse than the previous one the score could be to not widen the search:
+SMARTY_WARM_START_TOLERANCE = 0.1
+
+
+def _smarty_refine_from_warm_start(search, scan_level, deadline=None, warm_start=None):
+    """
+    Search the neighbourhood of the previous best offset first, widening it
+    (up to the full cube) only while the found score is noticeably worse than
+    the previous one.
+
+    The previous score was computed for another palette, so it doesn't bound
+    the new one and the result could differ from the full search: use it only
+    for the quick previews.
+    """
+    if warm_start:
+        previous_offset, previous_score = warm_start
+        min_score = None
+        if previous_score is not None:
+            min_score = previous_score - abs(previous_score) * SMARTY_WARM_START_TOLERANCE
+        radius = SMARTY_WARM_START_RADIUS
+        while radius < 0xff:
+            best_offset, best_score = _smarty_refine(
+                search, scan_level, deadline=deadline,
+                start=[max(channel - radius, -0xff) for channel in previous_offset],
+                end=[min(channel + radius, 0xff) for channel in previous_offset],
+                accuracy=max(1, min(search.accuracy, radius // 2)),
+            )
+            if (best_score is not None) and (
+                    (min_score is None) or (best_score >= min_score)
+            ):
+                return best_offset, best_score
+            if deadline and time() > deadline:
+                break
+            radius *= 2
+    return _smarty_refine(search, scan_level, deadline=deadline)
+
+
+def smarty_search(search, engine=None, processes=None, deadline=None, warm_start=None):
+    # pylint: disable=too-many-arguments
+    engine = engine or get_default_smarty_engine()
+    if engine == SMARTY_ENGINE_REFERENCE:
+        return _smarty_search_reference(search), None
+    scan_level = SMARTY_LEVEL_SCANNERS[engine]
+    if not processes or processes < 2:
+        return _smarty_refine_from_warm_start(
+            search, scan_level, deadline=deadline, warm_start=warm_start,
+        )
+    with Pool(processes, initializer=_init_smarty_worker, initargs=(search, )) as pool:
+        return _smarty_refine_from_warm_start(search, partial(
+            _smarty_scan_level_sharded, pool, engine, processes
+        ), deadline=deadline, warm_start=warm_start)
+
+
+def _smarty_scan_templates_numpy(searches, axes):  # pylint: disable=too-many-locals
+    """
+    Batched version of `_smarty_scan_level_numpy`: all the searches (which
+    should differ only by template and lightness criterias) are packed into
+    one array with template colors padded to the longest template.
+    """
+    num_of_templates = len(searches)
+    template_length = max(len(search.template_colors) for search in searches)
+    templates = numpy.zeros((num_of_templates, template_length, 3), dtype=numpy.int32)
+    present = numpy.zeros((num_of_templates, template_length), dtype=bool)
+    lightness_checked = numpy.zeros((num_of_templates, template_length), dtype=bool)
+    for template_index, search in enumerate(searches):
+        length = len(search.template_colors)
+        if length:
+            templates[template_index, :length] = search.template_colors
+        present[template_index, :length] = True
+        lightness_checked[template_index, :length] = search.lightness_checked
+    min_lightness = numpy.array([search.min_lightness for search in searches])[:, None, None]
+    max_lightness = numpy.array([search.max_lightness for search in searches])[:, None, None]
+    bright = numpy.array(searches[0].bright_colors, dtype=numpy.int32).reshape(-1, 3)
+    reds, greens, blues = [numpy.array(axis, dtype=numpy.int32) for axis in axes]
+
+    # shifted template colors, per channel: (template, axis, template color)
+    shifted_r, shifted_g, shifted_b = [
+        numpy.clip(templates[:, None, :, channel] + axis[None, :, None], 0, 255)
+        for channel, axis in enumerate((reds, greens, blues))
+    ]
+    # distances to bright colors, per channel: (template, axis, template color, bright)
+    dist_r, dist_g, dist_b = [
+        numpy.abs(shifted[:, :, :, None] - bright[:, channel][None, None, None, :])
+        for channel, shifted in enumerate((shifted_r, shifted_g, shifted_b))
+    ]
+    # padding never counts as similar:
+    dist_r[~numpy.broadcast_to(present[:, None, :, None], dist_r.shape)] = SMARTY_DIFF_MARGIN
+
+    shape = (num_of_templates, len(reds), len(greens), len(blues))
+    num_of_similar = numpy.zeros(shape, dtype=numpy.int64)
+    valid = numpy.zeros(shape, dtype=bool)
+    green_chunk = max(1, NUMPY_CHUNK_SIZE // max(
+        1, num_of_templates * len(blues) * template_length * len(bright)
+    ))
+    for red_index in range(len(reds)):
+        lightness = (
+            shifted_r[:, red_index][:, None, None, :] +
+            shifted_g[:, :, None, :] +
+            shifted_b[:, None, :, :]
+        )
+        valid[:, red_index] = numpy.all(
+            (
+                (lightness >= min_lightness[..., None]) &
+                (lightness <= max_lightness[..., None])
+            ) | ~lightness_checked[:, None, None, :],
+            axis=3
+        )
+        for green_start in range(0, len(greens), green_chunk):
+            green_end = green_start + green_chunk
+            abs_diff = (
+                dist_r[:, red_index][:, None, None, :, :] +
+                dist_g[:, green_start:green_end][:, :, None, :, :] +
+                dist_b[:, None, :, :, :]
+            )
+            num_of_similar[:, red_index, green_start:green_end] = numpy.count_nonzero(
+                abs_diff < SMARTY_DIFF_MARGIN, axis=(3, 4)
+            )
+
+    offset_abs_sum = (
+        numpy.abs(reds)[:, None, None] +
+        numpy.abs(greens)[None, :, None] +
+        numpy.abs(blues)[None, None, :]
+    )
+    similarity_to_reference = (
+        255*3 - offset_abs_sum * SMARTY_SIMILARITY_IMPORTANCE
+    ) / (255*3)
+    scores = num_of_similar * similarity_to_reference[None]
+    scores[~valid] = -numpy.inf
+    results = []
+    for template_index in range(num_of_templates):
+        if not valid[template_index].any():
+            results.append(None)
+            continue
+        template_scores = scores[template_index]
+        best_index = numpy.unravel_index(numpy.argmax(template_scores), template_scores.shape)
+        results.append((
+            float(template_scores[best_index]),
+            [int(axis[index]) for axis, index in zip((reds, greens, blues), best_index)],
+        ))
+    return results
+
+
+def smarty_scan_templates(searches, axes):
+    if numpy:
+        return _smarty_scan_templates_numpy(searches, axes)
+    return [_smarty_scan_level_python(search, axes) for search in searches]
@@ -0,0 +1,134 @@
+import os
+from collections import namedtuple
+from collections.abc import Sequence
+
+from .config import TERMINAL_TEMPLATE_DIR
+
+
+VALID_COLOR_CHARS = [
+    chr(i) for i in range(ord('a'), ord('f') + 1)
+] + [
+    str(i) for i in range(10)
+]
+
+
+def parse_xcolors(path):
+    hex_colors = {}
+    with open(os.path.expanduser(path), encoding='utf-8') as file_object:
+        for line in file_object.read().split('\n'):
+            if line.strip().startswith('!'):
+                continue
+            pair = list(s.strip() for s in line.split(':'))
+            if len(pair) < 2:
+                continue
+            key, value = pair
+            key = key.replace('*', '')
+            value = value.replace('#', '').lower()
+            for char in value:
+                if char not in VALID_COLOR_CHARS:
+                    break
+            else:
+                hex_colors[key] = value
+    return hex_colors
+
+
+def _rgb_from_hex(hex_color):
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+TerminalTemplate = namedtuple('TerminalTemplate', [
+    'name',
+    'path',
+    'mtime',
+    'colors',
+    'rgb',
+])
+
+
+class TerminalTemplateRegistry():
+    """
+    Terminal templates parsed once and re-parsed only when the mtime of the
+    template file changes (and the list of templates - when the mtime of the
+    directory changes).
+
+    Parsed `colors` (hex strings) and `rgb` (tuples of ints, only for valid
+    6-digit colors) are shared between the callers, so they shouldn't be
+    modified in place.
+    """
+
+    template_dir = None
+    _templates = None
+    _names = None
+    _names_mtime = None
+
+    def __init__(self, template_dir):
+        self.template_dir = template_dir
+        self._templates = {}
+
+    def get_names(self):
+        try:
+            dir_mtime = os.stat(self.template_dir).st_mtime
+        except FileNotFoundError:
+            return []
+        if self._names is None or dir_mtime != self._names_mtime:
+            self._names = sorted(
+                dir_entry.name for dir_entry in os.scandir(self.template_dir)
+                if dir_entry.is_file()
+            )
+            self._names_mtime = dir_mtime
+        return self._names[:]
+
+    def get_by_path(self, path):
+        path = os.path.abspath(os.path.expanduser(path))
+        mtime = os.stat(path).st_mtime
+        template = self._templates.get(path)
+        if template and template.mtime == mtime:
+            return template
+        colors = parse_xcolors(path)
+        template = TerminalTemplate(
+            name=os.path.basename(path),
+            path=path,
+            mtime=mtime,
+            colors=colors,
+            rgb={
+                key: _rgb_from_hex(value)
+                for key, value in colors.items()
+                if len(value) == 6
+            },
+        )
+        self._templates[path] = template
+        return template
+
+    def get(self, name):
+        return self.get_by_path(os.path.join(self.template_dir, name))
+
+    def get_all(self, names=None):
+        return [self.get(name) for name in (self.get_names() if names is None else names)]
+
+
+class TerminalTemplateOptions(Sequence):
+    """
+    Theme model `options` with the names of the terminal templates. They are
+    listed only when the options are used, not when the theme model is
+    defined, and follow the changes of the template directory.
+    """
+
+    registry = None
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def _get_options(self):
+        return [{'value': template_name} for template_name in self.registry.get_names()]
+
+    def __getitem__(self, index):
+        return self._get_options()[index]
+
+    def __iter__(self):
+        return iter(self._get_options())
+
+    def __len__(self):
+        return len(self.registry.get_names())
+
+
+TERMINAL_TEMPLATES = TerminalTemplateRegistry(TERMINAL_TEMPLATE_DIR)
@@ -1,10 +1,20 @@
 import os
+import sys
 import shutil
 from collections import defaultdict, namedtuple
-from itertools import groupby
+from heapq import merge
+from itertools import islice
 
-from .config import COLORS_DIR, USER_COLORS_DIR
-from .helpers import ls_r, mkdir_p
+from .config import USER_COLORS_DIR
+from .helpers import mkdir_p
+from .preset_index import PRESET_INDEX, list_dir
+
+
+if sys.version_info.minor >= 5:
+    from typing import TYPE_CHECKING  # pylint: disable=wrong-import-order
+    if TYPE_CHECKING:
+        # pylint: disable=ungrouped-imports
+        from typing import List, Dict  # noqa
 
 
 PresetFile = namedtuple('PresetFile', ['name', 'path', 'default', 'is_saveable', ])
@@ -32,49 +42,93 @@ def get_theme_name_and_plugin(theme_path, colors_dir, plugin):
     return display_name, plugin
 
 
-def get_preset_groups_sorter(colors_dir):
-    return lambda x: ''.join(x.path.rsplit(colors_dir)).split('/')[0]
+PresetGroup = namedtuple('PresetGroup', ['name', 'path', 'colors_dir', 'is_default', 'plugin', ])
+
+
+def get_preset_sort_key(preset):
+    return preset.name.lower(), preset.name
+
+
+def _get_preset_file(group, path):
+    display_name, preset_plugin = get_theme_name_and_plugin(
+        path, group.colors_dir, group.plugin
+    )
+    return PresetFile(
+        name=display_name,
+        path=os.path.abspath(path),
+        default=group.is_default or bool(preset_plugin),
+        is_saveable=not group.is_default and not preset_plugin,
+    )
 
 
-def group_presets_by_dir(preset_list, preset_dir):
+def get_preset_groups(colors_dir, is_default, plugin=None, subdir=''):
+    """
+    Each file and each directory on the top level of `colors_dir` (or of
+    its `subdir`) is a group of presets. Only that level is listed, the
+    presets inside of the groups are not looked up.
+    """
+    try:
+        file_names, dir_names = list_dir(os.path.join(colors_dir, subdir))
+    except OSError:
+        return []
     return [
-        (dir_name, list(group))
-        for dir_name, group in groupby(
-            preset_list,
-            get_preset_groups_sorter(preset_dir)
+        PresetGroup(
+            name=os.path.join(subdir, name),
+            path=os.path.join(colors_dir, subdir, name),
+            colors_dir=colors_dir,
+            is_default=is_default,
+            plugin=plugin,
         )
+        for name in sorted(file_names + dir_names)
     ]
 
 
-def get_presets():
-    # pylint:disable=bad-option-value,import-outside-toplevel
-    from .plugin_loader import IMPORT_PLUGINS
-
-    all_results = {}
-    for colors_dir, is_default, plugin in [
-            (COLORS_DIR, True, None),
-            (USER_COLORS_DIR, False, None),
-    ] + [
-        (import_plugin.plugin_theme_dir, True, import_plugin)
-        for import_plugin in IMPORT_PLUGINS.values()
-        if import_plugin.plugin_theme_dir
-    ]:
-        file_paths = []
-        for path in ls_r(colors_dir):
-            display_name, preset_plugin = get_theme_name_and_plugin(
-                path, colors_dir, plugin
-            )
-            file_paths.append(PresetFile(
-                name=display_name,
-                path=os.path.abspath(path),
-                default=is_default or bool(preset_plugin),
-                is_saveable=not is_default and not preset_plugin,
-            ))
-        result = defaultdict(list)
-        for dir_name, group in group_presets_by_dir(file_paths, colors_dir):
-            result[dir_name] = sorted(list(group), key=lambda x: x.name)
-        all_results[colors_dir] = dict(result)
-    return all_results
+def _iter_dir_presets(group, dir_path):
+    try:
+        file_names, dir_names = list_dir(dir_path)
+    except OSError:
+        return
+    # presets are ordered by their whole names, so the subdirectories which
+    # names are the same case-insensitively are merged together:
+    entries = defaultdict(list)
+    for file_name in file_names:
+        preset = _get_preset_file(group, os.path.join(dir_path, file_name))
+        entries[preset.name.split('/')[-1].lower()].append([preset])
+    for dir_name in dir_names:
+        entries[dir_name.lower() + '/'].append(
+            _iter_dir_presets(group, os.path.join(dir_path, dir_name))
+        )
+    for entry_key in sorted(entries):
+        yield from merge(*entries[entry_key], key=get_preset_sort_key)
+
+
+def get_group_first_presets(group, count):
+    """
+    Returns up to `count` presets of the group which go first in sorted
+    order, listing only the directories on the way to them.
+    """
+    if not os.path.isdir(group.path):
+        return [_get_preset_file(group, group.path)]
+    return list(islice(_iter_dir_presets(group, group.path), count))
+
+
+# presets of each group, computed from the last scan of it:
+_PRESETS_CACHE = {}  # type: Dict[str, List[PresetFile]]
+
+
+def get_group_presets(group):
+    """
+    Returns all the presets of the group, sorted.
+    """
+    if not os.path.isdir(group.path):
+        return [_get_preset_file(group, group.path)]
+    paths, changed = PRESET_INDEX.scan(group.path)
+    if changed or group.path not in _PRESETS_CACHE:
+        _PRESETS_CACHE[group.path] = sorted(
+            [_get_preset_file(group, path) for path in paths],
+            key=get_preset_sort_key
+        )
+    return list(_PRESETS_CACHE[group.path])
 
 
 def get_user_theme_path(user_theme_name):
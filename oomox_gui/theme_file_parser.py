@@ -1,7 +1,10 @@
 import os
+import re
+from collections import ChainMap, defaultdict
+from heapq import heapify, heappop, heappush
 
 from .i18n import _
-from .theme_model import THEME_MODEL
+from .theme_model import THEME_MODEL, THEME_MODEL_INDEX
 from .plugin_loader import IMPORT_PLUGINS
 
 
@@ -16,6 +19,9 @@ class NoPluginsInstalled(Exception):
         )
 
 
+HEX_COLOR_REGEX = re.compile('^[0-9a-fA-F]{6}$')
+
+
 def str_to_bool(value):
     return value.lower() == 'true'
 
@@ -55,33 +61,183 @@ def parse_theme_value(theme_value, colorscheme):  # pylint: disable=too-many-bra
     return result_value
 
 
-def _set_fallback_values(preset_path, colorscheme, from_plugin):
-    if not colorscheme:
-        theme_keys = [
-            item['key']
-            for section in THEME_MODEL.values()
-            for item in section
-            if 'key' in item
+class FallbackCycleError(Exception):
+
+    def __init__(self, keys):
+        self.keys = keys
+        super().__init__(
+            _("Theme options fallbacks are cyclic: {keys}").format(
+                keys=' -> '.join(keys)
+            )
+        )
+
+
+class FallbackResolver():
+    """
+    Theme model compiled into the graph of fallback dependencies: item
+    depends on its `fallback_key` or on the keys listed in its
+    `fallback_function_keys` (or on all the previous items if the inputs of
+    `fallback_function` are not declared).
+
+    Items are resolved in topological order (in model order otherwise),
+    after editing the keys only the items depending on them are resolved
+    again.
+    """
+
+    _items = None
+    _dependencies = None
+    _dependents = None
+    _order = None
+    _positions = None
+
+    def __init__(self, theme_model):
+        self._items = {}
+        model_order = []
+        for section in theme_model.values():
+            for theme_model_item in section:
+                key = theme_model_item.get('key')
+                if not key or key in self._items:
+                    continue
+                self._items[key] = theme_model_item
+                model_order.append(key)
+
+        self._dependencies = {}
+        self._dependents = defaultdict(list)
+        for index, key in enumerate(model_order):
+            self._dependencies[key] = [
+                dependency
+                for dependency in self._get_item_dependencies(
+                    self._items[key], model_order[:index]
+                )
+                if dependency in self._items and dependency != key
+            ]
+            for dependency in self._dependencies[key]:
+                self._dependents[dependency].append(key)
+
+        self._order = self._sort_topologically(model_order)
+        self._positions = {key: index for index, key in enumerate(self._order)}
+
+    @staticmethod
+    def _get_item_dependencies(theme_model_item, previous_keys):
+        # the same precedence as in `parse_theme_value`:
+        if theme_model_item.get('fallback_value') is not None:
+            return []
+        if theme_model_item.get('fallback_key'):
+            return [theme_model_item['fallback_key']]
+        if theme_model_item.get('fallback_function'):
+            return theme_model_item.get('fallback_function_keys', previous_keys)
+        return []
+
+    def _sort_topologically(self, model_order):
+        model_positions = {key: index for index, key in enumerate(model_order)}
+        num_of_dependencies = {
+            key: len(dependencies) for key, dependencies in self._dependencies.items()
+        }
+        ready = [
+            model_positions[key] for key in model_order if not num_of_dependencies[key]
         ]
+        heapify(ready)
+        sorted_keys = []
+        while ready:
+            key = model_order[heappop(ready)]
+            sorted_keys.append(key)
+            for dependent in self._dependents[key]:
+                num_of_dependencies[dependent] -= 1
+                if not num_of_dependencies[dependent]:
+                    heappush(ready, model_positions[dependent])
+        if len(sorted_keys) < len(model_order):
+            raise FallbackCycleError(self._find_cycle(
+                [key for key in model_order if num_of_dependencies[key]]
+            ))
+        return sorted_keys
+
+    def _find_cycle(self, unresolved_keys):
+        # each of unresolved keys depends on at least one another unresolved key
+        path = []
+        path_positions = {}
+        key = unresolved_keys[0]
+        while key not in path_positions:
+            path_positions[key] = len(path)
+            path.append(key)
+            key = [
+                dependency for dependency in self._dependencies[key]
+                if dependency in unresolved_keys
+            ][0]
+        return path[path_positions[key]:] + [key]
+
+    def _is_complete_value(self, key, value):
+        if key in self._items and self._items[key]['type'] == 'color':
+            return isinstance(value, str) and bool(HEX_COLOR_REGEX.match(value))
+        return True
+
+    def _resolve_item(self, key, colorscheme):
+        try:
+            return parse_theme_value(self._items[key], colorscheme)
+        except NoPluginsInstalled as exc:
+            return exc
+
+    def resolve(self, colorscheme):
+        for key in self._order:
+            colorscheme[key] = self._resolve_item(key, colorscheme)
+
+    def resolve_changed(self, colorscheme, old_values):
+        """
+        Re-resolve the items depending on the edited keys, `old_values` are
+        the values of those keys before the edit. Dependent values which
+        differ from what their fallbacks gave before the edit were set
+        explicitly, so they're not changed.
+
+        Returns the list of the updated keys. Colors which are not complete
+        yet (while being typed) don't update their dependents, and items
+        which fallbacks fail with the new values are left as they are.
+        """
+        old_colorscheme = {}
+        old_colorscheme.update(colorscheme)
+        old_colorscheme.update(old_values)
+        affected_keys = set()
+        pending_keys = [
+            key for key in old_values
+            if self._is_complete_value(key, colorscheme.get(key))
+        ]
+        while pending_keys:
+            for dependent in self._dependents.get(pending_keys.pop(), []):
+                if dependent not in affected_keys:
+                    affected_keys.add(dependent)
+                    pending_keys.append(dependent)
+
+        updated_keys = []
+        for key in sorted(affected_keys, key=self._positions.get):
+            # resolve only the fallback part, ignoring the current value:
+            if colorscheme.get(key) != self._resolve_item(
+                    key, ChainMap({key: None}, old_colorscheme)
+            ):
+                continue
+            try:
+                new_value = self._resolve_item(key, ChainMap({key: None}, colorscheme))
+            except Exception:  # pylint: disable=broad-except
+                # edited value could be not complete yet (like partially
+                # typed color), keep the dependent one until it is:
+                continue
+            if new_value != colorscheme.get(key):
+                colorscheme[key] = new_value
+                updated_keys.append(key)
+        return updated_keys
+
+
+FALLBACK_RESOLVER = FallbackResolver(THEME_MODEL)
+PRESET_KEYS = THEME_MODEL_INDEX.keys | {'NOGUI'}
 
-        theme_keys.append('NOGUI')
 
+def _set_fallback_values(preset_path, colorscheme, from_plugin):
+    if not colorscheme:
         with open(preset_path) as file_object:
             for line in file_object.readlines():
                 key, _sep, value = line.strip().partition('=')
-                if key.startswith("#") or key not in theme_keys:
+                if key.startswith("#") or key not in PRESET_KEYS:
                     continue
                 colorscheme[key] = value
 
-    for section in THEME_MODEL.values():  # @TODO: store theme in memory also in two levels?
-        for theme_model_item in section:
-            key = theme_model_item.get('key')
-            if not key:
-                continue
-            try:
-                colorscheme[key] = parse_theme_value(theme_model_item, colorscheme)
-            except NoPluginsInstalled as exc:
-                colorscheme[key] = exc
+    FALLBACK_RESOLVER.resolve(colorscheme)
     if from_plugin:
         colorscheme['FROM_PLUGIN'] = from_plugin
 
@@ -1,7 +1,6 @@
 import sys
-import os
 
-from .config import TERMINAL_TEMPLATE_DIR
+from .terminal_templates import TERMINAL_TEMPLATES, TerminalTemplateOptions
 from .plugin_loader import (
     THEME_PLUGINS, ICONS_PLUGINS, EXPORT_PLUGINS, IMPORT_PLUGINS,
 )
@@ -12,7 +11,7 @@ if sys.version_info.minor >= 5:
     from typing import TYPE_CHECKING  # pylint: disable=wrong-import-order
     if TYPE_CHECKING:
         # pylint: disable=ungrouped-imports
-        from typing import List, Dict, Any  # noqa
+        from typing import List, Dict, Any, FrozenSet  # noqa
 
         ThemeModelValue = Dict[str, Any]
 
@@ -313,10 +312,7 @@ THEME_MODEL['terminal'] = [
     {
         'key': 'TERMINAL_BASE_TEMPLATE',
         'type': 'options',
-        'options': [
-            {'value': template_name}
-            for template_name in sorted(os.listdir(TERMINAL_TEMPLATE_DIR))
-        ],
+        'options': TerminalTemplateOptions(TERMINAL_TEMPLATES),
         'fallback_value': 'monovedek',
         'display_name': _('Theme Style'),
         'value_filter': {
@@ -529,19 +525,53 @@ THEME_MODEL['export'] = merge_model_with_plugins(
 )
 
 
+class ThemeModelIndex():
+    """
+    Lookup tables for the theme model, built once after it was merged with
+    the plugins, so the options don't need to be searched through all the
+    sections every time.
+
+    Options are the same dicts as in the theme model (not copies), and lists
+    of them and of the keys are in the theme model order.
+    """
+
+    options_by_key = None  # type: Dict[str, List[ThemeModelValue]]
+    keys = None  # type: FrozenSet[str]
+    color_keys = None  # type: List[str]
+    color_keys_by_section = None  # type: Dict[str, List[str]]
+
+    def __init__(self, theme_model):
+        self.options_by_key = {}
+        self.color_keys = []
+        self.color_keys_by_section = {}
+        for section_id, section in theme_model.items():
+            section_color_keys = self.color_keys_by_section[section_id] = []
+            for theme_option in section:
+                key = theme_option.get('key')
+                if not key:
+                    continue
+                self.options_by_key.setdefault(key, []).append(theme_option)
+                if theme_option.get('type') == 'color' and key not in section_color_keys:
+                    section_color_keys.append(key)
+                    if key not in self.color_keys:
+                        self.color_keys.append(key)
+        self.keys = frozenset(self.options_by_key)
+
+
+THEME_MODEL_INDEX = ThemeModelIndex(THEME_MODEL)
+
+
 def get_theme_options_by_key(key, fallback=None):
-    result = []
-    for _section_id, section in THEME_MODEL.items():
-        for theme_option in section:
-            if key == theme_option.get('key'):
-                result.append(theme_option)
-    if not result and fallback:
+    result = THEME_MODEL_INDEX.options_by_key.get(key)
+    if result:
+        return result[:]
+    if fallback:
         return [fallback]
-    return result
+    return []
 
 
 def get_first_theme_option(key, fallback=None):
-    result = get_theme_options_by_key(key, fallback=fallback)
+    result = THEME_MODEL_INDEX.options_by_key.get(key)
     if result:
         return result[0]
-    return {}
+    return fallback or {}
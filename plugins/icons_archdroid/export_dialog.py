@@ -0,0 +1,24 @@
+import os
+
+from oomox_gui.export_common import FileBasedExportDialog
+
+
+PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
+ARCHDROID_THEME_DIR = os.path.join(PLUGIN_DIR, "archdroid-icon-theme/")
+
+
+class ArchdroidIconsExportDialog(FileBasedExportDialog):
+    timeout = 100
+
+    def do_export(self):
+        self.command = [
+            "bash",
+            os.path.join(ARCHDROID_THEME_DIR, "change_color.sh"),
+            "-o", self.theme_name,
+            self.temp_theme_path,
+        ]
+        super().do_export()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.do_export()
@@ -0,0 +1,24 @@
+import os
+
+from oomox_gui.export_common import FileBasedExportDialog
+
+
+PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
+GNOME_COLORS_ICON_THEME_DIR = os.path.join(PLUGIN_DIR, "gnome-colors-icon-theme/")
+
+
+class GnomeColorsIconsExportDialog(FileBasedExportDialog):
+    timeout = 600
+
+    def do_export(self):
+        self.command = [
+            "bash",
+            os.path.join(GNOME_COLORS_ICON_THEME_DIR, "change_color.sh"),
+            "-o", self.theme_name,
+            self.temp_theme_path,
+        ]
+        super().do_export()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.do_export()
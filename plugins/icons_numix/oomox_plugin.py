@@ -1,31 +1,13 @@
 import os
 
 from oomox_gui.config import FALLBACK_COLOR
-from oomox_gui.export_common import FileBasedExportDialog
-from oomox_gui.plugin_api import OomoxIconsPlugin
+from oomox_gui.plugin_api import OomoxIconsPlugin, LazyExportDialog
 from oomox_gui.i18n import _
 
 
 PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
-class NumixIconsExportDialog(FileBasedExportDialog):
-    timeout = 100
-
-    def do_export(self):
-        self.command = [
-            "bash",
-            os.path.join(PLUGIN_DIR, "change_color.sh"),
-            "-o", self.theme_name,
-            self.temp_theme_path,
-        ]
-        super().do_export()
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.do_export()
-
-
 class Plugin(OomoxIconsPlugin):
 
     # if not os.path.exists('/usr/share/icons/Numix/'):
@@ -33,7 +15,9 @@ class Plugin(OomoxIconsPlugin):
 
     name = 'numix_icons'
     display_name = 'Numix'
-    export_dialog = NumixIconsExportDialog
+    export_dialog = LazyExportDialog(
+        os.path.join(PLUGIN_DIR, 'export_dialog.py'), 'NumixIconsExportDialog'
+    )
     preview_svg_dir = os.path.join(PLUGIN_DIR, "icon_previews/0/")
 
     theme_model_icons = [
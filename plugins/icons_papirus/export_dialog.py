@@ -0,0 +1,23 @@
+import os
+
+from oomox_gui.export_common import FileBasedExportDialog
+
+
+PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+class PapirusIconsExportDialog(FileBasedExportDialog):
+    timeout = 100
+
+    def do_export(self):
+        self.command = [
+            "bash",
+            os.path.join(PLUGIN_DIR, "change_color.sh"),
+            "-o", self.theme_name,
+            self.temp_theme_path,
+        ]
+        super().do_export()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.do_export()
@@ -1,8 +1,7 @@
 import os
 
 from oomox_gui.config import FALLBACK_COLOR
-from oomox_gui.export_common import FileBasedExportDialog
-from oomox_gui.plugin_api import OomoxIconsPlugin
+from oomox_gui.plugin_api import OomoxIconsPlugin, LazyExportDialog
 from oomox_gui.i18n import _
 from oomox_gui.color import mix_theme_colors
 
@@ -10,27 +9,12 @@ from oomox_gui.color import mix_theme_colors
 PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
-class PapirusIconsExportDialog(FileBasedExportDialog):
-    timeout = 100
-
-    def do_export(self):
-        self.command = [
-            "bash",
-            os.path.join(PLUGIN_DIR, "change_color.sh"),
-            "-o", self.theme_name,
-            self.temp_theme_path,
-        ]
-        super().do_export()
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.do_export()
-
-
 class Plugin(OomoxIconsPlugin):
     name = 'papirus_icons'
     display_name = 'Papirus'
-    export_dialog = PapirusIconsExportDialog
+    export_dialog = LazyExportDialog(
+        os.path.join(PLUGIN_DIR, 'export_dialog.py'), 'PapirusIconsExportDialog'
+    )
     preview_svg_dir = os.path.join(PLUGIN_DIR, "icon_previews/")
 
     theme_model_icons = [
@@ -59,6 +43,7 @@ class Plugin(OomoxIconsPlugin):
                 colors['MENU_FG'], colors['BTN_FG'],
                 0.66
             ),
+            'fallback_function_keys': ['MENU_FG', 'BTN_FG'],
             'display_name': _('Actions Icons'),
         },
         {
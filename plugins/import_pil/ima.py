@@ -1,4 +1,9 @@
-from PIL import Image
+from PIL import Image, ImageMode
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 SMOKE, WEED, EVERYDAY = 0, 1, 2
@@ -8,6 +13,30 @@ RAICHU = 200
 RAIKOU = 1000
 DEOXYS = 10000
 
+IMA_ENGINE_PYTHON = 'python'
+IMA_ENGINE_NUMPY = 'numpy'
+
+# numpy engine checks that many steps of `swablu` pass at once,
+# doubling it while no colors are merged:
+NUMPY_MIN_STEPS = 256
+_STEPS = numpy.arange(DEOXYS + WEED) if numpy else None
+_ALL_CHANNELS_CLOSE = 0x01010101
+
+# don't decode images which would take more memory than that:
+MAX_DECODED_IMAGE_MEMORY = 512 * 1024 * 1024
+# modes which could be shrinked with `Image.reduce` before converting to RGB
+# (the others are converted to RGB at full size first):
+REDUCIBLE_IMAGE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'RGBX', 'CMYK')
+
+
+# channels are rounded to that many bits in the histogram mode,
+# so there are no more than 32768 different colors:
+HISTOGRAM_BITS = 5
+
+
+class ImageTooBigError(Exception):
+    pass
+
 
 def swablu(salamence, golduck, lileep=WEED + EVERYDAY):
     # pylint: disable=too-many-branches
@@ -115,6 +144,160 @@ def mewtwo(caterpie,
     return wobbuffet(salamence, xatu=SMOKE)
 
 
+def _get_close_steps(colors, lileep, length, beautifly, kangaskhan, num_steps):
+    """
+    Returns which of the next `num_steps` steps of the `swablu` pass
+    compare the colors close enough to be merged (if nothing is merged
+    before them).
+    """
+    jynx_colors = colors[beautifly - num_steps:beautifly][::-1]
+    hitmonlee_indices = (beautifly - kangaskhan) - _STEPS[:num_steps] * EVERYDAY
+    # negative indices are wrapped like python list ones:
+    differences = colors[:length].take(hitmonlee_indices, axis=0, mode='wrap')
+    differences -= jynx_colors
+    numpy.abs(differences, out=differences)
+    # each color is padded to 4 channels, so closeness of all the channels
+    # could be checked at once by reading them as a single 32-bit number:
+    return (
+        (differences <= lileep).view(numpy.uint32)[:, SMOKE] == _ALL_CHANNELS_CLOSE
+    )
+
+
+def _swablu_numpy(counts, colors, lileep, length):  # pylint: disable=too-many-locals
+    """
+    Single pass of `swablu` (the rest of its loops never run more than once)
+    over the first `length` items of `counts` and `colors` arrays, which are
+    modified in place. Returns the new length.
+
+    Between the merges the pass compares items at fixed indices, so the
+    steps are checked in chunks. Merging removes either the later item
+    (then the items the rest of the chunk compares don't move, unless the
+    indices wrap around) or the earlier one (then the rest of the chunk
+    is checked again).
+    """
+    if length <= EVERYDAY:
+        return length
+    beautifly = length
+    kangaskhan = EVERYDAY
+    num_steps_to_check = NUMPY_MIN_STEPS
+    while beautifly > WEED:
+        chunk_beautifly = beautifly
+        chunk_kangaskhan = kangaskhan
+        num_steps = min(
+            chunk_beautifly - WEED, length - chunk_kangaskhan + WEED, num_steps_to_check
+        )
+        wraps = chunk_beautifly - chunk_kangaskhan - (num_steps - WEED) * EVERYDAY < SMOKE
+        are_close = _get_close_steps(
+            colors, lileep, length, chunk_beautifly, chunk_kangaskhan, num_steps
+        )
+        moved = False
+        for step in numpy.flatnonzero(are_close).tolist():
+            if chunk_kangaskhan + step > length:
+                # the pass had been already finished before that step
+                return length
+            jynx = chunk_beautifly - WEED - step
+            hitmonlee = (chunk_beautifly - chunk_kangaskhan - step * EVERYDAY) % length
+            if counts[jynx] > counts[hitmonlee]:
+                counts[jynx] += counts[hitmonlee]
+                deleted = hitmonlee
+            else:
+                counts[hitmonlee] += counts[jynx]
+                deleted = jynx
+            counts[deleted:length - WEED] = counts[deleted + WEED:length]
+            colors[deleted:length - WEED] = colors[deleted + WEED:length]
+            length -= WEED
+            beautifly = chunk_beautifly - step - WEED
+            kangaskhan = chunk_kangaskhan + step + WEED
+            if kangaskhan > length:
+                return length
+            if deleted != jynx or wraps:
+                moved = True
+                break
+        if moved:
+            num_steps_to_check = NUMPY_MIN_STEPS
+            continue
+        beautifly = chunk_beautifly - num_steps
+        kangaskhan = chunk_kangaskhan + num_steps
+        if kangaskhan > length:
+            break
+        num_steps_to_check *= EVERYDAY
+    return length
+
+
+def mewtwo_numpy(caterpie,
+                 golduck=16,
+                 lileep=WEED + WEED + EVERYDAY,
+                 machoke=WEED,
+                 pelipper=SMOKE):
+    # pylint: disable=too-many-locals
+    """
+    Same as `mewtwo`, but with the colors kept in numpy arrays. Passes which
+    are known to not merge anything (repeated with the same `lileep` after
+    the one which didn't merge) are skipped.
+    """
+    if DEOXYS:
+        salamence = list(reversed(caterpie))[:DEOXYS]
+    else:
+        salamence = list(reversed(caterpie))
+    length = len(salamence)
+    counts = numpy.array([venonat[SMOKE] for venonat in salamence], dtype=numpy.int64)
+    num_channels = len(salamence[SMOKE][WEED]) if salamence else 3
+    colors = numpy.zeros((length, 4), dtype=numpy.int16)
+    colors[:, :num_channels] = numpy.array(
+        [venonat[WEED] for venonat in salamence], dtype=numpy.int16
+    ).reshape(length, num_channels)
+
+    def _sort(order):
+        counts[:length] = counts[:length][order]
+        colors[:length] = colors[:length][order]
+
+    metagross = SMOKE
+    nidorina = SMOKE
+    persian = lileep
+    dunsparce = None
+    if pelipper:
+        for pikachu in [SMOKE, WEED, EVERYDAY]:
+            _sort(numpy.argsort(colors[:length, pikachu], kind='stable'))
+            for _meowth in range(SMOKE, machoke):
+                length = _swablu_numpy(counts, colors, lileep, length)
+    while (length > golduck) and (persian < RAICHU):
+
+        _sort(numpy.argsort(-counts[:length], kind='stable'))
+        previous_length = length
+        length = _swablu_numpy(counts, colors, persian, length)
+
+        if previous_length == length:
+            # the next passes with the same `persian` won't merge anything either:
+            nidorina = WEED + WEED + EVERYDAY
+        if dunsparce == length:
+            nidorina = nidorina + WEED
+        if nidorina > WEED + WEED + EVERYDAY:  # after what tries increase lileep
+            nidorina = SMOKE
+            metagross += WEED
+            persian += WEED
+        if metagross > RAIKOU:  # after what lileep-increases raise an error
+            break
+        dunsparce = length
+
+    order = numpy.argsort(counts[:length], kind='stable')
+    return [
+        (int(count), tuple(int(channel) for channel in color))
+        for count, color in zip(
+            counts[:length][order], colors[:length, :num_channels][order]
+        )
+    ]
+
+
+IMA_PALETTE_REDUCERS = {
+    IMA_ENGINE_PYTHON: mewtwo,
+    IMA_ENGINE_NUMPY: mewtwo_numpy,
+}
+
+
+def get_default_ima_engine():
+    return IMA_ENGINE_NUMPY if numpy else IMA_ENGINE_PYTHON
+
+
 def wobbuffet(natu, xatu=WEED):
     return sorted(natu, key=lambda venonat: venonat[SMOKE], reverse=xatu)
 
@@ -127,23 +310,112 @@ def jumpluff(caterpie):
     return ''.join([delibird(meowth) for meowth in caterpie])
 
 
-def jolteon(smeargle, bulbasaur):
+def get_bytes_per_pixel(mode):
+    """
+    Memory taken by a decoded pixel of the image mode: Pillow keeps the
+    pixels of the multi-band modes padded to 4 bands.
+    """
+    mode_info = ImageMode.getmode(mode)
+    # older Pillow doesn't tell the band size, so assume the biggest one:
+    band_size = int(getattr(mode_info, 'typestr', '4')[-1])
+    return band_size * (4 if len(mode_info.bands) > 1 else 1)
+
+
+def reduce_image(image, size, max_memory=MAX_DECODED_IMAGE_MEMORY):
+    """
+    Decodes the image at the smallest resolution which is still not less
+    than `size`. Only the JPEG decoder scales the image down by itself
+    (draft mode), so only JPEG images take less memory while being decoded.
+    Other formats are decoded at full size and then shrinked by an integer
+    factor (before the colorspace conversion, when the mode allows it),
+    which saves the memory and time only of the following conversion and
+    resizing.
+
+    Raises `ImageTooBigError` instead of decoding images which could take
+    more than `max_memory` bytes.
+    """
+    image.draft('RGB', size)
+    num_of_pixels = image.size[SMOKE] * image.size[WEED]
+    decoded_memory = num_of_pixels * get_bytes_per_pixel(image.mode)
+    if image.mode not in REDUCIBLE_IMAGE_MODES:
+        # full-size RGB copy is needed as well:
+        decoded_memory += num_of_pixels * get_bytes_per_pixel('RGB')
+    if decoded_memory > max_memory:
+        raise ImageTooBigError(
+            "Decoding {}x{} image would take {}MiB of memory (limit is {}MiB)".format(
+                image.size[SMOKE], image.size[WEED],
+                decoded_memory // 1024 // 1024, max_memory // 1024 // 1024,
+            )
+        )
+    if image.mode not in REDUCIBLE_IMAGE_MODES:
+        image = image.convert('RGB')
+    factor = min(
+        image.size[SMOKE] // max(size[SMOKE], WEED), image.size[WEED] // max(size[WEED], WEED)
+    )
+    if factor > WEED:
+        image = image.reduce(factor)
+    return image
+
+
+def get_histogram_colors(image, bits=HISTOGRAM_BITS):
+    """
+    Like `Image.getcolors`, but the channels are rounded to `bits` bits
+    (each color is the center of its bin), so the number of colors is
+    limited by the histogram size and not by the number of pixels.
+    Least frequent colors go first.
+    """
+    shift = 8 - bits
+    bin_center = (WEED << shift) >> WEED
+    if not numpy:
+        binned_image = image.point(lambda value: (value >> shift << shift) | bin_center)
+        return sorted(
+            binned_image.getcolors(maxcolors=WEED << (bits * 3)),
+            key=lambda venonat: (venonat[SMOKE], venonat[WEED])
+        )
+    pixels = numpy.asarray(image, dtype=numpy.uint8).reshape(-1, 3) >> shift
+    bins = (
+        (pixels[:, SMOKE].astype(numpy.intp) << (bits * EVERYDAY))
+        | (pixels[:, WEED].astype(numpy.intp) << bits)
+        | pixels[:, EVERYDAY]
+    )
+    counts = numpy.bincount(bins, minlength=WEED << (bits * 3))
+    used_bins = numpy.flatnonzero(counts)
+    used_bins = used_bins[numpy.lexsort((used_bins, counts[used_bins]))]
+    mask = (WEED << bits) - WEED
+    return [
+        (int(count), (
+            ((int(used_bin) >> (bits * EVERYDAY)) << shift) | bin_center,
+            (((int(used_bin) >> bits) & mask) << shift) | bin_center,
+            ((int(used_bin) & mask) << shift) | bin_center,
+        ))
+        for count, used_bin in zip(counts[used_bins].tolist(), used_bins.tolist())
+    ]
+
+
+def jolteon(smeargle, bulbasaur, reduced_decode=True, histogram_bits=None):
     venonat = min(bulbasaur, smeargle.size[SMOKE])
     hitmontop = int(
         round(smeargle.size[WEED] / (smeargle.size[SMOKE] / venonat)))
     print((venonat, hitmontop))
+    if reduced_decode:
+        smeargle = reduce_image(smeargle, (venonat, hitmontop))
     smeargle = smeargle.convert('RGB')
     skarmory = smeargle.resize((venonat, hitmontop), )
+    if histogram_bits:
+        return get_histogram_colors(skarmory, histogram_bits)
     parasect = skarmory.getcolors(
         maxcolors=skarmory.size[SMOKE] * skarmory.size[WEED])
     return parasect
 
 
-def get_hex_palette(image_path, use_whole_palette=False, accuracy=48, quality=400):
+def get_hex_palette(
+        image_path, use_whole_palette=False, accuracy=48, quality=400, engine=None,
+        histogram_bits=None,
+):  # pylint: disable=too-many-arguments
     smeargle = Image.open(image_path)
-    whirlipede = jolteon(smeargle, quality)
+    whirlipede = jolteon(smeargle, quality, histogram_bits=histogram_bits)
     if not use_whole_palette:
-        whirlipede = wobbuffet(mewtwo(
+        whirlipede = wobbuffet(IMA_PALETTE_REDUCERS[engine or get_default_ima_engine()](
             whirlipede,
             golduck=accuracy,
             lileep=WEED + WEED + EVERYDAY,
@@ -2,18 +2,17 @@
 # pylint:disable=bad-option-value,import-outside-toplevel
 import os
 import gc
+import hashlib
 from multiprocessing.pool import Pool
 from time import time
 
 from oomox_gui.plugin_api import OomoxImportPluginAsync
-from oomox_gui.config import TERMINAL_TEMPLATE_DIR
+from oomox_gui.disk_cache import DiskCache
 from oomox_gui.color import (
     hex_to_int, color_list_from_hex, color_hex_from_list, int_list_from_hex,
     find_closest_color, hex_darker, is_dark,
 )
-from oomox_gui.terminal import (
-    import_xcolors,
-)
+from oomox_gui.terminal_templates import TERMINAL_TEMPLATES, TerminalTemplateOptions
 from oomox_gui.helpers import (
     get_plugin_module, apply_chain, call_method_from_class, delayed_partial,
 )
@@ -27,9 +26,70 @@ LOW_QUALITY = 100
 MEDIUM_QUALITY = 200
 HIGH_QUALITY = 400
 # ULTRA_QUALITY = 1000
+# high quality, but with the colors counted in the fixed-size histogram:
+HISTOGRAM_QUALITY = 'histogram'
+
+# bump it each time when the palette extraction starts producing different results:
+IMAGE_PALETTE_ALGORITHM_VERSION = 3
+# how many extracted image palettes to keep on disk:
+IMAGE_PALETTE_CACHE_SIZE_ENV = 'OOMOX_IMAGE_PALETTE_CACHE_SIZE'
+IMAGE_PALETTE_CACHE_DEFAULT_SIZE = 500
+
+
+def _get_palette_cache_size():
+    cache_size = os.environ.get(IMAGE_PALETTE_CACHE_SIZE_ENV)
+    if not cache_size:
+        return IMAGE_PALETTE_CACHE_DEFAULT_SIZE
+    try:
+        cache_size = int(cache_size)
+    except ValueError:
+        cache_size = 0
+    if cache_size < 1:
+        print("{} should be a positive number, using the default size {}".format(
+            IMAGE_PALETTE_CACHE_SIZE_ENV, IMAGE_PALETTE_CACHE_DEFAULT_SIZE
+        ))
+        return IMAGE_PALETTE_CACHE_DEFAULT_SIZE
+    return cache_size
+
+
+_PALETTE_DISK_CACHE = DiskCache(
+    name='import_pil_palette', version=IMAGE_PALETTE_ALGORITHM_VERSION,
+    max_entries=_get_palette_cache_size(),
+)
 
 
 image_analyzer = get_plugin_module('ima', os.path.join(PLUGIN_DIR, 'ima.py'))  # pylint: disable=invalid-name
+image_quantizer = get_plugin_module(  # pylint: disable=invalid-name
+    'quantize', os.path.join(PLUGIN_DIR, 'quantize.py')
+)
+
+
+_FILE_HASHES = {}
+
+
+def get_file_id(file_path):
+    """
+    Cheap to get ID of the file which changes when the file gets edited.
+    """
+    file_stat = os.stat(file_path)
+    return '{}:{}:{}'.format(file_path, file_stat.st_size, file_stat.st_mtime_ns)
+
+
+def get_file_hash(file_path):
+    """
+    Hash of the file contents, re-calculated only when the file's
+    size or mtime changes.
+    """
+    file_id = get_file_id(file_path)
+    cached_id, file_hash = _FILE_HASHES.get(file_path, (None, None))
+    if cached_id != file_id:
+        hash_object = hashlib.sha256()
+        with open(file_path, 'rb') as file_object:
+            for chunk in iter(lambda: file_object.read(1024 * 1024), b''):
+                hash_object.update(chunk)
+        file_hash = hash_object.hexdigest()
+        _FILE_HASHES[file_path] = (file_id, file_hash)
+    return file_hash
 
 
 def sort_by_saturation(c):
@@ -205,6 +265,9 @@ class Plugin(OomoxImportPluginAsync):
             }, {
                 'value': HIGH_QUALITY,
                 'display_name': _('oomox: high quality'),
+            }, {
+                'value': HISTOGRAM_QUALITY,
+                'display_name': _('oomox: high quality, 5-bit histogram'),
             }],
             # }, {
             #     'value': ULTRA_QUALITY,
@@ -216,10 +279,7 @@ class Plugin(OomoxImportPluginAsync):
         {
             'key': '_PIL_PALETTE_STYLE',
             'type': 'options',
-            'options': [
-                {'value': template_name}
-                for template_name in sorted(os.listdir(TERMINAL_TEMPLATE_DIR))
-            ],
+            'options': TerminalTemplateOptions(TERMINAL_TEMPLATES),
             # 'fallback_value': 'monovedek_pale_gray',
             'fallback_value': 'basic',
             'display_name': _('Palette Style'),
@@ -267,6 +327,22 @@ class Plugin(OomoxImportPluginAsync):
         },
     ]
 
+    theme_model_import[1]['options'] += [{
+        'value': image_quantizer.QUANTIZE_METHOD_MEDIAN_CUT + '16',
+        'display_name': _('median cut: low quality'),
+    }, {
+        'value': image_quantizer.QUANTIZE_METHOD_MEDIAN_CUT + '48',
+        'display_name': _('median cut: high quality'),
+    }]
+    if image_quantizer.QUANTIZE_METHOD_KMEANS in image_quantizer.get_quantize_methods():
+        theme_model_import[1]['options'] += [{
+            'value': image_quantizer.QUANTIZE_METHOD_KMEANS + '16',
+            'display_name': _('k-means: low quality'),
+        }, {
+            'value': image_quantizer.QUANTIZE_METHOD_KMEANS + '48',
+            'display_name': _('k-means: high quality'),
+        }]
+
     try:
         import colorz  # pylint: disable=import-error
         theme_model_import[1]['options'] += [{
@@ -321,6 +397,7 @@ class Plugin(OomoxImportPluginAsync):
 
     _terminal_palette_cache = {}
     _palette_cache = {}
+    _extract_palette_task_id = None
 
     @classmethod
     def _get_haishoku_palette(cls, image_path):
@@ -428,7 +505,8 @@ class Plugin(OomoxImportPluginAsync):
 
     @staticmethod
     def _generate_palette_id(image_path, quality, use_whole_palette):
-        return image_path+str(quality)+str(use_whole_palette)
+        # the image edited in place gets the new palette:
+        return get_file_id(image_path)+str(quality)+str(use_whole_palette)
 
     @classmethod
     def _generate_terminal_palette(  # noqa  pylint: disable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements
@@ -443,20 +521,47 @@ class Plugin(OomoxImportPluginAsync):
                 hex_palette, template_path, inverse_palette, result_callback
             )
         else:
+            # palette of the previously selected image is not needed anymore:
+            if cls._extract_palette_task_id:
+                cls.cancel_task(cls._extract_palette_task_id)
+
             _app = cls.get_app()
+
+            def _palette_extracted_callback(hex_palette):
+                _app.enable()
+                cls._extract_palette_task_id = None
+                cls._palette_cache[_id] = hex_palette
+                cls._generate_terminal_palette_callback(
+                    hex_palette, template_path, inverse_palette, result_callback
+                )
+
             _app.disable(_('Extracting palette from image…'))
-            _app.schedule_task(
-                cls._generate_terminal_palette_task,
-                template_path, image_path, quality, use_whole_palette, inverse_palette,
-                start_time, result_callback,
+            cls._extract_palette_task_id = cls.schedule_task(
+                cls._extract_palette_task,
+                image_path, quality, use_whole_palette, start_time,
+                callback=_palette_extracted_callback,
+                error_callback=lambda _exception: _app.enable(),
             )
-            _app.enable()
 
     @classmethod
-    def _generate_terminal_palette_task(  # noqa  pylint: disable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements
-            cls, template_path, image_path, quality, use_whole_palette, inverse_palette,
-            start_time, result_callback,
-    ):
+    def _extract_palette_task(cls, image_path, quality, use_whole_palette, start_time):
+        # hashing the whole image takes a while too, so it's done here
+        # and not before scheduling the task. Same image copied to
+        # a different path shares the palette on disk:
+        disk_cache_key = _PALETTE_DISK_CACHE.get_key(
+            get_file_hash(image_path)+str(quality)+str(use_whole_palette)
+        )
+        hex_palette = _PALETTE_DISK_CACHE.get(disk_cache_key)
+        if not hex_palette:
+            hex_palette = cls._extract_palette(image_path, quality, use_whole_palette)
+            print("{} quality, {} colors found, took {:.8f}s".format(
+                quality, len(hex_palette), (time() - start_time)
+            ))
+            _PALETTE_DISK_CACHE.set(disk_cache_key, hex_palette)
+        return hex_palette
+
+    @classmethod
+    def _extract_palette(cls, image_path, quality, use_whole_palette):
         if str(quality).startswith('colorz'):
             hex_palette = cls._get_colorz_lib_palette(
                 image_path, color_count=int(quality.split('colorz')[1])
@@ -467,6 +572,17 @@ class Plugin(OomoxImportPluginAsync):
             )
         elif quality == 'haishoku':
             hex_palette = cls._get_haishoku_palette(image_path)
+        elif quality == HISTOGRAM_QUALITY:
+            hex_palette = image_analyzer.get_hex_palette(
+                image_path, quality=HIGH_QUALITY, use_whole_palette=use_whole_palette,
+                histogram_bits=image_analyzer.HISTOGRAM_BITS,
+            )
+        elif str(quality).startswith(tuple(image_quantizer.QUANTIZERS)):
+            quantize_method = quality.rstrip('0123456789')
+            hex_palette = image_quantizer.get_hex_palette(
+                image_path, method=quantize_method,
+                color_count=int(quality[len(quantize_method):])
+            )
         elif str(quality).startswith('all_'):
             _quality = quality.split('_')[1]
             if _quality == 'low':
@@ -483,14 +599,7 @@ class Plugin(OomoxImportPluginAsync):
             hex_palette = image_analyzer.get_hex_palette(
                 image_path, quality=quality, use_whole_palette=use_whole_palette
             )[:]
-        print("{} quality, {} colors found, took {:.8f}s".format(
-            quality, len(hex_palette), (time() - start_time)
-        ))
-        _id = cls._generate_palette_id(image_path, quality, use_whole_palette)
-        cls._palette_cache[_id] = hex_palette
-        cls._generate_terminal_palette_callback(
-            hex_palette, template_path, inverse_palette, result_callback
-        )
+        return hex_palette
 
     @classmethod
     def _generate_terminal_palette_callback(  # noqa  pylint: disable=too-many-arguments,too-many-locals,too-many-branches,too-many-statements
@@ -504,7 +613,7 @@ class Plugin(OomoxImportPluginAsync):
         ACCURACY = 40  # pylint: disable=invalid-name
         hex_palette += [hex_darker(c, ACCURACY) for c in gray_colors]
         hex_palette += [hex_darker(c, -ACCURACY) for c in gray_colors]
-        reference_palette = import_xcolors(os.path.join(TERMINAL_TEMPLATE_DIR, template_path))
+        reference_palette = dict(TERMINAL_TEMPLATES.get(template_path).colors)
         result_palette = {}
         if inverse_palette:
             reference_palette['foreground'], reference_palette['background'] = \
@@ -549,7 +658,9 @@ class Plugin(OomoxImportPluginAsync):
         inverse_palette = bool(
             get_first_theme_option('_PIL_PALETTE_INVERSE', {}).get('fallback_value')
         )
-        _id = template_path+image_path+str(quality)+str(use_whole_palette)+str(inverse_palette)
+        _id = template_path+cls._generate_palette_id(
+            image_path, quality, use_whole_palette
+        )+str(inverse_palette)
 
         def _result_callback(generated_palette):
             cls._terminal_palette_cache[_id] = generated_palette
@@ -558,13 +669,9 @@ class Plugin(OomoxImportPluginAsync):
             result_callback(palette)
 
         if not cls._terminal_palette_cache.get(_id):
-            _app = cls.get_app()
-            _app.disable(_('Generating terminal palette…'))
-            _app.schedule_task(
-                cls._generate_terminal_palette,
+            cls._generate_terminal_palette(
                 template_path, image_path, quality, use_whole_palette, inverse_palette,
                 _result_callback
             )
-            _app.enable()
         else:
             _result_callback(cls._terminal_palette_cache[_id])
@@ -0,0 +1,119 @@
+from PIL import Image
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+QUANTIZE_METHOD_MEDIAN_CUT = 'mediancut'
+QUANTIZE_METHOD_KMEANS = 'kmeans'
+
+# images are downscaled to fit into that square before the quantization,
+# so its time doesn't depend on the image size:
+MAX_IMAGE_SIDE = 256
+
+KMEANS_BATCH_SIZE = 1024
+KMEANS_MAX_ITERATIONS = 100
+# stop earlier if no cluster center moved further than that:
+KMEANS_TOLERANCE = 0.5
+KMEANS_SEED = 0
+# pixels are assigned to the clusters in chunks of that size to limit the memory usage:
+KMEANS_CHUNK_SIZE = 8192
+
+# Pillow>=9.1 moved the quantization methods into an enum:
+MEDIAN_CUT = getattr(Image, 'Quantize', Image).MEDIANCUT
+
+
+def get_quantize_methods():
+    methods = [QUANTIZE_METHOD_MEDIAN_CUT]
+    if numpy:
+        methods.append(QUANTIZE_METHOD_KMEANS)
+    return methods
+
+
+def load_image(image_path, max_side=MAX_IMAGE_SIDE):
+    image = Image.open(image_path)
+    image.thumbnail((max_side, max_side))
+    return image.convert('RGB')
+
+
+def get_median_cut_palette(image, color_count):
+    """
+    Returns list of (pixel_count, (r, g, b)) tuples.
+    """
+    quantized_image = image.quantize(colors=color_count, method=MEDIAN_CUT)
+    palette = quantized_image.getpalette()
+    return [
+        (pixel_count, tuple(palette[color_index * 3:color_index * 3 + 3]))
+        for pixel_count, color_index in quantized_image.getcolors(maxcolors=256)
+    ]
+
+
+def _get_nearest_centers(pixels, centers):
+    nearest = numpy.empty(len(pixels), dtype=numpy.intp)
+    for chunk_start in range(0, len(pixels), KMEANS_CHUNK_SIZE):
+        chunk = pixels[chunk_start:chunk_start + KMEANS_CHUNK_SIZE]
+        distances = ((chunk[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        nearest[chunk_start:chunk_start + len(chunk)] = distances.argmin(axis=1)
+    return nearest
+
+
+def get_kmeans_palette(
+        image, color_count,
+        batch_size=KMEANS_BATCH_SIZE, max_iterations=KMEANS_MAX_ITERATIONS
+):  # pylint: disable=too-many-locals
+    """
+    Mini-batch k-means, started from the median cut palette.
+    Returns list of (pixel_count, (r, g, b)) tuples.
+    """
+    pixels = numpy.asarray(image, dtype=numpy.float32).reshape(-1, 3)
+    if not pixels.size:
+        return []
+    centers = numpy.array(
+        [color for _pixel_count, color in get_median_cut_palette(image, color_count)],
+        dtype=numpy.float32
+    )
+    seen_pixels = numpy.zeros(len(centers))
+    random_state = numpy.random.RandomState(KMEANS_SEED)  # pylint: disable=no-member
+    for _iteration in range(max_iterations):
+        batch = pixels[random_state.randint(0, len(pixels), batch_size)]
+        nearest = _get_nearest_centers(batch, centers)
+        batch_counts = numpy.bincount(nearest, minlength=len(centers))
+        batch_sums = numpy.zeros_like(centers)
+        numpy.add.at(batch_sums, nearest, batch)
+        updated = batch_counts > 0
+        seen_pixels += batch_counts
+        # each center moves towards the mean of its batch pixels,
+        # slower as more pixels were already assigned to it:
+        learning_rates = (batch_counts[updated] / seen_pixels[updated])[:, None]
+        new_centers = centers[updated] + learning_rates * (
+            batch_sums[updated] / batch_counts[updated][:, None] - centers[updated]
+        )
+        max_shift = numpy.abs(new_centers - centers[updated]).max() if updated.any() else 0
+        centers[updated] = new_centers
+        if max_shift < KMEANS_TOLERANCE:
+            break
+    pixel_counts = numpy.bincount(_get_nearest_centers(pixels, centers), minlength=len(centers))
+    return [
+        (int(pixel_count), tuple(int(round(channel)) for channel in center))
+        for pixel_count, center in zip(pixel_counts, centers)
+        if pixel_count
+    ]
+
+
+QUANTIZERS = {
+    QUANTIZE_METHOD_MEDIAN_CUT: get_median_cut_palette,
+    QUANTIZE_METHOD_KMEANS: get_kmeans_palette,
+}
+
+
+def get_hex_palette(image_path, method, color_count):
+    """
+    Returns hex colors, most frequent first.
+    """
+    palette = QUANTIZERS[method](load_image(image_path), color_count)
+    return [
+        '{:02x}{:02x}{:02x}'.format(*color)
+        for _pixel_count, color in sorted(palette, key=lambda item: item[0], reverse=True)
+    ]
@@ -1,21 +1,17 @@
 import os
 import random
 
-from gi.repository import Gdk
-
 from oomox_gui.plugin_api import OomoxImportPlugin
-from oomox_gui.color import convert_gdk_to_theme_color
+from oomox_gui.color import color_hex_from_list
 
 
 PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
 
 
-def get_random_gdk_color():
-    return Gdk.RGBA(random.random(), random.random(), random.random(), 1)
-
-
 def get_random_theme_color():
-    return convert_gdk_to_theme_color(get_random_gdk_color())
+    return color_hex_from_list([
+        random.random() * 255 for _i in range(3)
+    ])
 
 
 class ColorRandomizator():
@@ -57,14 +53,9 @@ class Plugin(OomoxImportPlugin):
 
     def read_colorscheme_from_path(self, preset_path):
         # pylint:disable=bad-option-value,import-outside-toplevel
-        from oomox_gui.theme_model import THEME_MODEL
-
-        theme_keys = [
-            item['key']
-            for section in THEME_MODEL.values()
-            for item in section
-            if 'key' in item
-        ]
+        from oomox_gui.theme_model import THEME_MODEL_INDEX
+
+        theme_keys = THEME_MODEL_INDEX.keys
 
         colorscheme = {}
 
@@ -55,14 +55,9 @@ class Plugin(OomoxImportPlugin):
 
     def read_colorscheme_from_path(self, preset_path):
         # pylint:disable=bad-option-value,import-outside-toplevel
-        from oomox_gui.theme_model import THEME_MODEL
-
-        theme_keys = [
-            item['key']
-            for section in THEME_MODEL.values()
-            for item in section
-            if 'key' in item
-        ]
+        from oomox_gui.theme_model import THEME_MODEL_INDEX
+
+        theme_keys = THEME_MODEL_INDEX.keys
 
         colorscheme = {}
 
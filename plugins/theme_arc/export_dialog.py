@@ -0,0 +1,62 @@
+import os
+
+from oomox_gui.export_common import CommonGtkThemeExportDialog
+# from oomox_gui.export_common import OPTION_GTK2_HIDPI
+from oomox_gui.i18n import _
+
+
+PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
+THEME_DIR = os.path.join(PLUGIN_DIR, "arc-theme/")
+
+OPTION_EXPORT_CINNAMON_THEME = 'OPTION_EXPORT_CINNAMON_THEME'
+OPTION_EXPORT_GNOME_SHELL_THEME = 'OPTION_EXPORT_GNOME_SHELL_THEME'
+OPTION_EXPORT_XFWM_THEME = 'OPTION_EXPORT_XFWM_THEME'
+
+
+class ArcThemeExportDialog(CommonGtkThemeExportDialog):
+
+    config_name = 'arc_theme'
+    timeout = 1000
+
+    def do_export(self):
+        self.command = [
+            "bash",
+            os.path.join(THEME_DIR, "change_color.sh"),
+            # "--hidpi", str(self.export_config[OPTION_GTK2_HIDPI]),
+            "--output", self.theme_name,
+            self.temp_theme_path,
+        ]
+        autogen_opts = []
+        if not self.export_config[OPTION_EXPORT_CINNAMON_THEME]:
+            autogen_opts += ["--disable-cinnamon"]
+        if not self.export_config[OPTION_EXPORT_GNOME_SHELL_THEME]:
+            autogen_opts += ["--disable-gnome-shell"]
+        if not self.export_config[OPTION_EXPORT_XFWM_THEME]:
+            autogen_opts += ["--disable-xfwm"]
+        if autogen_opts:
+            self.command += [
+                "--autogen-opts", " ".join(autogen_opts),
+            ]
+        super().do_export()
+
+    def __init__(self, transient_for, colorscheme, theme_name, **kwargs):
+        super().__init__(
+            transient_for=transient_for,
+            colorscheme=colorscheme,
+            theme_name=theme_name,
+            override_options={
+                OPTION_EXPORT_CINNAMON_THEME: {
+                    'default': False,
+                    'display_name': _("Generate theme for _Cinnamon"),
+                },
+                OPTION_EXPORT_GNOME_SHELL_THEME: {
+                    'default': False,
+                    'display_name': _("Generate theme for GNOME _Shell"),
+                },
+                OPTION_EXPORT_XFWM_THEME: {
+                    'default': False,
+                    'display_name': _("Generate theme for _Xfwm"),
+                },
+            },
+            **kwargs
+        )
@@ -1,73 +1,17 @@
 # pylint: disable=too-few-public-methods
 import os
 
-from gi.repository import Gtk
-
-from oomox_gui.export_common import CommonGtkThemeExportDialog
-# from oomox_gui.export_common import OPTION_GTK2_HIDPI
-from oomox_gui.plugin_api import OomoxThemePlugin
+from oomox_gui.plugin_api import OomoxThemePlugin, LazyExportDialog
 from oomox_gui.color import mix_theme_colors
 from oomox_gui.i18n import _
 
 
 PLUGIN_DIR = os.path.dirname(os.path.realpath(__file__))
-THEME_DIR = os.path.join(PLUGIN_DIR, "arc-theme/")
-
-OPTION_EXPORT_CINNAMON_THEME = 'OPTION_EXPORT_CINNAMON_THEME'
-OPTION_EXPORT_GNOME_SHELL_THEME = 'OPTION_EXPORT_GNOME_SHELL_THEME'
-OPTION_EXPORT_XFWM_THEME = 'OPTION_EXPORT_XFWM_THEME'
-
-
-class ArcThemeExportDialog(CommonGtkThemeExportDialog):
-
-    config_name = 'arc_theme'
-    timeout = 1000
-
-    def do_export(self):
-        self.command = [
-            "bash",
-            os.path.join(THEME_DIR, "change_color.sh"),
-            # "--hidpi", str(self.export_config[OPTION_GTK2_HIDPI]),
-            "--output", self.theme_name,
-            self.temp_theme_path,
-        ]
-        autogen_opts = []
-        if not self.export_config[OPTION_EXPORT_CINNAMON_THEME]:
-            autogen_opts += ["--disable-cinnamon"]
-        if not self.export_config[OPTION_EXPORT_GNOME_SHELL_THEME]:
-            autogen_opts += ["--disable-gnome-shell"]
-        if not self.export_config[OPTION_EXPORT_XFWM_THEME]:
-            autogen_opts += ["--disable-xfwm"]
-        if autogen_opts:
-            self.command += [
-                "--autogen-opts", " ".join(autogen_opts),
-            ]
-        super().do_export()
-
-    def __init__(self, transient_for, colorscheme, theme_name, **kwargs):
-        super().__init__(
-            transient_for=transient_for,
-            colorscheme=colorscheme,
-            theme_name=theme_name,
-            override_options={
-                OPTION_EXPORT_CINNAMON_THEME: {
-                    'default': False,
-                    'display_name': _("Generate theme for _Cinnamon"),
-                },
-                OPTION_EXPORT_GNOME_SHELL_THEME: {
-                    'default': False,
-                    'display_name': _("Generate theme for GNOME _Shell"),
-                },
-                OPTION_EXPORT_XFWM_THEME: {
-                    'default': False,
-                    'display_name': _("Generate theme for _Xfwm"),
-                },
-            },
-            **kwargs
-        )
 
 
 def _monkeypatch_update_preview_borders(preview_object):
+    from gi.repository import Gtk  # pylint: disable=bad-option-value,import-outside-toplevel
+
     _monkeypatch_id = '_arc_borders_monkeypatched'
 
     if getattr(preview_object, _monkeypatch_id, None):
@@ -132,7 +76,9 @@ class Plugin(OomoxThemePlugin):
         'GTK+2, GTK+3\n'
         'Cinnamon, GNOME Shell, Metacity, Openbox, Unity, Xfwm'
     )
-    export_dialog = ArcThemeExportDialog
+    export_dialog = LazyExportDialog(
+        os.path.join(PLUGIN_DIR, 'export_dialog.py'), 'ArcThemeExportDialog'
+    )
     gtk_preview_dir = os.path.join(PLUGIN_DIR, "gtk_preview_css/")
     preview_sizes = {
         OomoxThemePlugin.PreviewImageboxesNames.CHECKBOX.name: 16,
@@ -161,6 +107,7 @@ class Plugin(OomoxThemePlugin):
                 colors['BTN_BG'], colors['BTN_FG'],
                 0.75
             ),
+            'fallback_function_keys': ['BTN_BG', 'BTN_FG'],
             'type': 'color',
             'display_name': _('Border'),
             'description': _('not supported by GTK+2 theme'),
@@ -0,0 +1,13 @@
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+# keep the caches and configs written by the tests away from the user's ones
+# (it should be set before `oomox_gui.config` gets imported):
+_CONFIG_DIR = tempfile.mkdtemp(prefix='oomox_tests_')
+os.environ['XDG_CONFIG_HOME'] = _CONFIG_DIR
+atexit.register(shutil.rmtree, _CONFIG_DIR, ignore_errors=True)
@@ -0,0 +1,38 @@
+import os
+
+from oomox_gui.disk_cache import DiskCache
+
+
+def get_num_entries(disk_cache):
+    return len([
+        file_name for file_name in os.listdir(disk_cache.cache_dir)
+        if file_name.endswith(DiskCache.ENTRY_EXTENSION)
+    ])
+
+
+def test_values_survive_new_instance():
+    disk_cache = DiskCache(name='test_values', version=1)
+    disk_cache.set(disk_cache.get_key('a', 1), {'value': ['ü', 1]})
+    new_disk_cache = DiskCache(name='test_values', version=1)
+    assert new_disk_cache.get(new_disk_cache.get_key('a', 1)) == {'value': ['ü', 1]}
+    assert DiskCache(name='test_values', version=2).get(disk_cache.get_key('a', 1)) is None
+
+
+def test_number_of_entries_is_limited():
+    disk_cache = DiskCache(name='test_eviction', version=1, max_entries=20)
+    for index in range(100):
+        disk_cache.set(disk_cache.get_key(index), index)
+        assert get_num_entries(disk_cache) <= 20
+        # overwriting the entry doesn't add a new one:
+        disk_cache.set(disk_cache.get_key(index), index)
+
+
+def test_entries_are_evicted_in_batches(monkeypatch):
+    disk_cache = DiskCache(name='test_batches', version=1, max_entries=20)
+    evictions = []
+    evict = disk_cache._evict  # pylint: disable=protected-access
+    monkeypatch.setattr(disk_cache, '_evict', lambda: (evictions.append(1), evict()))
+    for index in range(100):
+        disk_cache.set(disk_cache.get_key(index), index)
+    # down to 18 entries each time after going over 20:
+    assert len(evictions) == len(range(21, 101, 3))
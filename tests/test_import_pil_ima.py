@@ -0,0 +1,132 @@
+import os
+import random
+
+import pytest
+
+from oomox_gui.config import OOMOX_ROOT_DIR
+from oomox_gui.helpers import get_plugin_module
+
+pytest.importorskip('numpy')
+Image = pytest.importorskip('PIL.Image')
+
+
+ima = get_plugin_module(  # pylint: disable=invalid-name
+    'ima', os.path.join(OOMOX_ROOT_DIR, 'plugins/import_pil/ima.py')
+)
+
+SCREENSHOTS = ('pokedex_ash.png', 'screenshot_gui.png')
+QUALITIES = (40, 80)
+ACCURACIES = (16, 48)
+
+
+def generate_image(image_path, seed, size=(160, 120), block_size=8):
+    """
+    Noisy blocks of random colors, a bit like a downscaled photo.
+    """
+    randomizer = random.Random(seed)
+    image = Image.new('RGB', size)
+    pixels = image.load()
+    for block_x in range(0, size[0], block_size):
+        for block_y in range(0, size[1], block_size):
+            block_color = [randomizer.randrange(256) for _channel in range(3)]
+            for pixel_x in range(block_x, min(block_x + block_size, size[0])):
+                for pixel_y in range(block_y, min(block_y + block_size, size[1])):
+                    pixels[pixel_x, pixel_y] = tuple(
+                        min(255, max(0, channel + randomizer.randrange(-6, 7)))
+                        for channel in block_color
+                    )
+    image.save(image_path)
+    return image_path
+
+
+@pytest.fixture(name='image_paths', scope='module')
+def fixture_image_paths(tmp_path_factory):
+    image_dir = tmp_path_factory.mktemp('images')
+    return [
+        os.path.join(OOMOX_ROOT_DIR, 'screenshots', screenshot) for screenshot in SCREENSHOTS
+    ] + [
+        generate_image(str(image_dir / 'generated{}.png'.format(seed)), seed)
+        for seed in range(2)
+    ]
+
+
+@pytest.fixture(name='without_numpy')
+def fixture_without_numpy(monkeypatch):
+    def _without_numpy(function, *args, **kwargs):
+        with monkeypatch.context() as context:
+            context.setattr(ima, 'numpy', None)
+            return function(*args, **kwargs)
+    return _without_numpy
+
+
+@pytest.mark.parametrize('histogram_bits', [None, ima.HISTOGRAM_BITS])
+@pytest.mark.parametrize('quality', QUALITIES)
+def test_jolteon_same_without_numpy(image_paths, without_numpy, quality, histogram_bits):
+    for image_path in image_paths:
+        assert ima.jolteon(
+            Image.open(image_path), quality, histogram_bits=histogram_bits
+        ) == without_numpy(
+            ima.jolteon, Image.open(image_path), quality, histogram_bits=histogram_bits
+        ), image_path
+
+
+@pytest.mark.parametrize('accuracy', ACCURACIES)
+@pytest.mark.parametrize('quality', QUALITIES)
+def test_palette_same_without_numpy(image_paths, without_numpy, quality, accuracy):
+    for image_path in image_paths:
+        palette = ima.get_hex_palette(image_path, accuracy=accuracy, quality=quality)
+        assert palette == without_numpy(
+            ima.get_hex_palette, image_path, accuracy=accuracy, quality=quality
+        ), image_path
+
+
+@pytest.fixture(name='big_image_path')
+def fixture_big_image_path(tmp_path):
+    def _big_image_path(image_format, size=(1600, 1200)):
+        image_path = str(tmp_path / 'big.{}'.format(image_format))
+        generate_image(image_path, 0, size=size, block_size=64)
+        return image_path
+    return _big_image_path
+
+
+def test_reduce_image_jpeg_draft(big_image_path):
+    image = Image.open(big_image_path('jpg'))
+    # draft mode decodes JPEG at 1/8 of its size, so the limit is not reached:
+    reduced_image = ima.reduce_image(image, (200, 150), max_memory=200 * 150 * 4)
+    assert reduced_image.size == (200, 150)
+    assert reduced_image.mode == 'RGB'
+
+
+def test_reduce_image_png_fallback(big_image_path):
+    image_path = big_image_path('png')
+    reduced_image = ima.reduce_image(Image.open(image_path), (350, 250))
+    # shrinked by the biggest integer factor which keeps it not smaller than requested:
+    assert reduced_image.size == (400, 300)
+    assert reduced_image.tobytes() == Image.open(image_path).reduce(4).tobytes()
+    # no draft mode, so it's decoded at full size:
+    with pytest.raises(ima.ImageTooBigError):
+        ima.reduce_image(Image.open(image_path), (200, 150), max_memory=1600 * 1200 * 4 - 1)
+
+
+def test_reduce_image_noop_below_threshold(big_image_path):
+    image = Image.open(big_image_path('png', size=(300, 200)))
+    assert ima.reduce_image(image, (200, 150)) is image
+    image = Image.open(big_image_path('jpg', size=(300, 200)))
+    assert ima.reduce_image(image, (200, 150)).size == (300, 200)
+
+
+@pytest.mark.parametrize('mode,bytes_per_pixel', [
+    ('L', 1),
+    ('RGB', 4),
+    ('I;16', 2),
+    ('F', 4),
+])
+def test_reduce_image_memory_by_mode(mode, bytes_per_pixel):
+    num_of_pixels = 64 * 48
+    decoded_memory = num_of_pixels * bytes_per_pixel
+    if mode not in ima.REDUCIBLE_IMAGE_MODES:
+        decoded_memory += num_of_pixels * 4
+    image = Image.new(mode, (64, 48))
+    assert ima.reduce_image(image, (8, 6), max_memory=decoded_memory).size == (8, 6)
+    with pytest.raises(ima.ImageTooBigError):
+        ima.reduce_image(image, (8, 6), max_memory=decoded_memory - 1)
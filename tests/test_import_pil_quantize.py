@@ -0,0 +1,118 @@
+import os
+import random
+
+import pytest
+
+from oomox_gui.config import OOMOX_ROOT_DIR
+from oomox_gui.helpers import get_plugin_module
+
+Image = pytest.importorskip('PIL.Image')
+
+
+quantize = get_plugin_module(  # pylint: disable=invalid-name
+    'quantize', os.path.join(OOMOX_ROOT_DIR, 'plugins/import_pil/quantize.py')
+)
+
+COLOR_COUNTS = (1, 4, 16)
+
+
+def get_quantizers():
+    return [
+        pytest.param(
+            quantize.QUANTIZERS[method], id=method,
+            marks=pytest.mark.skipif(
+                method not in quantize.get_quantize_methods(),
+                reason='numpy is not installed',
+            ),
+        )
+        for method in (quantize.QUANTIZE_METHOD_MEDIAN_CUT, quantize.QUANTIZE_METHOD_KMEANS)
+    ]
+
+
+def generate_image(seed, size=(64, 48), num_colors=6):
+    """
+    Noisy pixels around a few random colors.
+    """
+    randomizer = random.Random(seed)
+    colors = [
+        [randomizer.randrange(16, 240) for _channel in range(3)]
+        for _color_index in range(num_colors)
+    ]
+    image = Image.new('RGB', size)
+    image.putdata([
+        tuple(
+            channel + randomizer.randrange(-16, 17)
+            for channel in randomizer.choice(colors)
+        )
+        for _pixel_index in range(size[0] * size[1])
+    ])
+    return image
+
+
+def assert_valid_palette(palette, image, color_count):
+    assert 0 < len(palette) <= color_count
+    assert sum(pixel_count for pixel_count, _color in palette) == image.width * image.height
+    # (min, max) of each channel:
+    extrema = image.getextrema()
+    for pixel_count, color in palette:
+        assert pixel_count > 0
+        assert all(low <= channel <= high for channel, (low, high) in zip(color, extrema))
+
+
+@pytest.mark.parametrize('color_count', COLOR_COUNTS)
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('quantizer', get_quantizers())
+def test_palette_size_and_bounds(quantizer, seed, color_count):
+    image = generate_image(seed)
+    palette = quantizer(image, color_count)
+    assert_valid_palette(palette, image, color_count)
+    assert palette == quantizer(image.copy(), color_count)
+
+
+@pytest.mark.parametrize('quantizer', get_quantizers())
+def test_fewer_colors_than_requested(quantizer):
+    colors = [(10, 20, 30), (200, 100, 50), (0, 255, 128)]
+    image = Image.new('RGB', (3, 4))
+    image.putdata(colors * 4)
+    palette = quantizer(image, 16)
+    assert_valid_palette(palette, image, 16)
+    assert sorted(palette) == [(4, color) for color in sorted(colors)]
+
+
+@pytest.mark.parametrize('quantizer', get_quantizers())
+def test_single_color(quantizer):
+    image = Image.new('RGB', (8, 8), (12, 34, 56))
+    assert quantizer(image, 4) == [(64, (12, 34, 56))]
+
+
+@pytest.mark.parametrize('quantizer', get_quantizers())
+def test_empty_image(quantizer):
+    assert quantizer(Image.new('RGB', (0, 0)), 4) == []
+
+
+@pytest.mark.skipif(
+    quantize.QUANTIZE_METHOD_KMEANS not in quantize.get_quantize_methods(),
+    reason='numpy is not installed',
+)
+def test_kmeans_iterations():
+    image = generate_image(0)
+    # without iterations the pixels are just assigned to the median cut colors:
+    assert sorted(
+        color for _pixel_count, color in quantize.get_kmeans_palette(image, 4, max_iterations=0)
+    ) == sorted(
+        color for _pixel_count, color in quantize.get_median_cut_palette(image, 4)
+    )
+    # stopped by the iterations limit before converging:
+    for max_iterations in (1, 3):
+        assert_valid_palette(
+            quantize.get_kmeans_palette(image, 4, batch_size=16, max_iterations=max_iterations),
+            image, 4,
+        )
+    # once the centers stopped moving the next iterations are not run:
+    image = Image.new('RGB', (16, 16))
+    image.putdata([(20, 20, 20), (22, 20, 20), (220, 220, 220), (220, 222, 220)] * 64)
+    assert quantize.get_kmeans_palette(
+        image, 2, max_iterations=quantize.KMEANS_MAX_ITERATIONS
+    ) == quantize.get_kmeans_palette(
+        image, 2, max_iterations=quantize.KMEANS_MAX_ITERATIONS * 100
+    )
@@ -0,0 +1,125 @@
+import os
+import random
+
+import pytest
+
+from oomox_gui.batch import BatchApp
+from oomox_gui.config import TERMINAL_TEMPLATE_DIR
+from oomox_gui.terminal import (
+    SMARTY_RANKING_ACCURACY,
+    generate_theme_from_full_palette, get_all_colors_from_oomox_colorscheme,
+    rank_terminal_templates,
+    _generate_theme_from_full_palette, _swap_bg_fg_for_template,
+)
+from oomox_gui.terminal_smarty import prepare_smarty_search, _smarty_scan_level_python
+from oomox_gui.terminal_templates import TERMINAL_TEMPLATES
+
+
+PALETTE = {
+    'BG': '1d1f21', 'FG': 'c5c8c6', 'HDR_BG': '282a36', 'HDR_FG': 'e0e0e0',
+    'SEL_BG': '81a2be', 'SEL_FG': '1d1f21', 'ACCENT_BG': 'cc6666',
+    'TXT_BG': '373b41', 'TXT_FG': 'f0c674', 'BTN_BG': 'b5bd68', 'BTN_FG': 'b294bb',
+}
+TEMPLATE_NAMES = ('monovedek', 'basic')
+ACCURACY = 0x20
+NUM_EDITS = 5
+
+
+def get_full_search_colors(palette, template_path, theme_bg, theme_fg):
+    reference_colors = TERMINAL_TEMPLATES.get_by_path(template_path).colors
+    theme_bg, theme_fg = _swap_bg_fg_for_template(reference_colors, theme_bg, theme_fg)
+    generated_colors, _search_result = _generate_theme_from_full_palette(
+        reference_colors,
+        sorted(get_all_colors_from_oomox_colorscheme(palette)),
+        theme_bg,
+        ACCURACY,
+    )
+    generated_colors.update({'background': theme_bg, 'foreground': theme_fg})
+    return generated_colors
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('template_name', TEMPLATE_NAMES)
+def test_incremental_refine_matches_full(template_name, seed):
+    randomizer = random.Random(seed)
+    template_path = os.path.join(TERMINAL_TEMPLATE_DIR, template_name)
+    palette = dict(PALETTE)
+    for _edit_index in range(NUM_EDITS):
+        palette[randomizer.choice(sorted(palette))] = '{:06x}'.format(
+            randomizer.randrange(0x1000000)
+        )
+        results = []
+        generate_theme_from_full_palette(
+            palette, palette['BG'], palette['FG'], template_path,
+            app=BatchApp(), result_callback=results.append,
+            accuracy=ACCURACY, time_budget=0.1, incremental=True,
+        )
+        assert results
+        assert results[-1] == get_full_search_colors(
+            palette, template_path, palette['BG'], palette['FG']
+        )
+
+
+class QueuedApp(BatchApp):
+    """
+    Runs the scheduled tasks only when asked, the newer task of the group
+    replaces the queued one.
+    """
+
+    queue = None
+
+    def __init__(self):
+        super().__init__()
+        self.queue = []
+
+    def schedule_task(self, task, *args, group=None, **kwargs):  # pylint: disable=arguments-differ
+        self.queue = [
+            queued for queued in self.queue if group is None or queued[0] != group
+        ] + [(group, task, args, kwargs)]
+
+    def run_queued(self):
+        while self.queue:
+            _group, task, args, kwargs = self.queue.pop(0)
+            super().schedule_task(task, *args, **kwargs)
+
+
+def test_preview_is_searched_in_task():
+    app = QueuedApp()
+    template_path = os.path.join(TERMINAL_TEMPLATE_DIR, 'monovedek')
+    results = []
+    for bg_color in ('101010', '202020', '303030'):
+        palette = dict(PALETTE, BG=bg_color)
+        generate_theme_from_full_palette(
+            palette, palette['BG'], palette['FG'], template_path,
+            app=app, result_callback=results.append,
+            accuracy=ACCURACY, time_budget=0.1, incremental=True,
+        )
+    assert not results
+    assert len(app.queue) == 1
+    app.run_queued()
+    assert len(results) == 2
+    assert results[-1] == get_full_search_colors(
+        palette, template_path, palette['BG'], palette['FG']
+    )
+
+
+def test_ranking_matches_per_template_scans():
+    all_colors = sorted(get_all_colors_from_oomox_colorscheme(PALETTE))
+    axis = range(-0xff, 0xff + SMARTY_RANKING_ACCURACY, SMARTY_RANKING_ACCURACY)
+    scores = {}
+    for template_name in TERMINAL_TEMPLATES.get_names():
+        reference_colors = TERMINAL_TEMPLATES.get(template_name).colors
+        theme_bg, _theme_fg = _swap_bg_fg_for_template(
+            reference_colors, PALETTE['TXT_BG'], PALETTE['TXT_FG']
+        )
+        result = _smarty_scan_level_python(prepare_smarty_search(
+            reference_colors, all_colors, theme_bg, accuracy=SMARTY_RANKING_ACCURACY,
+        ), (axis, axis, axis))
+        scores[template_name] = result[0] if result else None
+    ranking = rank_terminal_templates(PALETTE, PALETTE['TXT_BG'], PALETTE['TXT_FG'])
+    assert sorted(template_name for template_name, _score in ranking) == sorted(scores)
+    for template_name, score in ranking:
+        assert score == pytest.approx(scores[template_name]), template_name
+    assert [score for _template_name, score in ranking] == sorted(
+        scores.values(), key=lambda score: (score is None, -(score or 0))
+    )
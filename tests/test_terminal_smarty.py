@@ -0,0 +1,64 @@
+from functools import lru_cache
+
+import pytest
+
+from oomox_gui.terminal_templates import TERMINAL_TEMPLATES
+from oomox_gui.terminal_smarty import (
+    SMARTY_ENGINE_REFERENCE, SMARTY_ENGINE_PYTHON, SMARTY_ENGINE_NUMPY, SMARTY_ENGINE_BOUNDED,
+    prepare_smarty_search, smarty_search, numpy,
+)
+
+
+# (theme background, all the theme colors):
+PALETTES = (
+    ('1d1f21', [
+        '1d1f21', '282a36', 'c5c8c6', 'cc6666', 'b5bd68', 'f0c674',
+        '81a2be', 'b294bb', '8abeb7', 'e0e0e0', '373b41', 'de935f',
+    ]),
+    ('fdf6e3', [
+        'fdf6e3', 'eee8d5', '93a1a1', '657b83', '073642', 'b58900',
+        'cb4b16', 'dc322f', 'd33682', '6c71c4', '268bd2', '2aa198', '859900',
+    ]),
+    ('303030', [
+        '303030', '404040', '808080', 'a0a0a0', 'e0e0e0', 'ff8000',
+    ]),
+)
+TEMPLATE_NAMES = ('monovedek', 'basic', 'tempus_dawn')
+ACCURACIES = (0x80, 0x40, 0x20)
+# (engine, number of processes):
+ENGINES = (
+    (SMARTY_ENGINE_PYTHON, None),
+    (SMARTY_ENGINE_NUMPY, None),
+    (SMARTY_ENGINE_BOUNDED, None),
+    (SMARTY_ENGINE_PYTHON, 2),
+    (SMARTY_ENGINE_NUMPY, 2),
+)
+
+
+def get_search(template_name, palette_index, accuracy):
+    theme_bg, all_colors = PALETTES[palette_index]
+    return prepare_smarty_search(
+        TERMINAL_TEMPLATES.get(template_name).colors, all_colors, theme_bg,
+        accuracy=accuracy,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_reference_offset(template_name, palette_index, accuracy):
+    offset, _score = smarty_search(
+        get_search(template_name, palette_index, accuracy), engine=SMARTY_ENGINE_REFERENCE
+    )
+    return offset
+
+
+@pytest.mark.parametrize('engine,processes', ENGINES)
+@pytest.mark.parametrize('accuracy', ACCURACIES)
+@pytest.mark.parametrize('palette_index', range(len(PALETTES)))
+@pytest.mark.parametrize('template_name', TEMPLATE_NAMES)
+def test_engine_matches_reference(template_name, palette_index, accuracy, engine, processes):
+    if engine == SMARTY_ENGINE_NUMPY and not numpy:
+        pytest.skip('numpy is not installed')
+    offset, _score = smarty_search(
+        get_search(template_name, palette_index, accuracy), engine=engine, processes=processes
+    )
+    assert list(offset) == list(get_reference_offset(template_name, palette_index, accuracy))
@@ -0,0 +1,23 @@
+import os
+
+from oomox_gui.terminal_templates import TerminalTemplateRegistry, TerminalTemplateOptions
+
+
+def add_template(template_dir, name, mtime):
+    with open(os.path.join(template_dir, name), 'w', encoding='utf-8') as template_file:
+        template_file.write('*background: #1d1f21\n*color1: #CC6666\n! comment\n')
+    os.utime(template_dir, (mtime, mtime))
+
+
+def test_template_options_follow_directory(tmp_path):
+    template_dir = str(tmp_path)
+    registry = TerminalTemplateRegistry(template_dir)
+    options = TerminalTemplateOptions(registry)
+    add_template(template_dir, 'b', 1000)
+    assert list(options) == [{'value': 'b'}]
+    add_template(template_dir, 'a', 2000)
+    assert list(options) == [{'value': 'a'}, {'value': 'b'}]
+    assert len(options) == 2
+    assert options[-1] == {'value': 'b'}
+    assert registry.get('a').colors == {'background': '1d1f21', 'color1': 'cc6666'}
+    assert registry.get('a').rgb['color1'] == (0xcc, 0x66, 0x66)
@@ -0,0 +1,38 @@
+import os
+import random
+
+import pytest
+
+from oomox_gui.theme_file import get_preset_groups, get_group_first_presets, get_group_presets
+
+
+NAMES = ('a', 'A', 'b', 'B_c', 'ab', 'a b', 'Zz')
+
+
+def create_presets(colors_dir, seed, num_presets=40):
+    randomizer = random.Random(seed)
+    for _preset_index in range(num_presets):
+        preset_path = os.path.join(colors_dir, *[
+            randomizer.choice(NAMES) for _depth in range(randomizer.randint(1, 4))
+        ])
+        try:
+            os.makedirs(os.path.dirname(preset_path), exist_ok=True)
+            with open(preset_path, 'w') as preset_file:
+                preset_file.write('BG=ffffff\n')
+        except (FileExistsError, IsADirectoryError, NotADirectoryError):
+            continue
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_group_first_presets_go_first(tmp_path, seed):
+    colors_dir = str(tmp_path)
+    create_presets(colors_dir, seed)
+    os.makedirs(os.path.join(colors_dir, 'empty', 'subdir'))
+    groups = get_preset_groups(colors_dir, is_default=False)
+    assert groups
+    for group in groups:
+        group_presets = get_group_presets(group)
+        assert get_group_first_presets(group, 2) == group_presets[:2], group.name
+        assert group_presets == sorted(
+            group_presets, key=lambda preset: preset.name.lower()
+        ), group.name
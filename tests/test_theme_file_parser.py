@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from oomox_gui.config import COLORS_DIR
+from oomox_gui.theme_file_parser import FALLBACK_RESOLVER, read_colorscheme_from_path
+
+
+PRESET_PATH = os.path.join(COLORS_DIR, 'Featured/Gigavolt')
+# keys with the fallback functions mixing BTN_BG with other colors:
+BTN_BG_MIX_KEYS = ('ARC_WIDGET_BORDER_COLOR', 'ICONS_SYMBOLIC_ACTION')
+
+
+def read_colorscheme(preset_path):
+    colorschemes = []
+    read_colorscheme_from_path(preset_path, callback=colorschemes.append)
+    return colorschemes[0]
+
+
+@pytest.fixture(name='colorscheme')
+def fixture_colorscheme():
+    result = read_colorscheme(PRESET_PATH)
+    # make them follow their fallbacks instead of the values from the preset:
+    for key in BTN_BG_MIX_KEYS:
+        result.pop(key, None)
+    FALLBACK_RESOLVER.resolve(result)
+    return result
+
+
+def test_resolve_changed_updates_dependents(colorscheme):
+    old_colorscheme = dict(colorscheme)
+    colorscheme['BTN_BG'] = '000000'
+    updated_keys = FALLBACK_RESOLVER.resolve_changed(
+        colorscheme, {'BTN_BG': old_colorscheme['BTN_BG']}
+    )
+    assert 'ARC_WIDGET_BORDER_COLOR' in updated_keys
+    assert colorscheme['ARC_WIDGET_BORDER_COLOR'] != old_colorscheme['ARC_WIDGET_BORDER_COLOR']
+
+
+@pytest.mark.parametrize('partial_value', ['', 'a', 'ab', 'abc', 'abcd', 'abcde', 'zz'])
+def test_resolve_changed_partial_hex_value(colorscheme, partial_value):
+    old_colorscheme = dict(colorscheme)
+    colorscheme['BTN_BG'] = partial_value
+    FALLBACK_RESOLVER.resolve_changed(colorscheme, {'BTN_BG': old_colorscheme['BTN_BG']})
+    for key in BTN_BG_MIX_KEYS:
+        if key in old_colorscheme:
+            assert colorscheme[key] == old_colorscheme[key]